@@ -1,4 +1,10 @@
 bind = "0.0.0.0:10000"  # or whatever port Render assigns
-workers = 1  # Start with 1 for debugging
+# Keep a single worker: games, caches, the save buffer and the per-chat
+# update workers all live in-process, so extra processes would split them.
+# Concurrency comes from threads instead.
+# Start with: gunicorn -c gunicorn_config.py hand_cricket_bot:app
+workers = 1
+worker_class = "gthread"
 timeout = 120
-keepalive = 2
\ No newline at end of file
+threads = 8  # Concurrent webhook requests within the single worker
+keepalive = 75  # Hold connections from Telegram open between updates
\ No newline at end of file
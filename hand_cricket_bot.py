@@ -1,3 +1,6 @@
+import atexit
+import bisect
+import hmac
 import math
 import os
 import logging
@@ -9,6 +12,7 @@ from typing import Optional, Dict, Any, List, Tuple
 import json
 import requests
 import threading
+import queue
 import time
 import re
 import sys
@@ -17,25 +21,23 @@ import telebot
 from telebot import types
 from dotenv import load_dotenv
 from enum import Enum
-from collections import defaultdict, deque
+from collections import defaultdict, deque, OrderedDict
 from functools import wraps
-import schedule
 from collections import deque
 import uuid
+import itertools
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 
 def get_param_style():
     """Get correct parameter placeholder for current database"""
-    return "%s" if bool(os.getenv("DATABASE_URL")) else "?"
+    return PARAM_STYLE
 
 def execute_safe_query(cursor, query_template, params, is_insert=False):
     """Execute query with proper parameter style and return result"""
-    is_postgres = bool(os.getenv("DATABASE_URL"))
-    param_style = "%s" if is_postgres else "?"
-    
     # Replace all ? with %s for postgres or vice versa
-    if is_postgres:
+    if IS_POSTGRES:
         query = query_template.replace("?", "%s")
     else:
         query = query_template
@@ -100,9 +102,17 @@ def test_bot_connection():
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 USE_WEBHOOK = int(os.getenv("USE_WEBHOOK", "0"))  # Default to polling
 WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # Echoed by Telegram in X-Telegram-Bot-Api-Secret-Token
 PORT = int(os.getenv("PORT", 5000))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 DB_PATH = os.getenv("DB_PATH", "cricket_bot.db")
+IS_POSTGRES = bool(os.getenv("DATABASE_URL"))
+PARAM_STYLE = "%s" if IS_POSTGRES else "?"
+# Server-side UTC timestamp; the SQLite form keeps the ISO-8601 layout used elsewhere
+SQL_NOW = "NOW()" if IS_POSTGRES else "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "25"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
 DEFAULT_OVERS = int(os.getenv("DEFAULT_OVERS", "2"))
 DEFAULT_WICKETS = int(os.getenv("DEFAULT_WICKETS", "1"))
 MAX_OVERS = 20
@@ -158,6 +168,17 @@ logger.info(f"Token length: {len(TOKEN) if TOKEN else 0}")
 if not TOKEN:
     raise RuntimeError("TELEGRAM_BOT_TOKEN is not set. Please set it in your environment variables or .env file")
 
+# Share one pooled HTTP session across all Telegram API calls; telebot
+# otherwise opens a fresh session (and TLS handshake) per worker thread
+TELEGRAM_HTTP_POOL_CONNECTIONS = 16
+TELEGRAM_HTTP_POOL_MAXSIZE = 32
+_telegram_session = requests.Session()
+_telegram_session.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=TELEGRAM_HTTP_POOL_CONNECTIONS,
+    pool_maxsize=TELEGRAM_HTTP_POOL_MAXSIZE
+))
+telebot.apihelper.session = _telegram_session
+
 # Initialize Bot directly
 try:
     bot = telebot.TeleBot(TOKEN, parse_mode="HTML", threaded=False)
@@ -173,6 +194,250 @@ logger.info(f"Total callback handlers registered: {len(bot.callback_query_handle
 # Store user session data temporarily
 user_sessions = {}
 
+# Background worker for fire-and-forget tasks (announcements etc.)
+background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bg-task")
+
+# Outbound Telegram sends run on their own workers so a slow API round-trip
+# never blocks the next update. Chats are sharded onto single-thread
+# executors, which keeps each chat's messages in order.
+SEND_WORKERS = int(os.getenv("SEND_WORKERS", "4"))
+SEND_RATE_PER_SEC = 30  # Telegram's global bot limit
+
+
+class TokenBucket:
+    """Thread-safe token bucket used to cap outbound API calls"""
+    
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_send_rate_limiter = TokenBucket(SEND_RATE_PER_SEC)
+_send_pools = [
+    ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"tg-send-{i}")
+    for i in range(SEND_WORKERS)
+]
+
+
+def _send_now(chat_id, text, kwargs):
+    return bot.send_message(chat_id, text, **kwargs)
+
+
+def _log_send_failure(future):
+    exc = future.exception()
+    if exc:
+        logger.error(f"Async send failed: {exc}")
+
+
+# While an update is being handled its sends are collected here and flushed
+# together afterwards (see _process_update_batched). Entries are
+# (chat_id, text, kwargs) for messages and (chat_id, None, (func, args)) for
+# any other send, such as animations.
+_outbox = threading.local()
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def send_async(chat_id, text, **kwargs):
+    """Queue bot.send_message on the chat's send worker and return the Future.
+    
+    Inside an update handler the message is added to the update's outbox
+    instead and None is returned.
+    """
+    pending = getattr(_outbox, 'items', None)
+    if pending is not None:
+        pending.append((chat_id, text, kwargs))
+        return None
+    
+    return _submit_send(chat_id, text, kwargs)
+
+
+def send_call_async(chat_id, func, *args):
+    """Like send_async, for any other chat-visible call (func runs on the send worker)"""
+    pending = getattr(_outbox, 'items', None)
+    if pending is not None:
+        pending.append((chat_id, None, (func, args)))
+        return None
+    
+    return _submit_send(chat_id, None, (func, args))
+
+
+def _submit_send(chat_id, text, kwargs):
+    pool = _send_pools[hash(chat_id) % SEND_WORKERS]
+    if text is None:
+        func, args = kwargs
+        future = pool.submit(func, *args)
+    else:
+        future = pool.submit(_send_now, chat_id, text, kwargs)
+    future.add_done_callback(_log_send_failure)
+    return future
+
+
+def _send_options(kwargs):
+    """Everything but the parse mode and keyboard, which merging handles itself"""
+    return {k: v for k, v in kwargs.items() if k not in ('parse_mode', 'reply_markup')}
+
+
+def _coalesce_outbox(items):
+    """Merge consecutive texts to the same chat into one message.
+    
+    A message is only appended to the previous one when that one carries no
+    keyboard, both use the same parse mode and all other options (reply_to,
+    link previews, ...) are identical, so nothing either message asked for
+    is dropped and buttons stay attached to the text they were sent with.
+    Other sends are never merged and keep their place in the queue.
+    """
+    merged = []
+    for chat_id, text, kwargs in items:
+        if merged and text is not None:
+            prev_chat, prev_text, prev_kwargs = merged[-1]
+            if (prev_chat == chat_id
+                    and prev_text is not None
+                    and 'reply_markup' not in prev_kwargs
+                    and prev_kwargs.get('parse_mode', bot.parse_mode) == kwargs.get('parse_mode', bot.parse_mode)
+                    and _send_options(prev_kwargs) == _send_options(kwargs)
+                    and len(prev_text) + len(text) + 2 <= TELEGRAM_MESSAGE_LIMIT):
+                merged[-1] = (chat_id, f"{prev_text}\n\n{text}", kwargs)
+                continue
+        merged.append((chat_id, text, kwargs))
+    return merged
+
+
+def flush_outbox(wait: bool = False):
+    """Hand the current update's queued sends to the send workers now.
+    
+    Called before anything reaches Telegram outside the outbox so the chat
+    sees messages in the order the handler produced them. wait=True blocks
+    until they are delivered, for direct API calls made on this thread.
+    """
+    items = getattr(_outbox, 'items', None)
+    if not items:
+        return
+    _outbox.items = []
+    futures = [_submit_send(chat_id, text, kwargs) for chat_id, text, kwargs in _coalesce_outbox(items)]
+    if wait:
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass  # already logged by _log_send_failure
+
+
+def _ordered_after_outbox(method):
+    """Wrap a chat-visible bot call: queued sends go out first, then it takes a rate-limit token"""
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        flush_outbox(wait=True)
+        _send_rate_limiter.acquire()
+        return method(*args, **kwargs)
+    return wrapper
+
+
+# Every message, edit and animation passes through here, whether it is sent
+# directly by a handler or from a send worker, so all of them share one rate
+# limit and none overtakes messages the handler queued before it
+# (reply_to goes through send_message as well)
+bot.send_message = _ordered_after_outbox(bot.send_message)
+bot.edit_message_text = _ordered_after_outbox(bot.edit_message_text)
+bot.send_animation = _ordered_after_outbox(bot.send_animation)
+
+
+def send_or_edit(chat_id, text, message_id=None, **kwargs):
+    """Replace the given message in place, or send a new one if it can't be edited"""
+    if message_id is not None:
+        try:
+            return bot.edit_message_text(text, chat_id, message_id, **kwargs)
+        except Exception as e:
+            # Same text and keyboard as shown already (e.g. a button tapped twice)
+            if "message is not modified" in str(e):
+                return None
+            logger.debug(f"Edit of message {message_id} failed, sending instead: {e}")
+    return send_async(chat_id, text, **kwargs)
+
+
+# Incoming updates are handled the same way: one single-thread executor per
+# shard, keyed by chat, so different chats run concurrently while each
+# chat's updates are still processed in arrival order.
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "8"))
+
+_update_pools = [
+    ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"tg-update-{i}")
+    for i in range(UPDATE_WORKERS)
+]
+_process_updates_inline = bot.process_new_updates
+
+
+def _update_chat_key(update):
+    if update.message:
+        return update.message.chat.id
+    if update.callback_query:
+        call = update.callback_query
+        return call.message.chat.id if call.message else call.from_user.id
+    return update.update_id
+
+
+def _log_update_failure(future):
+    exc = future.exception()
+    if exc:
+        logger.error(f"Update processing failed: {exc}", exc_info=exc)
+
+
+def _process_update_batched(update):
+    """Handle one update, then send everything it queued in as few messages as possible"""
+    _outbox.items = []
+    try:
+        _process_updates_inline([update])
+    finally:
+        flush_outbox()
+        _outbox.items = None
+
+
+def dispatch_updates(updates):
+    """Run each update on its chat's worker instead of the receiving thread"""
+    for update in updates:
+        pool = _update_pools[hash(_update_chat_key(update)) % UPDATE_WORKERS]
+        pool.submit(_process_update_batched, update).add_done_callback(_log_update_failure)
+
+
+def _payload_chat_key(payload):
+    """Same shard key as _update_chat_key, read from the raw webhook JSON"""
+    message = payload.get('message')
+    if message:
+        return message['chat']['id']
+    call = payload.get('callback_query')
+    if call:
+        return call['message']['chat']['id'] if call.get('message') else call['from']['id']
+    return payload.get('update_id')
+
+
+def _process_payload(payload):
+    _process_update_batched(telebot.types.Update.de_json(payload))
+
+
+def dispatch_payload(payload):
+    """Queue a raw webhook update; it is parsed on the chat's worker"""
+    pool = _update_pools[hash(_payload_chat_key(payload)) % UPDATE_WORKERS]
+    pool.submit(_process_payload, payload).add_done_callback(_log_update_failure)
+
+
+# Polling hands its batches to process_new_updates; route them through the
+# chat workers too so one slow match turn doesn't stall every other chat.
+bot.process_new_updates = dispatch_updates
+
 
 def validate_environment():
     """Validate required environment variables"""
@@ -197,20 +462,89 @@ def validate_environment():
     logger.info("Environment validation completed successfully")
 
 
+# Hot session keys served from memory; bounded LRU with async write-through
+CACHED_SESSION_KEYS = {"current_streak"}
+_STREAK_CACHE_MAX = 10000
+_STREAK_CACHE = OrderedDict()
+_streak_cache_lock = threading.RLock()
+
+
+def _streak_cache_get(user_id: int):
+    with _streak_cache_lock:
+        if user_id in _STREAK_CACHE:
+            _STREAK_CACHE.move_to_end(user_id)
+            return True, _STREAK_CACHE[user_id]
+    return False, None
+
+
+def _streak_cache_put(user_id: int, value):
+    with _streak_cache_lock:
+        _STREAK_CACHE[user_id] = value
+        _STREAK_CACHE.move_to_end(user_id)
+        while len(_STREAK_CACHE) > _STREAK_CACHE_MAX:
+            _STREAK_CACHE.popitem(last=False)
+
+
+class TTLCache:
+    """Small thread-safe LRU whose entries expire after ttl seconds"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, entry[1]
+    
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+# Per-user balance and level reads for menus/shops; every write path invalidates
+_coins_cache = TTLCache(maxsize=10000, ttl=30)
+_level_cache = TTLCache(maxsize=10000, ttl=30)
+
+
 def get_user_session_data(user_id: int, key: str = None, default=None):
     """Get session data - FIXED VERSION"""
+    if key in CACHED_SESSION_KEYS:
+        hit, value = _streak_cache_get(user_id)
+        if hit:
+            return value
+    
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            execute_query(cur, "SELECT * FROM users WHERE user_id = ?", (user_id,))
+            execute_query(cur, "SELECT session_data FROM user_sessions WHERE user_id = ?", (user_id,))
             
             row = cur.fetchone()
             if row and row['session_data']:
                 session_data = json.loads(row['session_data'])
+                if key in CACHED_SESSION_KEYS:
+                    _streak_cache_put(user_id, session_data.get(key, default))
                 if key:
                     return session_data.get(key, default)
                 return session_data
             
+            if key in CACHED_SESSION_KEYS:
+                _streak_cache_put(user_id, default)
             return default if key else {}
             
     except Exception as e:
@@ -218,17 +552,34 @@ def get_user_session_data(user_id: int, key: str = None, default=None):
         return default if key else {}
 
 
+# session_data is one JSON blob that every write reads, modifies and stores
+# back; writes for the same user hold the same stripe so none is lost
+SESSION_LOCK_STRIPES = 64
+_session_lock_stripes = tuple(threading.Lock() for _ in range(SESSION_LOCK_STRIPES))
+
+
 def set_user_session_data(user_id: int, key: str, value):
     """Set session data in database - fixed with consistent parameters"""
+    if key in CACHED_SESSION_KEYS:
+        # Serve subsequent reads from memory; persist off the request path on
+        # the user's single-thread update worker, so queued writes for one
+        # user are applied in the order they were made
+        _streak_cache_put(user_id, value)
+        _update_pools[hash(user_id) % UPDATE_WORKERS].submit(
+            _write_user_session_data, user_id, key, value
+        ).add_done_callback(_log_update_failure)
+        return
+    _write_user_session_data(user_id, key, value)
+
+
+def _write_user_session_data(user_id: int, key: str, value):
     try:
-        with get_db_connection() as conn:
+        with _session_lock_stripes[hash(user_id) % SESSION_LOCK_STRIPES], get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Get existing data
             session_data = {}
-            cur.execute(f"SELECT session_data FROM user_sessions WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT session_data FROM user_sessions WHERE user_id = {PARAM_STYLE}", (user_id,))
             
             row = cur.fetchone()
             if row and row['session_data']:
@@ -239,7 +590,7 @@ def set_user_session_data(user_id: int, key: str, value):
             
             # Save back
             now = datetime.now(timezone.utc).isoformat()
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO user_sessions (user_id, session_data, updated_at)
                     VALUES (%s, %s, %s)
@@ -292,6 +643,10 @@ PITCH_CONDITIONS = {
     "turning": {"description": "Spin-friendly pitch", "batting_bonus": 0.9, "bowling_bonus": 1.1}
 }
 
+# Condition names drawn for each new game
+_WEATHER_KEYS = tuple(WEATHER_CONDITIONS)
+_PITCH_KEYS = tuple(PITCH_CONDITIONS)
+
 # Rate Limiter
 class RateLimiter:
     def __init__(self):
@@ -387,8 +742,8 @@ def rate_limit_check(action_type: str = 'default'):
                             args[0].chat.id,
                             f"⏱️ Please wait {wait_time:.1f} seconds."
                         )
-                except:
-                    pass
+                except Exception as e:
+                    logger.debug(f"Could not send rate limit notice: {e}")
                 return None
             
             return func(*args, **kwargs)
@@ -397,59 +752,259 @@ def rate_limit_check(action_type: str = 'default'):
 
 # Database Connection - Choose one based on your environment
 # Add connection pooling and better error handling
+# Process-wide connection pools (created lazily on first use)
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises as soon as it is exhausted; this semaphore
+# makes callers wait for a free connection instead
+_pg_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_sqlite_pool = queue.Queue(maxsize=DB_POOL_MAX)
+_sqlite_read_pool = queue.Queue(maxsize=DB_POOL_MAX)
+# Each long-lived worker thread parks its most recently released SQLite
+# connections here and picks them up again without going through the shared
+# queues. Short-lived threads (Timer runs, Flask request threads) always return
+# theirs to the pool, since a parked connection is stranded when its thread exits.
+_sqlite_thread_slot = threading.local()
+SQLITE_PARKING_THREADS = (
+    "tg-update-", "tg-send-", "bg-task",
+    "event-log-batcher", "game-save-buffer", "user-upsert-batcher",
+)
+
+# Applied to every SQLite connection; WAL lets readers run alongside the writer
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+)
+SQLITE_STATEMENT_CACHE = 256
+# journal_mode=WAL is stored in the database file, so it only has to be set
+# by the first write connection this process opens
+_sqlite_wal_enabled = False
+# How often PRAGMA optimize refreshes the query planner statistics
+SQLITE_OPTIMIZE_INTERVAL = 900
+
+
+def _get_pg_pool():
+    """Return the shared psycopg2 pool, creating it on first call"""
+    global _pg_pool
+    if _pg_pool is None:
+        with _pg_pool_lock:
+            if _pg_pool is None:
+                import psycopg2.pool
+                import psycopg2.extras
+                import psycopg2.extensions
+                
+                class _PreparingConnection(psycopg2.extensions.connection):
+                    """Remembers which statements are prepared on this session"""
+                    def __init__(self, *args, **kwargs):
+                        super().__init__(*args, **kwargs)
+                        self.prepared = set()
+                
+                _pg_pool = psycopg2.pool.ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    os.environ["DATABASE_URL"],
+                    connection_factory=_PreparingConnection,
+                    cursor_factory=psycopg2.extras.RealDictCursor
+                )
+                logger.info(f"✓ PostgreSQL pool ready ({DB_POOL_MIN}-{DB_POOL_MAX} connections)")
+    return _pg_pool
+
+
+def _open_sqlite_connection(readonly: bool = False):
+    """Open a long-lived SQLite connection that may be shared across threads"""
+    global _sqlite_wal_enabled
+    if readonly:
+        conn = sqlite3.connect(
+            f"{Path(DB_PATH).resolve().as_uri()}?mode=ro",
+            uri=True, timeout=30.0, check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE
+        )
+    else:
+        # Implicit transactions start with BEGIN IMMEDIATE, so a writer takes
+        # the lock up front instead of failing to upgrade a stale WAL snapshot
+        conn = sqlite3.connect(DB_PATH, timeout=30.0, check_same_thread=False,
+                               cached_statements=SQLITE_STATEMENT_CACHE,
+                               isolation_level="IMMEDIATE")
+        if not _sqlite_wal_enabled:
+            conn.execute("PRAGMA journal_mode=WAL")
+            _sqlite_wal_enabled = True
+    conn.row_factory = sqlite3.Row
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _acquire_connection(readonly: bool = False):
+    if IS_POSTGRES:
+        if not _pg_pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+            raise RuntimeError(f"No database connection free after {DB_POOL_TIMEOUT}s")
+        try:
+            return _get_pg_pool().getconn()
+        except Exception:
+            _pg_pool_slots.release()
+            raise
+    # Prefer the connection this thread used last; it is taken out of the
+    # slot while borrowed, so nested borrows still get separate connections
+    slot = 'read_conn' if readonly else 'write_conn'
+    conn = getattr(_sqlite_thread_slot, slot, None)
+    if conn is not None:
+        setattr(_sqlite_thread_slot, slot, None)
+        return conn
+    pool = _sqlite_read_pool if readonly else _sqlite_pool
+    try:
+        return pool.get_nowait()
+    except queue.Empty:
+        return _open_sqlite_connection(readonly)
+
+
+def _release_connection(conn, broken: bool = False, readonly: bool = False):
+    if IS_POSTGRES:
+        try:
+            _get_pg_pool().putconn(conn, close=broken or bool(conn.closed))
+        finally:
+            _pg_pool_slots.release()
+        return
+    if broken:
+        conn.close()
+        return
+    slot = 'read_conn' if readonly else 'write_conn'
+    if (getattr(_sqlite_thread_slot, slot, None) is None
+            and threading.current_thread().name.startswith(SQLITE_PARKING_THREADS)):
+        setattr(_sqlite_thread_slot, slot, conn)
+        return
+    try:
+        (_sqlite_read_pool if readonly else _sqlite_pool).put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def warm_db_pool():
+    """Open DB_POOL_MIN SQLite connections of each kind up front.
+    
+    Saves the first updates after a restart from paying the connect and
+    PRAGMA cost; call it after db_init() so the read-only opens find the file.
+    """
+    if IS_POSTGRES:
+        _get_pg_pool()
+        return
+    for readonly, pool in ((False, _sqlite_pool), (True, _sqlite_read_pool)):
+        while pool.qsize() < DB_POOL_MIN:
+            try:
+                pool.put_nowait(_open_sqlite_connection(readonly))
+            except queue.Full:
+                break
+            except Exception as e:
+                logger.error(f"Could not pre-open SQLite connection: {e}")
+                break
+
+
+def optimize_database():
+    """Let SQLite refresh planner statistics for tables that need it"""
+    if IS_POSTGRES:
+        return
+    try:
+        with get_db_connection() as conn:
+            conn.execute("PRAGMA optimize")
+    except Exception as e:
+        logger.error(f"PRAGMA optimize failed: {e}")
+
+
 @contextmanager
-def get_db_connection():
-    """Database connection manager - FIXED VERSION"""
+def get_db_connection(readonly: bool = False):
+    """Borrow a pooled database connection; commits on success, rolls back on error.
+    
+    readonly=True hands out a query-only SQLite connection so stats and
+    leaderboard views never queue behind match writes.
+    """
     conn = None
     max_retries = 3
-    retry_count = 0
     
-    while retry_count < max_retries:
+    for attempt in range(1, max_retries + 1):
         try:
-            db_url = os.getenv("DATABASE_URL")
-            if db_url:
-                import psycopg2
-                import psycopg2.extras
-                conn = psycopg2.connect(db_url)
-                conn.cursor_factory = psycopg2.extras.RealDictCursor
-            else:
-                conn = sqlite3.connect(DB_PATH, timeout=30.0)
-                conn.row_factory = sqlite3.Row
-            
-            # Yield the connection
-            yield conn
-            
-            # Commit on success
-            if conn:
-                try:
-                    conn.commit()
-                except Exception as e:
-                    logger.error(f"Commit error: {e}")
-                    if conn:
-                        conn.rollback()
+            conn = _acquire_connection(readonly)
             break
-            
         except Exception as e:
-            retry_count += 1
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
-            
-            if retry_count >= max_retries:
+            if attempt >= max_retries:
                 logger.error(f"Database connection failed after {max_retries} attempts: {e}")
                 raise
-            
-            time.sleep(0.5 * retry_count)
+            time.sleep(0.5 * attempt)
+    
+    broken = False
+    try:
+        yield conn
         
-        finally:
-            # CRITICAL: Always close the connection
-            if conn:
-                try:
-                    conn.close()
-                except Exception as e:
-                    logger.error(f"Error closing connection: {e}")
+        try:
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Commit error: {e}")
+            conn.rollback()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+        raise
+    finally:
+        # Always hand the connection back to the pool
+        try:
+            _release_connection(conn, broken, readonly)
+        except Exception as e:
+            logger.error(f"Error releasing connection: {e}")
+
+
+# Unique SAVEPOINT names for nested helpers on a shared connection
+_savepoint_ids = itertools.count()
+
+
+@contextmanager
+def use_db_connection(conn=None):
+    """Reuse the caller's open connection when given, otherwise borrow one from the pool.
+    
+    On a shared connection the body runs inside its own SAVEPOINT. A helper that
+    fails is rolled back to it, so one bad statement cannot abort (Postgres) or
+    half-apply the caller's transaction; the error still reaches the helper.
+    """
+    if conn is None:
+        with get_db_connection() as pooled_conn:
+            yield pooled_conn
+        return
+    
+    savepoint = f"sp_{next(_savepoint_ids)}"
+    cur = conn.cursor()
+    if not IS_POSTGRES and not conn.in_transaction:
+        # RELEASE of an outermost SAVEPOINT would commit on its own
+        cur.execute("BEGIN IMMEDIATE")
+    cur.execute(f"SAVEPOINT {savepoint}")
+    try:
+        yield conn
+    except Exception:
+        cur.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+        cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+        raise
+    cur.execute(f"RELEASE SAVEPOINT {savepoint}")
+
+
+def execute_prepared(cur, name: str, sql: str, params: tuple):
+    """Execute a hot statement through a per-session prepared plan.
+    
+    On Postgres the statement is PREPAREd once per pooled connection and then
+    run with EXECUTE, skipping parse/plan on every call. SQLite already reuses
+    compiled statements from the connection's statement cache.
+    """
+    prepared = getattr(cur.connection, 'prepared', None)
+    if not IS_POSTGRES or prepared is None:
+        cur.execute(sql, params)
+        return
+    
+    if name not in prepared:
+        pieces = sql.split('%s')
+        pg_sql = pieces[0] + ''.join(f"${n}{piece}" for n, piece in enumerate(pieces[1:], 1))
+        cur.execute(f"PREPARE {name} AS {pg_sql}")
+        prepared.add(name)
+    cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
 
 
 def create_schema_version_table():
@@ -457,9 +1012,8 @@ def create_schema_version_table():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS schema_version (
                         version INTEGER PRIMARY KEY,
@@ -483,7 +1037,7 @@ def create_schema_version_table():
             if count == 0:
                 # Insert initial version
                 now = datetime.now(timezone.utc).isoformat()
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         INSERT INTO schema_version (version, description, applied_at)
                         VALUES (%s, %s, %s)
@@ -519,7 +1073,18 @@ def migrate_database():
         create_schema_version_table()
         
         current_version = get_db_version()
-        # For now, just create the table - no actual migrations needed
+        
+        if current_version < 1:
+            # history rows carry the acting user as a real column instead of
+            # a "user=<id>" token inside meta
+            with get_db_connection() as conn:
+                cur = conn.cursor()
+                cur.execute(f"ALTER TABLE history ADD COLUMN user_id {'BIGINT' if IS_POSTGRES else 'INTEGER'}")
+                cur.execute(
+                    f"INSERT INTO schema_version (version, description, applied_at) VALUES ({PARAM_STYLE}, {PARAM_STYLE}, {PARAM_STYLE})",
+                    (1, "history.user_id column", datetime.now(timezone.utc).isoformat())
+                )
+            current_version = 1
         
         logger.info(f"Current database version: {current_version}")
         logger.info("Database migration completed successfully")
@@ -550,11 +1115,8 @@ def db_init():
         with get_db_connection() as conn:
             cur = conn.cursor()
             
-            # Determine database type
-            db_url = os.getenv("DATABASE_URL")
-            is_postgres = bool(db_url)
-            
-            if is_postgres:
+            # Column types for the configured database
+            if IS_POSTGRES:
                 bigint_type = "BIGINT"
                 autoincrement = "SERIAL PRIMARY KEY"
                 bool_type = "BOOLEAN"
@@ -742,6 +1304,27 @@ def db_init():
             
             for table_sql in tables:
                 cur.execute(table_sql)
+            
+            # Partial indexes matching the leaderboard's games_played >= 1 filter,
+            # so ORDER BY ... LIMIT 10 is an index scan instead of a full sort
+            indexes = [
+                """CREATE INDEX IF NOT EXISTS idx_stats_wins
+                   ON stats (wins DESC, high_score DESC) WHERE games_played >= 1""",
+                """CREATE INDEX IF NOT EXISTS idx_stats_high_score
+                   ON stats (high_score DESC) WHERE games_played >= 1""",
+                # Range scan for the hourly expired-session sweep
+                """CREATE INDEX IF NOT EXISTS idx_sessions_updated_at
+                   ON user_sessions (updated_at)""",
+                # history is append-only and never queried, so an index on it
+                # is pure write cost; remove the one earlier versions created
+                "DROP INDEX IF EXISTS idx_history_chat_event_id",
+                # Recent matches per user (last match, anti-cheat rate checks)
+                """CREATE INDEX IF NOT EXISTS idx_match_history_user_created
+                   ON match_history (user_id, created_at DESC)""",
+            ]
+            
+            for index_sql in indexes:
+                cur.execute(index_sql)
                 
         logger.info("=== BASE TABLES CREATED ===")
         
@@ -751,7 +1334,9 @@ def db_init():
         create_anticheat_tables()
         migrate_database()
         create_tournament_context_table()
-
+        
+        # Give the planner statistics for the indexes created above
+        optimize_database()
         
         logger.info("=== MIGRATIONS COMPLETED ===")
         logger.info("Database initialization completed successfully")
@@ -816,8 +1401,6 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 violations = []
                 risk_score = 0
@@ -826,7 +1409,7 @@ class AntiCheatSystem:
                 one_hour_ago = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
                 cur.execute(f"""
                     SELECT COUNT(*) as count FROM match_history 
-                    WHERE user_id = {param_style} AND created_at > {param_style}
+                    WHERE user_id = {PARAM_STYLE} AND created_at > {PARAM_STYLE}
                 """, (user_id, one_hour_ago))
                 games_last_hour = cur.fetchone()['count']
                 
@@ -840,7 +1423,7 @@ class AntiCheatSystem:
                 
                 # Check 2: Impossible statistics
                 cur.execute(f"""
-                    SELECT * FROM stats WHERE user_id = {param_style}
+                    SELECT * FROM stats WHERE user_id = {PARAM_STYLE}
                 """, (user_id,))
                 stats = cur.fetchone()
                 
@@ -894,7 +1477,7 @@ class AntiCheatSystem:
                 cur.execute(f"""
                     SELECT player_score, match_format, overs_played 
                     FROM match_history 
-                    WHERE user_id = {param_style} 
+                    WHERE user_id = {PARAM_STYLE} 
                     ORDER BY created_at DESC LIMIT 10
                 """, (user_id,))
                 recent_matches = cur.fetchall()
@@ -932,13 +1515,11 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 # Get user's device fingerprint
                 cur.execute(f"""
                     SELECT device_fingerprint FROM user_devices 
-                    WHERE user_id = {param_style}
+                    WHERE user_id = {PARAM_STYLE}
                 """, (user_id,))
                 
                 result = cur.fetchone()
@@ -951,7 +1532,7 @@ class AntiCheatSystem:
                 cur.execute(f"""
                     SELECT COUNT(DISTINCT user_id) as count 
                     FROM user_devices 
-                    WHERE device_fingerprint = {param_style}
+                    WHERE device_fingerprint = {PARAM_STYLE}
                 """, (fingerprint,))
                 
                 count = cur.fetchone()['count']
@@ -970,13 +1551,11 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 # Get recent reaction times
                 cur.execute(f"""
                     SELECT reaction_time FROM user_actions 
-                    WHERE user_id = {param_style} 
+                    WHERE user_id = {PARAM_STYLE} 
                     ORDER BY created_at DESC LIMIT 50
                 """, (user_id,))
                 
@@ -1006,14 +1585,12 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 duration_hours = AntiCheatSystem.BAN_DURATIONS.get(duration_type, 24)
                 banned_until = datetime.now(timezone.utc) + timedelta(hours=duration_hours)
                 now = datetime.now(timezone.utc).isoformat()
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         INSERT INTO user_bans 
                         (user_id, reason, banned_at, banned_until, banned_by, ban_type)
@@ -1040,15 +1617,13 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 now = datetime.now(timezone.utc).isoformat()
                 
                 cur.execute(f"""
                     SELECT * FROM user_bans 
-                    WHERE user_id = {param_style} 
-                    AND banned_until > {param_style}
+                    WHERE user_id = {PARAM_STYLE} 
+                    AND banned_until > {PARAM_STYLE}
                     ORDER BY banned_at DESC LIMIT 1
                 """, (user_id, now))
                 
@@ -1072,10 +1647,9 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 now = datetime.now(timezone.utc).isoformat()
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         INSERT INTO user_actions 
                         (user_id, action_type, reaction_time, created_at)
@@ -1096,10 +1670,9 @@ class AntiCheatSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 now = datetime.now(timezone.utc).isoformat()
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         INSERT INTO user_devices 
                         (user_id, device_fingerprint, first_seen, last_seen)
@@ -1123,9 +1696,8 @@ def create_anticheat_tables():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 autoincrement = "SERIAL PRIMARY KEY"
                 bigint = "BIGINT"
                 text_type = "TEXT"
@@ -1249,11 +1821,10 @@ def anticheat_middleware(func):
                     try:
                         with get_db_connection() as conn:
                             cur = conn.cursor()
-                            is_postgres = bool(os.getenv("DATABASE_URL"))
                             now = datetime.now(timezone.utc).isoformat()
                             
                             for violation in behavior['violations']:
-                                if is_postgres:
+                                if IS_POSTGRES:
                                     cur.execute("""
                                         INSERT INTO anticheat_reports 
                                         (user_id, violation_type, severity, details, risk_score, created_at)
@@ -1615,7 +2186,7 @@ class PowerUp:
     
     @staticmethod
     def update_powerup_durations(game: 'GameState'):
-        """Decrease power-up durations after each over - FIXED"""
+        """Decrease power-up durations after each over; the caller saves the game"""
         try:
             active_powerups = game.data.get('active_powerups', {})
             expired = []
@@ -1635,12 +2206,51 @@ class PowerUp:
                 del active_powerups[powerup_id]
             
             game.data['active_powerups'] = active_powerups
-            game.save()
             
         except Exception as e:
             logger.error(f"Error updating powerup durations: {e}")
 
 
+# Shop rows rendered once from the static catalog as (cost, text) pairs;
+# only the ✅/🔒 status prefix depends on the viewer's balance
+_POWERUP_SHOP_ROWS = tuple(
+    (p['cost'], f" <b>{p['name']}</b>\n   {p['description']}\n   💰 {p['cost']} coins\n\n")
+    for p in PowerUp.POWERUPS.values()
+)
+_POWERUP_DETAIL_ROWS = tuple(
+    (
+        p['cost'],
+        f" <b>{p['name']}</b>\n"
+        f"   {p['description']}\n"
+        f"   ⏱️ Duration: {p['duration']} over(s)\n"
+        f"   💰 Cost: {p['cost']} coins"
+    )
+    for p in PowerUp.POWERUPS.values()
+)
+_POWERUP_CATALOG_TEXT = "".join(
+    f"{p['name']}\n"
+    f"  {p['description']}\n"
+    f"  Duration: {p['duration']} over(s) | Cost: {p['cost']} coins\n\n"
+    for p in PowerUp.POWERUPS.values()
+)
+
+
+def cached_markup(builder):
+    """Build a static keyboard once at import and reuse its serialized JSON.
+    
+    telebot passes string markups through untouched, so static menus skip
+    both the button allocation and the to_json() dict walk on every send.
+    """
+    markup_json = builder().to_json()
+    
+    @wraps(builder)
+    def wrapper():
+        return markup_json
+    
+    return wrapper
+
+
+@cached_markup
 def kb_powerups_shop() -> types.InlineKeyboardMarkup:
     """Power-ups shop keyboard with info buttons"""
     kb = types.InlineKeyboardMarkup(row_width=2)
@@ -1682,10 +2292,9 @@ def handle_powerup_purchase(user_id: int, powerup_id: str) -> dict:
         # Add to inventory
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO user_inventory (user_id, item_type, item_id, quantity, acquired_at)
                     VALUES (%s, 'powerup', %s, 1, %s)
@@ -1733,15 +2342,14 @@ class LeaderboardCategory(Enum):
     TOTAL_XP = "total_xp"
 
 
-def update_leaderboard(user_id: int, category: str, value: int):
+def update_leaderboard(user_id: int, category: str, value: int, conn=None):
     """Update user's leaderboard position"""
     try:
-        with get_db_connection() as conn:
+        with use_db_connection(conn) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO leaderboards (category, user_id, value, updated_at)
                     VALUES (%s, %s, %s, %s)
@@ -1777,16 +2385,14 @@ def get_leaderboard(category: str, limit: int = 10) -> list:
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             cur.execute(f"""
                 SELECT l.user_id, l.value, u.username, u.first_name
                 FROM leaderboards l
                 JOIN users u ON l.user_id = u.user_id
-                WHERE l.category = {param_style}
+                WHERE l.category = {PARAM_STYLE}
                 ORDER BY l.value DESC
-                LIMIT {param_style}
+                LIMIT {PARAM_STYLE}
             """, (category, limit))
             
             return [dict(row) for row in cur.fetchall()]
@@ -1828,6 +2434,7 @@ def generate_leaderboard_display(category: str, top_players: list) -> str:
     return display
 
 
+@cached_markup
 def kb_leaderboard_categories() -> types.InlineKeyboardMarkup:
     """Leaderboard category selector"""
     kb = types.InlineKeyboardMarkup(row_width=2)
@@ -1849,25 +2456,97 @@ def kb_leaderboard_categories() -> types.InlineKeyboardMarkup:
     return kb
 
 
+@cached_markup
+def kb_back_to_menu() -> types.InlineKeyboardMarkup:
+    """Single back button for screens that replace the main menu"""
+    kb = types.InlineKeyboardMarkup()
+    kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="main_menu"))
+    return kb
+
+
 
-def log_event(chat_id: int, event: str, meta: str = ""):
-    """Log events safely"""
-    try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            # Use appropriate parameter style based on database type
-            if os.getenv("DATABASE_URL"):  # PostgreSQL
-                cur.execute(
-                    "INSERT INTO history (chat_id, event, meta, created_at) VALUES (%s, %s, %s, %s)",
-                    (chat_id, event, meta, datetime.now(timezone.utc).isoformat())
-                )
-            else:  # SQLite
-                cur.execute(
-                    "INSERT INTO history (chat_id, event, meta, created_at) VALUES (?, ?, ?, ?)",
-                    (chat_id, event, meta, datetime.now(timezone.utc).isoformat())
+class EventLogBatcher:
+    """Queues history rows and writes them in batches from a daemon thread.
+    
+    Rows are flushed every FLUSH_INTERVAL seconds or MAX_BATCH rows, whichever
+    comes first, in one transaction; drain() writes whatever is left at exit.
+    """
+    FLUSH_INTERVAL = 0.5
+    MAX_BATCH = 1000
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def submit(self, chat_id: int, event: str, meta: str, user_id: Optional[int]):
+        self._ensure_worker()
+        self._queue.put((chat_id, user_id, event, meta, now_iso()))
+    
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="event-log-batcher", daemon=True
                 )
-    except Exception as e:
-        logger.error(f"Error logging event: {e}")
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+    
+    def drain(self):
+        """Write every queued row now"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.flush(batch)
+    
+    def flush(self, batch: list):
+        """Insert a batch of history rows in a single transaction"""
+        try:
+            with get_db_connection() as conn:
+                cur = conn.cursor()
+                if IS_POSTGRES:
+                    from psycopg2.extras import execute_values
+                    execute_values(
+                        cur,
+                        "INSERT INTO history (chat_id, user_id, event, meta, created_at) VALUES %s",
+                        batch
+                    )
+                else:
+                    cur.executemany(
+                        "INSERT INTO history (chat_id, user_id, event, meta, created_at) VALUES (?, ?, ?, ?, ?)",
+                        batch
+                    )
+            logger.debug(f"Flushed {len(batch)} history events")
+        except Exception as e:
+            logger.error(f"Error logging events: {e}")
+
+
+event_log_batcher = EventLogBatcher()
+atexit.register(event_log_batcher.drain)
+
+
+def log_event(chat_id: int, event: str, meta: str = "", user_id: Optional[int] = None):
+    """Queue a history event; it is written with the next batch"""
+    event_log_batcher.submit(chat_id, event, meta, user_id)
 
 def default_game(chat_id: int, overs: int = DEFAULT_OVERS, wickets: int = DEFAULT_WICKETS, 
                 difficulty: str = "medium") -> Dict[str, Any]:
@@ -1875,6 +2554,7 @@ def default_game(chat_id: int, overs: int = DEFAULT_OVERS, wickets: int = DEFAUL
     overs = max(1, min(overs, MAX_OVERS))
     wickets = max(1, min(wickets, MAX_WICKETS))
     powerplay = min(6, max(1, overs // 4)) if overs > 2 else 0
+    stamp = now_iso()
     
     return {
         "chat_id": chat_id,  # Add this line
@@ -1901,31 +2581,183 @@ def default_game(chat_id: int, overs: int = DEFAULT_OVERS, wickets: int = DEFAUL
         "extras": 0,
         "powerplay_overs": powerplay,
         "is_powerplay": powerplay > 0,
-        "weather_condition": random.choice(list(WEATHER_CONDITIONS.keys())),
-        "pitch_condition": random.choice(list(PITCH_CONDITIONS.keys())),
+        "weather_condition": random.choice(_WEATHER_KEYS),
+        "pitch_condition": random.choice(_PITCH_KEYS),
         "tournament_id": None,
         "tournament_round": None,
         "opponent_id": None,
         "is_tournament_match": False,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": stamp,
+        "updated_at": stamp,
     }
 
-from threading import Lock
-
-# Add this after imports
-game_locks = {}
+# Fixed pool of lock stripes shared by all chats. Each chat always maps to
+# the same stripe, so one chat's games are serialized while other chats
+# run in parallel, and the pool never grows. Locks are reentrant because
+# GameState.save() takes the lock that handle_game_input already holds.
+GAME_LOCK_STRIPES = 64
+_game_lock_stripes = tuple(threading.RLock() for _ in range(GAME_LOCK_STRIPES))
 
 def get_game_lock(chat_id):
-    """Get or create a lock for this chat"""
-    if chat_id not in game_locks:
-        game_locks[chat_id] = Lock()
-    return game_locks[chat_id]
+    """Return the lock stripe guarding this chat's game"""
+    return _game_lock_stripes[hash(chat_id) % GAME_LOCK_STRIPES]
+
+
 
+# Timestamps for hot-path writes are reused for up to a second; formatting a
+# fresh aware datetime on every ball costs more than the precision is worth
+_now_iso_cache = (float("-inf"), "")
+
+def now_iso() -> str:
+    """Current UTC time in ISO-8601, refreshed at most once per second"""
+    global _now_iso_cache
+    stamp, text = _now_iso_cache
+    now = time.monotonic()
+    if now - stamp >= 1.0:
+        text = datetime.now(timezone.utc).isoformat()
+        _now_iso_cache = (now, text)
+    return text
 
 
 # Game State Management
+# Write-through cache of the last saved game per chat; consecutive balls in a
+# match reuse it instead of re-reading the games row. Chats without a game
+# are cached as None so idle chats don't query the table on every message
+_game_cache = TTLCache(maxsize=5000, ttl=1800)
+
+# Column order of the games table. Cached games are packed into a tuple in
+# this order (a fraction of the size of a 32-key dict) with any non-column
+# keys, such as active_powerups, kept in a trailing dict only when present
+GAME_COLUMNS = (
+    'chat_id', 'state', 'innings', 'batting', 'player_score', 'bot_score',
+    'player_wkts', 'bot_wkts', 'balls_in_over', 'overs_bowled', 'target',
+    'overs_limit', 'wickets_limit', 'match_format', 'difficulty_level',
+    'player_balls_faced', 'bot_balls_faced', 'player_fours', 'player_sixes',
+    'bot_fours', 'bot_sixes', 'extras', 'powerplay_overs', 'is_powerplay',
+    'weather_condition', 'pitch_condition', 'tournament_id', 'tournament_round',
+    'opponent_id', 'is_tournament_match', 'created_at', 'updated_at'
+)
+_GAME_COLUMN_SET = frozenset(GAME_COLUMNS)
+
+# Both statements run on every ball, so they go through execute_prepared
+SQL_LOAD_GAME = f"SELECT * FROM games WHERE chat_id = {PARAM_STYLE}"
+SQL_SAVE_GAME = f"""
+    INSERT INTO games ({', '.join(GAME_COLUMNS)})
+    VALUES ({', '.join([PARAM_STYLE] * len(GAME_COLUMNS))})
+    ON CONFLICT (chat_id) DO UPDATE SET
+        {', '.join(f"{col} = EXCLUDED.{col}" for col in GAME_COLUMNS if col not in ('chat_id', 'created_at'))}
+"""
+
+# The only columns an ordinary ball changes. Buffered saves are always
+# ordinary balls (wickets, over ends and innings changes are saved in full),
+# so the write-behind flush updates just these on SQLite
+GAME_BALL_COLUMNS = (
+    'player_score', 'bot_score', 'player_wkts', 'bot_wkts', 'balls_in_over',
+    'overs_bowled', 'player_balls_faced', 'bot_balls_faced', 'player_fours',
+    'player_sixes', 'bot_fours', 'bot_sixes', 'extras', 'is_powerplay', 'updated_at'
+)
+SQL_SAVE_GAME_BALL = f"""
+    UPDATE games SET {', '.join(f"{col} = {PARAM_STYLE}" for col in GAME_BALL_COLUMNS)}
+    WHERE chat_id = {PARAM_STYLE}
+"""
+
+def _pack_game(data: Dict[str, Any]) -> Tuple:
+    """Pack a game dict into a compact tuple for the game cache"""
+    extra = {k: v for k, v in data.items() if k not in _GAME_COLUMN_SET}
+    return tuple(data.get(k) for k in GAME_COLUMNS) + (extra or None,)
+
+def _unpack_game(packed: Tuple) -> Dict[str, Any]:
+    """Rebuild a fresh game dict from a packed cache entry"""
+    data = dict(zip(GAME_COLUMNS, packed))
+    extra = packed[-1]
+    if extra:
+        data.update(extra)
+    return data
+
+
+class GameSaveBuffer:
+    """Write-behind buffer for per-ball game saves.
+    
+    GameState.save(flush=False) parks the latest snapshot of a game here (it
+    is already served from _game_cache) and a daemon thread writes all
+    pending snapshots in one transaction every FLUSH_INTERVAL seconds.
+    Synchronous saves and deletes take write_lock and discard the pending
+    snapshot first, so an older buffered state never overwrites them.
+    """
+    FLUSH_INTERVAL = 0.5
+    
+    def __init__(self):
+        self.write_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def submit(self, data: Dict[str, Any]):
+        with self._pending_lock:
+            self._pending[data['chat_id']] = data
+        self._ensure_worker()
+    
+    def discard(self, chat_id: int):
+        with self._pending_lock:
+            self._pending.pop(chat_id, None)
+    
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="game-save-buffer", daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            time.sleep(self.FLUSH_INTERVAL)
+            self.flush()
+    
+    def flush(self):
+        """Write every pending game snapshot in a single transaction"""
+        with self.write_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return
+                batch = list(self._pending.values())
+                self._pending.clear()
+        
+            rows = [tuple(data.get(k) for k in GAME_COLUMNS) for data in batch]
+            try:
+                with get_db_connection() as conn:
+                    cur = conn.cursor()
+                    # One statement for the whole batch instead of a row loop
+                    if IS_POSTGRES:
+                        from psycopg2.extras import execute_batch
+                        execute_batch(cur, SQL_SAVE_GAME, rows)
+                    else:
+                        cur.executemany(SQL_SAVE_GAME_BALL, [
+                            tuple(data.get(k) for k in GAME_BALL_COLUMNS) + (data['chat_id'],)
+                            for data in batch
+                        ])
+                        # A row that isn't there yet needs the full upsert
+                        if cur.rowcount < len(batch):
+                            cur.executemany(SQL_SAVE_GAME, rows)
+                logger.debug(f"Flushed {len(batch)} buffered game saves")
+            except Exception as e:
+                logger.error(f"Error flushing game saves: {e}", exc_info=True)
+                # Requeue unless a newer snapshot arrived in the meantime
+                with self._pending_lock:
+                    for data in batch:
+                        self._pending.setdefault(data['chat_id'], data)
+
+
+game_save_buffer = GameSaveBuffer()
+atexit.register(game_save_buffer.flush)
+
+
 class GameState:
+    __slots__ = ('chat_id', 'lock', 'data')
+    
     def __init__(self, chat_id: int):
         self.chat_id = chat_id
         self.lock = get_game_lock(chat_id)
@@ -1933,20 +2765,23 @@ class GameState:
         self.data['chat_id'] = chat_id
     
     def _load_or_create(self) -> Dict[str, Any]:
+        hit, cached = _game_cache.get(self.chat_id)
+        if hit:
+            # None marks a chat known to have no saved game
+            return _unpack_game(cached) if cached is not None else self._create_default_game()
+        
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                # Use appropriate parameter style based on database type
-                if os.getenv("DATABASE_URL"):  # PostgreSQL
-                    cur.execute("SELECT * FROM games WHERE chat_id = %s", (self.chat_id,))
-                else:  # SQLite
-                    cur.execute("SELECT * FROM games WHERE chat_id = ?", (self.chat_id,))
+                execute_prepared(cur, "load_game_stmt", SQL_LOAD_GAME, (self.chat_id,))
                 row = cur.fetchone()
                 if row:
                     game_data = dict(row)
                     game_data['chat_id'] = self.chat_id  # Ensure chat_id is set
+                    _game_cache.put(self.chat_id, _pack_game(game_data))
                     return game_data
                 else:
+                    _game_cache.put(self.chat_id, None)
                     return self._create_default_game()
         except Exception as e:
             logger.error(f"Error loading game state: {e}")
@@ -1957,183 +2792,99 @@ class GameState:
         game_data['chat_id'] = self.chat_id  # Ensure chat_id is always set
         return game_data
         
-    def save(self) -> bool:
-        with self.lock:
-            try:
-                with get_db_connection() as conn:
-                    cur = conn.cursor()
-                    self.data['updated_at'] = datetime.now(timezone.utc).isoformat()
-                    self.data['chat_id'] = self.chat_id  # Ensure chat_id is always set
-                    
-                    is_postgres = bool(os.getenv("DATABASE_URL"))
-                    
-                    # Ensure all required fields have default values
-                    default_values = {
-                        'state': 'toss',
-                        'innings': 1,
-                        'batting': None,
-                        'player_score': 0,
-                        'bot_score': 0,
-                        'player_wkts': 0,
-                        'bot_wkts': 0,
-                        'balls_in_over': 0,
-                        'overs_bowled': 0,
-                        'target': None,
-                        'overs_limit': DEFAULT_OVERS,
-                        'wickets_limit': DEFAULT_WICKETS,
-                        'match_format': 'T2',
-                        'difficulty_level': 'medium',
-                        'player_balls_faced': 0,
-                        'bot_balls_faced': 0,
-                        'player_fours': 0,
-                        'player_sixes': 0,
-                        'bot_fours': 0,
-                        'bot_sixes': 0,
-                        'extras': 0,
-                        'powerplay_overs': 0,
-                        'is_powerplay': False,
-                        'weather_condition': 'clear',
-                        'pitch_condition': 'normal',
-                        'tournament_id': None,
-                        'tournament_round': None,
-                        'opponent_id': None,
-                        'is_tournament_match': False,
-                        'created_at': datetime.now(timezone.utc).isoformat(),
-                        'updated_at': datetime.now(timezone.utc).isoformat()
-                    }
-                    
-                    # Apply defaults for missing values
-                    for key, default_val in default_values.items():
-                        if key not in self.data or self.data[key] is None:
-                            self.data[key] = default_val
-                    
-                    if is_postgres:
-                        # PostgreSQL upsert
-                        cur.execute("""
-                            INSERT INTO games (
-                                chat_id, state, innings, batting, player_score, bot_score,
-                                player_wkts, bot_wkts, balls_in_over, overs_bowled, target,
-                                overs_limit, wickets_limit, match_format, difficulty_level,
-                                player_balls_faced, bot_balls_faced, player_fours, player_sixes,
-                                bot_fours, bot_sixes, extras, powerplay_overs, is_powerplay,
-                                weather_condition, pitch_condition, tournament_id, tournament_round,
-                                opponent_id, is_tournament_match, created_at, updated_at
-                            ) VALUES (
-                                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
-                                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 
-                                %s, %s
-                            )
-                            ON CONFLICT (chat_id) DO UPDATE SET
-                                state = EXCLUDED.state,
-                                innings = EXCLUDED.innings,
-                                batting = EXCLUDED.batting,
-                                player_score = EXCLUDED.player_score,
-                                bot_score = EXCLUDED.bot_score,
-                                player_wkts = EXCLUDED.player_wkts,
-                                bot_wkts = EXCLUDED.bot_wkts,
-                                balls_in_over = EXCLUDED.balls_in_over,
-                                overs_bowled = EXCLUDED.overs_bowled,
-                                target = EXCLUDED.target,
-                                overs_limit = EXCLUDED.overs_limit,
-                                wickets_limit = EXCLUDED.wickets_limit,
-                                match_format = EXCLUDED.match_format,
-                                difficulty_level = EXCLUDED.difficulty_level,
-                                player_balls_faced = EXCLUDED.player_balls_faced,
-                                bot_balls_faced = EXCLUDED.bot_balls_faced,
-                                player_fours = EXCLUDED.player_fours,
-                                player_sixes = EXCLUDED.player_sixes,
-                                bot_fours = EXCLUDED.bot_fours,
-                                bot_sixes = EXCLUDED.bot_sixes,
-                                extras = EXCLUDED.extras,
-                                powerplay_overs = EXCLUDED.powerplay_overs,
-                                is_powerplay = EXCLUDED.is_powerplay,
-                                weather_condition = EXCLUDED.weather_condition,
-                                pitch_condition = EXCLUDED.pitch_condition,
-                                tournament_id = EXCLUDED.tournament_id,
-                                tournament_round = EXCLUDED.tournament_round,
-                                opponent_id = EXCLUDED.opponent_id,
-                                is_tournament_match = EXCLUDED.is_tournament_match,
-                                updated_at = EXCLUDED.updated_at
-                        """, tuple(self.data.get(k) for k in [
-                            'chat_id', 'state', 'innings', 'batting', 'player_score', 'bot_score',
-                            'player_wkts', 'bot_wkts', 'balls_in_over', 'overs_bowled', 'target',
-                            'overs_limit', 'wickets_limit', 'match_format', 'difficulty_level',
-                            'player_balls_faced', 'bot_balls_faced', 'player_fours', 'player_sixes',
-                            'bot_fours', 'bot_sixes', 'extras', 'powerplay_overs', 'is_powerplay',
-                            'weather_condition', 'pitch_condition', 'tournament_id', 'tournament_round',
-                            'opponent_id', 'is_tournament_match', 'created_at', 'updated_at'
-                        ]))
-                    else:
-                        # SQLite upsert - Check if record exists first
-                        cur.execute("SELECT chat_id FROM games WHERE chat_id = ?", (self.chat_id,))
-                        if cur.fetchone():
-                            # Update existing record
-                            cur.execute("""
-                                UPDATE games SET 
-                                    state=?, innings=?, batting=?, player_score=?, bot_score=?,
-                                    player_wkts=?, bot_wkts=?, balls_in_over=?, overs_bowled=?, 
-                                    target=?, overs_limit=?, wickets_limit=?, match_format=?, 
-                                    difficulty_level=?, player_balls_faced=?, bot_balls_faced=?,
-                                    player_fours=?, player_sixes=?, bot_fours=?, bot_sixes=?,
-                                    extras=?, powerplay_overs=?, is_powerplay=?, weather_condition=?,
-                                    pitch_condition=?, tournament_id=?, tournament_round=?, 
-                                    opponent_id=?, is_tournament_match=?, updated_at=?
-                                WHERE chat_id=?
-                            """, tuple(self.data.get(k) for k in [
-                                'state', 'innings', 'batting', 'player_score', 'bot_score',
-                                'player_wkts', 'bot_wkts', 'balls_in_over', 'overs_bowled', 'target',
-                                'overs_limit', 'wickets_limit', 'match_format', 'difficulty_level',
-                                'player_balls_faced', 'bot_balls_faced', 'player_fours', 'player_sixes',
-                                'bot_fours', 'bot_sixes', 'extras', 'powerplay_overs', 'is_powerplay',
-                                'weather_condition', 'pitch_condition', 'tournament_id', 'tournament_round',
-                                'opponent_id', 'is_tournament_match', 'updated_at'
-                            ]) + (self.chat_id,))
-                        else:
-                            # Insert new record
-                            cur.execute("""
-                                INSERT INTO games (
-                                    chat_id, state, innings, batting, player_score, bot_score,
-                                    player_wkts, bot_wkts, balls_in_over, overs_bowled, target,
-                                    overs_limit, wickets_limit, match_format, difficulty_level,
-                                    player_balls_faced, bot_balls_faced, player_fours, player_sixes,
-                                    bot_fours, bot_sixes, extras, powerplay_overs, is_powerplay,
-                                    weather_condition, pitch_condition, tournament_id, tournament_round,
-                                    opponent_id, is_tournament_match, created_at, updated_at
-                                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 
-                                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """, (
-                                self.chat_id,
-                                *tuple(self.data.get(k) for k in [
-                                    'state', 'innings', 'batting', 'player_score', 'bot_score',
-                                    'player_wkts', 'bot_wkts', 'balls_in_over', 'overs_bowled', 'target',
-                                    'overs_limit', 'wickets_limit', 'match_format', 'difficulty_level',
-                                    'player_balls_faced', 'bot_balls_faced', 'player_fours', 'player_sixes',
-                                    'bot_fours', 'bot_sixes', 'extras', 'powerplay_overs', 'is_powerplay',
-                                    'weather_condition', 'pitch_condition', 'tournament_id', 'tournament_round',
-                                    'opponent_id', 'is_tournament_match', 'created_at', 'updated_at'
-                                ])
-                            ))
-                        return True
+    def _apply_defaults(self):
+        now = now_iso()
+        self.data['updated_at'] = now
+        self.data['chat_id'] = self.chat_id  # Ensure chat_id is always set
+        
+        # Ensure all required fields have default values
+        default_values = {
+            'state': 'toss',
+            'innings': 1,
+            'batting': None,
+            'player_score': 0,
+            'bot_score': 0,
+            'player_wkts': 0,
+            'bot_wkts': 0,
+            'balls_in_over': 0,
+            'overs_bowled': 0,
+            'target': None,
+            'overs_limit': DEFAULT_OVERS,
+            'wickets_limit': DEFAULT_WICKETS,
+            'match_format': 'T2',
+            'difficulty_level': 'medium',
+            'player_balls_faced': 0,
+            'bot_balls_faced': 0,
+            'player_fours': 0,
+            'player_sixes': 0,
+            'bot_fours': 0,
+            'bot_sixes': 0,
+            'extras': 0,
+            'powerplay_overs': 0,
+            'is_powerplay': False,
+            'weather_condition': 'clear',
+            'pitch_condition': 'normal',
+            'tournament_id': None,
+            'tournament_round': None,
+            'opponent_id': None,
+            'is_tournament_match': False,
+            'created_at': now,
+            'updated_at': now
+        }
+        
+        # Apply defaults for missing values
+        for key, default_val in default_values.items():
+            if key not in self.data or self.data[key] is None:
+                self.data[key] = default_val
+    
+    @staticmethod
+    def _write_row(cur, data: Dict[str, Any]):
+        """Upsert one game row on the caller's cursor"""
+        execute_prepared(cur, "save_game_stmt", SQL_SAVE_GAME,
+                         tuple(data.get(k) for k in GAME_COLUMNS))
+    
+    def save(self, flush: bool = True) -> bool:
+        """Persist the game; flush=False defers the write to the game save buffer"""
+        with self.lock:
+            self._apply_defaults()
+            if not flush:
+                _game_cache.put(self.chat_id, _pack_game(self.data))
+                game_save_buffer.submit(dict(self.data))
+                return True
+            
+            try:
+                with game_save_buffer.write_lock:
+                    game_save_buffer.discard(self.chat_id)
+                    with get_db_connection() as conn:
+                        self._write_row(conn.cursor(), self.data)
+                
+                _game_cache.put(self.chat_id, _pack_game(self.data))
+                return True
             except Exception as e:
+                _game_cache.invalidate(self.chat_id)
                 logger.error(f"Failed to save game state: {e}")
                 return False
         
     def delete(self) -> bool:
+        _game_cache.invalidate(self.chat_id)
         try:
-            with get_db_connection() as conn:
-                cur = conn.cursor()
-                if os.getenv("DATABASE_URL"):  # PostgreSQL
-                    cur.execute("DELETE FROM games WHERE chat_id = %s", (self.chat_id,))
-                else:  # SQLite
-                    cur.execute("DELETE FROM games WHERE chat_id = ?", (self.chat_id,))
-                return True
+            with self.lock, game_save_buffer.write_lock:
+                game_save_buffer.discard(self.chat_id)
+                with get_db_connection() as conn:
+                    cur = conn.cursor()
+                    if IS_POSTGRES:  # PostgreSQL
+                        cur.execute("DELETE FROM games WHERE chat_id = %s", (self.chat_id,))
+                    else:  # SQLite
+                        cur.execute("DELETE FROM games WHERE chat_id = ?", (self.chat_id,))
+                _game_cache.put(self.chat_id, None)
+            return True
         except Exception as e:
             logger.error(f"Failed to delete game: {e}")
             return False
 
     def update(self, **kwargs):
         self.data.update(kwargs)
-        self.data['updated_at'] = datetime.now(timezone.utc).isoformat()
+        self.data['updated_at'] = now_iso()
 
 class TournamentType(Enum):
     KNOCKOUT = "knockout"
@@ -2161,6 +2912,13 @@ class ChallengeType(Enum):
 # ADD THESE NEW CLASSES AFTER YOUR EXISTING CLASSES:
 class MatchInnings:
     """Single innings in a tournament match with proper cricket tracking"""
+    __slots__ = (
+        'batting_team', 'overs_limit', 'wickets_limit', 'runs', 'wickets',
+        'balls_faced', 'overs_completed', 'balls_in_over', 'fours', 'sixes',
+        'extras', 'powerplay_overs', 'is_powerplay', 'boundaries_timeline',
+        'wicket_timeline', 'momentum'
+    )
+    
     def __init__(self, batting_team: str, overs_limit: int, wickets_limit: int):
         self.batting_team = batting_team
         self.overs_limit = overs_limit
@@ -2269,6 +3027,14 @@ class MatchInnings:
 
 class TournamentMatch:
     """Complete match with full tournament integration"""
+    __slots__ = (
+        'match_id', 'team1', 'team2', 'format_overs', 'format_wickets',
+        'tournament_stage', 'innings_1', 'innings_2', 'current_innings',
+        'match_state', 'toss_winner', 'batting_first', 'winner', 'margin',
+        'margin_type', 'ball_count', 'key_moments', 'weather', 'pitch',
+        'created_at', 'started_at', 'ended_at'
+    )
+    
     def __init__(self, match_id: str, team1_id: int, team2_id: int, team1_name: str, 
                  team2_name: str, format_overs: int, format_wickets: int, tournament_stage: str):
         self.match_id = match_id
@@ -2497,6 +3263,13 @@ class TournamentMatch:
 
 class EliteTournament:
     """Main tournament orchestration"""
+    __slots__ = (
+        'tournament_id', 'name', 'type', 'theme', 'format_overs', 'format_wickets',
+        'created_by', 'participants', 'matches', 'current_round', 'total_rounds',
+        'tournament_state', 'bracket', 'standings', 'created_at', 'started_at',
+        'ended_at', 'theme_data', 'records'
+    )
+    
     def __init__(self, tournament_id: str, name: str, tournament_type: str, theme: str, 
                  format_overs: int, format_wickets: int, created_by: int):
         self.tournament_id = tournament_id
@@ -2756,6 +3529,25 @@ class EliteTournament:
             'records': self.records
         }
     
+    def to_db_payload(self) -> tuple:
+        """Serialize once for storage: (brackets_json, metadata_json).
+
+        Bracket rounds reference matches by id; the full match data lives in
+        the metadata payload, so each match is only converted once.
+        """
+        data = self.to_dict()
+        brackets = {
+            'rounds': {
+                str(round_num): {
+                    'stage': round_data['stage'],
+                    'matches': [m.match_id for m in round_data['matches']]
+                }
+                for round_num, round_data in self.bracket.get('rounds', {}).items()
+            }
+        }
+        return (json.dumps(brackets, separators=(',', ':')),
+                json.dumps(data, separators=(',', ':')))
+    
     @classmethod
     def from_dict(cls, data: Dict):
         obj = cls(
@@ -2871,8 +3663,9 @@ class DailyChallenge:
         return icons.get(challenge_type, "🎯")
 
 class ChallengeTracker:
-    def __init__(self, user_id: int):
+    def __init__(self, user_id: int, conn=None):
         self.user_id = user_id
+        self._conn = conn  # optional caller-owned connection shared by all writes
         self.active_challenges = []
         self.progress = {}
         self.daily_stats = {}
@@ -2880,11 +3673,10 @@ class ChallengeTracker:
     
     def _load_challenges(self):
         try:
-            with get_db_connection() as conn:
+            with use_db_connection(self._conn) as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         SELECT dc.*, uc.progress, uc.completed, uc.claimed 
                         FROM daily_challenges dc
@@ -2904,33 +3696,51 @@ class ChallengeTracker:
                 
                 for challenge in self.active_challenges:
                     challenge_id = challenge["id"]
-                    self.progress[challenge_id] = challenge.get("progress", 0)
+                    # LEFT JOIN gives NULL progress until the user first touches a challenge
+                    self.progress[challenge_id] = challenge.get("progress") or 0
                 
         except Exception as e:
             logger.error(f"Error loading challenges for user {self.user_id}: {e}")
     
+    def _apply_progress(self, challenge_type: ChallengeType, value: int) -> list:
+        """Update in-memory progress for one challenge type; returns touched challenge ids"""
+        touched = []
+        relevant_challenges = [c for c in self.active_challenges 
+                             if c["type"] == challenge_type.value and not c.get("completed", False)]
+        
+        for challenge in relevant_challenges:
+            challenge_id = challenge["id"]
+            current_progress = self.progress.get(challenge_id, 0)
+            
+            if challenge_type in [ChallengeType.SCORE, ChallengeType.SIXES, ChallengeType.BOUNDARIES]:
+                if value > current_progress:
+                    self.progress[challenge_id] = value
+            elif challenge_type in [ChallengeType.WINS, ChallengeType.STREAK]:
+                if challenge_type == ChallengeType.WINS:
+                    self.progress[challenge_id] = current_progress + value
+                else:
+                    if value > 0:
+                        self.progress[challenge_id] = current_progress + 1
+                    else:
+                        self.progress[challenge_id] = 0
+            
+            touched.append(challenge_id)
+        
+        return touched
+    
     def update_progress(self, challenge_type: ChallengeType, value: int, match_data: dict = None):
+        self.update_progress_bulk([(challenge_type, value, match_data)])
+    
+    def update_progress_bulk(self, updates: list):
+        """Apply several (challenge_type, value, match_data) updates and persist them in one batch"""
         try:
-            relevant_challenges = [c for c in self.active_challenges 
-                                 if c["type"] == challenge_type.value and not c.get("completed", False)]
+            touched = {}
+            for challenge_type, value, match_data in updates:
+                for challenge_id in self._apply_progress(challenge_type, value):
+                    touched[challenge_id] = self.progress[challenge_id]
             
-            for challenge in relevant_challenges:
-                challenge_id = challenge["id"]
-                current_progress = self.progress.get(challenge_id, 0)
-                
-                if challenge_type in [ChallengeType.SCORE, ChallengeType.SIXES, ChallengeType.BOUNDARIES]:
-                    if value > current_progress:
-                        self.progress[challenge_id] = value
-                elif challenge_type in [ChallengeType.WINS, ChallengeType.STREAK]:
-                    if challenge_type == ChallengeType.WINS:
-                        self.progress[challenge_id] = current_progress + value
-                    else:
-                        if value > 0:
-                            self.progress[challenge_id] = current_progress + 1
-                        else:
-                            self.progress[challenge_id] = 0
-                
-                self._save_progress(challenge_id, self.progress[challenge_id])
+            if touched:
+                self._save_progress_many(touched)
                 
         except Exception as e:
             logger.error(f"Error updating challenge progress: {e}")
@@ -2952,36 +3762,41 @@ class ChallengeTracker:
         return completed_challenges
     
     def _save_progress(self, challenge_id: int, progress: int):
+        self._save_progress_many({challenge_id: progress})
+    
+    def _save_progress_many(self, progress_by_challenge: dict):
         try:
-            with get_db_connection() as conn:
+            with use_db_connection(self._conn) as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 now = datetime.now(timezone.utc).isoformat()
+                rows = [
+                    (self.user_id, challenge_id, progress, now)
+                    for challenge_id, progress in progress_by_challenge.items()
+                ]
                 
-                if is_postgres:
-                    cur.execute("""
+                if IS_POSTGRES:
+                    cur.executemany("""
                         INSERT INTO user_challenges (user_id, challenge_id, progress, updated_at)
                         VALUES (%s, %s, %s, %s)
                         ON CONFLICT (user_id, challenge_id)
                         DO UPDATE SET progress = EXCLUDED.progress, updated_at = EXCLUDED.updated_at
-                    """, (self.user_id, challenge_id, progress, now))
+                    """, rows)
                 else:
-                    cur.execute("""
+                    cur.executemany("""
                         INSERT OR REPLACE INTO user_challenges 
                         (user_id, challenge_id, progress, updated_at)
                         VALUES (?, ?, ?, ?)
-                    """, (self.user_id, challenge_id, progress, now))
+                    """, rows)
                     
         except Exception as e:
             logger.error(f"Error saving challenge progress: {e}")
     
     def _mark_completed(self, challenge_id: int):
         try:
-            with get_db_connection() as conn:
+            with use_db_connection(self._conn) as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         UPDATE user_challenges 
                         SET completed = TRUE, updated_at = %s 
@@ -2997,6 +3812,11 @@ class ChallengeTracker:
         except Exception as e:
             logger.error(f"Error marking challenge completed: {e}")
 
+# GIF URL -> Telegram file_id from the first successful send. Later sends
+# reuse the file_id so Telegram doesn't fetch the URL again.
+_ANIMATION_FILE_IDS = {}
+
+
 class AnimationManager:
     CRICKET_GIFS = {
         "six": [
@@ -3043,8 +3863,28 @@ class AnimationManager:
         ]
     }
     
+    # Rendered once; the send paths only look these up
+    ASCII_ANIMATION_TEXT = {event: "\n".join(frames) for event, frames in ASCII_ANIMATIONS.items()}
+    GIF_CHOICES = {
+        event: tuple(urls) if isinstance(urls, list) else (urls,)
+        for event, urls in CRICKET_GIFS.items()
+    }
+    EVENT_EMOJI = {
+        "six": "🚀",
+        "four": "⚡",
+        "wicket": "💥",
+        "century": "💯",
+        "victory": "🏆",
+        "tournament_win": "👑"
+    }
+    
     @staticmethod
     def send_animation(chat_id: int, event_type: str, caption: str = ""):
+        """Queue the animation behind the chat's pending messages (see send_call_async)"""
+        return send_call_async(chat_id, AnimationManager._send_animation_now, chat_id, event_type, caption)
+    
+    @staticmethod
+    def _send_animation_now(chat_id: int, event_type: str, caption: str = "") -> bool:
         try:
             if AnimationManager._send_gif_animation(chat_id, event_type, caption):
                 return True
@@ -3060,19 +3900,18 @@ class AnimationManager:
         try:
             if not bot:
                 return False
-            gif_urls = AnimationManager.CRICKET_GIFS.get(event_type)
+            gif_urls = AnimationManager.GIF_CHOICES.get(event_type)
             if gif_urls:
-                if isinstance(gif_urls, list):
-                    gif_url = random.choice(gif_urls)
-                else:
-                    gif_url = gif_urls
+                gif_url = gif_urls[0] if len(gif_urls) == 1 else random.choice(gif_urls)
                 
-                bot.send_animation(
+                sent = bot.send_animation(
                     chat_id, 
-                    gif_url, 
+                    _ANIMATION_FILE_IDS.get(gif_url, gif_url), 
                     caption=caption,
                     parse_mode="HTML"
                 )
+                if gif_url not in _ANIMATION_FILE_IDS and getattr(sent, 'animation', None):
+                    _ANIMATION_FILE_IDS[gif_url] = sent.animation.file_id
                 return True
         except Exception as e:
             logger.debug(f"GIF animation failed for {event_type}: {e}")
@@ -3083,9 +3922,8 @@ class AnimationManager:
         try:
             if not bot:
                 return False
-            ascii_frames = AnimationManager.ASCII_ANIMATIONS.get(event_type)
-            if ascii_frames:
-                animation_text = "\n".join(ascii_frames)
+            animation_text = AnimationManager.ASCII_ANIMATION_TEXT.get(event_type)
+            if animation_text:
                 if caption:
                     animation_text = f"{caption}\n\n{animation_text}"
                 
@@ -3100,16 +3938,7 @@ class AnimationManager:
         try:
             if not bot:
                 return False
-            emoji_map = {
-                "six": "🚀",
-                "four": "⚡",
-                "wicket": "💥",
-                "century": "💯",
-                "victory": "🏆",
-                "tournament_win": "👑"
-            }
-            
-            emoji = emoji_map.get(event_type, "🎯")
+            emoji = AnimationManager.EVENT_EMOJI.get(event_type, "🎯")
             message = f"{emoji} {caption}" if caption else emoji
             bot.send_message(chat_id, message)
             return True
@@ -3171,14 +4000,12 @@ class UserLevelManager:
         return max(base_xp, 10)
     
     @staticmethod
-    def update_user_level(user_id: int, xp_gained: int) -> dict:
+    def update_user_level(user_id: int, xp_gained: int, conn=None) -> dict:
         try:
-            with get_db_connection() as conn:
+            with use_db_connection(conn) as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
-                cur.execute(f"SELECT * FROM user_levels WHERE user_id = {param_style}", (user_id,))
+                cur.execute(f"SELECT * FROM user_levels WHERE user_id = {PARAM_STYLE}", (user_id,))
                 level_data = cur.fetchone()
                 
                 if not level_data:
@@ -3192,7 +4019,7 @@ class UserLevelManager:
                         "prestige": 0
                     }
                     
-                    if is_postgres:
+                    if IS_POSTGRES:
                         cur.execute("""
                             INSERT INTO user_levels (user_id, level, experience, next_level_xp, total_xp, prestige)
                             VALUES (%s, %s, %s, %s, %s, %s)
@@ -3202,6 +4029,7 @@ class UserLevelManager:
                             INSERT INTO user_levels (user_id, level, experience, next_level_xp, total_xp, prestige)
                             VALUES (?, ?, ?, ?, ?, ?)
                         """, (user_id, 1, xp_gained, UserLevelManager.LEVEL_XP_REQUIREMENTS[2], xp_gained, 0))
+                    _level_cache.invalidate(user_id)
                     
                     return {"level_up": False, "new_level": 1, "xp_gained": xp_gained}
                 
@@ -3220,7 +4048,7 @@ class UserLevelManager:
                 
                 next_level_xp = UserLevelManager.LEVEL_XP_REQUIREMENTS.get(new_level + 1, 0)
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         UPDATE user_levels SET 
                             level = %s, experience = %s, next_level_xp = %s, total_xp = %s
@@ -3232,12 +4060,13 @@ class UserLevelManager:
                             level = ?, experience = ?, next_level_xp = ?, total_xp = ?
                         WHERE user_id = ?
                     """, (new_level, new_xp, next_level_xp, total_xp, user_id))
+                _level_cache.invalidate(user_id)
                 
                 rewards = []
                 for level in level_ups:
                     if level in UserLevelManager.LEVEL_REWARDS:
                         reward = UserLevelManager.LEVEL_REWARDS[level]
-                        UserLevelManager._award_coins(user_id, reward["coins"])
+                        UserLevelManager._award_coins(user_id, reward["coins"], conn=conn)
                         rewards.append(reward)
                 
                 return {
@@ -3255,16 +4084,16 @@ class UserLevelManager:
             return {"level_up": False, "xp_gained": xp_gained}
     
     @staticmethod
-    def _award_coins(user_id: int, coins: int):
+    def _award_coins(user_id: int, coins: int, conn=None):
         try:
-            with get_db_connection() as conn:
+            with use_db_connection(conn) as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("UPDATE users SET coins = coins + %s WHERE user_id = %s", (coins, user_id))
                 else:
                     cur.execute("UPDATE users SET coins = coins + ? WHERE user_id = ?", (coins, user_id))
+            _coins_cache.invalidate(user_id)
         except Exception as e:
             logger.error(f"Error awarding coins: {e}")
 
@@ -3367,12 +4196,10 @@ class AchievementSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 # Check if already unlocked
                 cur.execute(
-                    f"SELECT achievement_id FROM user_achievements WHERE user_id = {param_style} AND achievement_id = {param_style}",
+                    f"SELECT achievement_id FROM user_achievements WHERE user_id = {PARAM_STYLE} AND achievement_id = {PARAM_STYLE}",
                     (user_id, achievement_id)
                 )
                 
@@ -3383,7 +4210,7 @@ class AchievementSystem:
                 achievement = AchievementSystem.ACHIEVEMENTS[achievement_id]
                 now = datetime.now(timezone.utc).isoformat()
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         INSERT INTO user_achievements (user_id, achievement_id, unlocked_at)
                         VALUES (%s, %s, %s)
@@ -3409,11 +4236,9 @@ class AchievementSystem:
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
-                param_style = "%s" if is_postgres else "?"
                 
                 cur.execute(
-                    f"SELECT achievement_id, unlocked_at FROM user_achievements WHERE user_id = {param_style}",
+                    f"SELECT achievement_id, unlocked_at FROM user_achievements WHERE user_id = {PARAM_STYLE}",
                     (user_id,)
                 )
                 
@@ -3461,9 +4286,8 @@ def create_additional_tables():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 autoincrement = "SERIAL PRIMARY KEY"
                 bigint = "BIGINT"
                 bool_type = "BOOLEAN"
@@ -3538,6 +4362,11 @@ def create_additional_tables():
                     UNIQUE(category, user_id)
                 )
             """)
+            # Top-N per category straight from the index, no sort
+            cur.execute("""
+                CREATE INDEX IF NOT EXISTS idx_leaderboards_category_value
+                ON leaderboards (category, value DESC)
+            """)
             logger.info("✓ leaderboards table created")
             
             # 5. Power-ups table
@@ -3591,18 +4420,26 @@ def create_additional_tables():
 
 
 
+# Monotonic tournament id source - avoids same-millisecond collisions
+_tournament_id_gen = itertools.count(int(time.time() * 1000))
+
+
+def next_tournament_id() -> str:
+    """Return a unique, time-ordered tournament id"""
+    return str(next(_tournament_id_gen))
+
+
 def save_tournament_to_db(tournament: EliteTournament, chat_id: int = None):
     """Save tournament state to database - FIXED with participants"""
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
-            tournament_json = json.dumps(tournament.to_dict())
+            brackets_json, tournament_json = tournament.to_db_payload()
             
             # First, delete old participants for this tournament
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("DELETE FROM tournament_participants WHERE tournament_id = %s", 
                            (tournament.tournament_id,))
             else:
@@ -3610,7 +4447,7 @@ def save_tournament_to_db(tournament: EliteTournament, chat_id: int = None):
                            (tournament.tournament_id,))
             
             # Save tournament data
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO tournaments 
                     (id, name, type, theme, status, format, entry_fee, prize_pool,
@@ -3624,7 +4461,7 @@ def save_tournament_to_db(tournament: EliteTournament, chat_id: int = None):
                       tournament.theme, tournament.tournament_state,
                       f"T{tournament.format_overs}", len(tournament.participants),
                       tournament.created_by, now,
-                      json.dumps(tournament.bracket), tournament_json))
+                      brackets_json, tournament_json))
             else:
                 # Check if exists
                 cur.execute("SELECT id FROM tournaments WHERE id = ?", 
@@ -3640,7 +4477,7 @@ def save_tournament_to_db(tournament: EliteTournament, chat_id: int = None):
                     """, (tournament.name, tournament.type, tournament.theme,
                           tournament.tournament_state, f"T{tournament.format_overs}",
                           len(tournament.participants),
-                          json.dumps(tournament.bracket), tournament_json,
+                          brackets_json, tournament_json,
                           tournament.tournament_id))
                 else:
                     cur.execute("""
@@ -3652,22 +4489,27 @@ def save_tournament_to_db(tournament: EliteTournament, chat_id: int = None):
                           tournament.theme, tournament.tournament_state,
                           f"T{tournament.format_overs}", len(tournament.participants),
                           tournament.created_by, now,
-                          json.dumps(tournament.bracket), tournament_json))
+                          brackets_json, tournament_json))
             
-            # Save participants
-            for i, participant in enumerate(tournament.participants, 1):
-                if is_postgres:
-                    cur.execute("""
+            # Save participants in one round-trip
+            participant_rows = [
+                (tournament.tournament_id, participant['user_id'], i, now)
+                for i, participant in enumerate(tournament.participants, 1)
+            ]
+            if participant_rows:
+                if IS_POSTGRES:
+                    from psycopg2.extras import execute_values
+                    execute_values(cur, """
                         INSERT INTO tournament_participants
                         (tournament_id, user_id, position, joined_at)
-                        VALUES (%s, %s, %s, %s)
-                    """, (tournament.tournament_id, participant['user_id'], i, now))
+                        VALUES %s
+                    """, participant_rows, page_size=500)
                 else:
-                    cur.execute("""
+                    cur.executemany("""
                         INSERT INTO tournament_participants
                         (tournament_id, user_id, position, joined_at)
                         VALUES (?, ?, ?, ?)
-                    """, (tournament.tournament_id, participant['user_id'], i, now))
+                    """, participant_rows)
             
             logger.info(f"Tournament {tournament.tournament_id} saved with {len(tournament.participants)} participants")
             
@@ -3678,9 +4520,8 @@ def _get_tournament_participants(tournament_id: int) -> list:
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     SELECT user_id FROM tournament_participants 
                     WHERE tournament_id = %s ORDER BY joined_at
@@ -3701,13 +4542,11 @@ def load_tournament_from_db(tournament_id: str) -> Optional[EliteTournament]:
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
-            if is_postgres:
-                cur.execute(f"SELECT metadata FROM tournaments WHERE id = {param_style}", (tournament_id,))
+            if IS_POSTGRES:
+                cur.execute(f"SELECT metadata FROM tournaments WHERE id = {PARAM_STYLE}", (tournament_id,))
             else:
-                cur.execute(f"SELECT metadata FROM tournaments WHERE id = {param_style}", (tournament_id,))
+                cur.execute(f"SELECT metadata FROM tournaments WHERE id = {PARAM_STYLE}", (tournament_id,))
             
             row = cur.fetchone()
             if row and row.get('metadata'):
@@ -3720,10 +4559,83 @@ def load_tournament_from_db(tournament_id: str) -> Optional[EliteTournament]:
         logger.error(f"Error loading tournament: {e}")
         return None
     
+TOURNAMENT_MAX_PLAYERS = 16
+
+# Claims a seat only if the tournament exists, has room and the user is not
+# already in it; the seat number comes back via RETURNING
+SQL_RESERVE_TOURNAMENT_SLOT = f"""
+    INSERT INTO tournament_participants (tournament_id, user_id, position, joined_at)
+    SELECT {PARAM_STYLE}, {PARAM_STYLE},
+           (SELECT COUNT(*) FROM tournament_participants WHERE tournament_id = {PARAM_STYLE}) + 1,
+           {SQL_NOW}
+    WHERE EXISTS (SELECT 1 FROM tournaments WHERE id = {PARAM_STYLE})
+      AND (SELECT COUNT(*) FROM tournament_participants WHERE tournament_id = {PARAM_STYLE}) < {PARAM_STYLE}
+    ON CONFLICT (tournament_id, user_id) DO NOTHING
+    RETURNING position
+"""
+
+
+def join_tournament_atomic(tournament_id, user_id: int, username: str) -> Dict:
+    """Register a user for a tournament in one transaction.
+    
+    The seat is claimed with a single conditional INSERT, so concurrent joins
+    can neither overfill the tournament nor register a user twice. The
+    metadata snapshot is then updated inside the same transaction.
+    """
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            
+            if IS_POSTGRES:
+                # Serialize joins per tournament so the seat count is current
+                cur.execute("SELECT id FROM tournaments WHERE id = %s FOR UPDATE", (tournament_id,))
+            
+            cur.execute(SQL_RESERVE_TOURNAMENT_SLOT, (
+                tournament_id, user_id, tournament_id,
+                tournament_id, tournament_id, TOURNAMENT_MAX_PLAYERS
+            ))
+            
+            if not cur.fetchone():
+                cur.execute(f"""
+                    SELECT
+                        (SELECT COUNT(*) FROM tournaments WHERE id = {PARAM_STYLE}) AS found,
+                        (SELECT COUNT(*) FROM tournament_participants
+                         WHERE tournament_id = {PARAM_STYLE} AND user_id = {PARAM_STYLE}) AS registered
+                """, (tournament_id, tournament_id, user_id))
+                row = cur.fetchone()
+                if not row['found']:
+                    return {'success': False, 'message': 'Tournament not found'}
+                if row['registered']:
+                    return {'success': False, 'message': 'Already registered'}
+                return {'success': False, 'message': 'Tournament is full'}
+            
+            cur.execute(f"SELECT metadata FROM tournaments WHERE id = {PARAM_STYLE}", (tournament_id,))
+            tournament = EliteTournament.from_dict(json.loads(cur.fetchone()['metadata']))
+            result = tournament.add_participant(user_id, username)
+            if not result['success']:
+                conn.rollback()
+                return result
+            
+            tournament_json = tournament.to_db_payload()[1]
+            cur.execute(f"""
+                UPDATE tournaments SET metadata = {PARAM_STYLE}, max_players = {PARAM_STYLE}
+                WHERE id = {PARAM_STYLE}
+            """, (tournament_json, len(tournament.participants), tournament_id))
+            
+            return result
+            
+    except Exception as e:
+        logger.error(f"Error joining tournament {tournament_id}: {e}")
+        return {'success': False, 'message': 'Error joining tournament'}
+
+
+# Base bot difficulty per difficulty level
+DIFFICULTY_BASE = {"easy": 0.4, "medium": 0.6, "hard": 0.8, "expert": 0.9}
+
+
 def calculate_dynamic_difficulty(game: GameState, user_stats: dict) -> float:
     """Adjust bot difficulty based on player performance"""
-    difficulty_map = {"easy": 0.4, "medium": 0.6, "hard": 0.8, "expert": 0.9}
-    base_difficulty = difficulty_map.get(game.data.get('difficulty_level', 'medium'), 0.6)
+    base_difficulty = DIFFICULTY_BASE.get(game.data.get('difficulty_level', 'medium'), 0.6)
     
     # Adjust based on player's recent performance
     win_rate = user_stats.get('wins', 0) / max(user_stats.get('games_played', 1), 1)
@@ -3747,14 +4659,15 @@ def apply_weather_pitch_effects(game: GameState, outcome: str, runs: int) -> int
     
     weather_multiplier = WEATHER_CONDITIONS.get(weather, {}).get('effect', 1.0)
     pitch_data = PITCH_CONDITIONS.get(pitch, {})
+    rand = random.random
     
     # Apply weather effect
-    if random.random() > weather_multiplier and runs > 0:
+    if rand() > weather_multiplier and runs > 0:
         runs = max(0, runs - 1)  # Weather reduces runs
     
     # Apply pitch effect based on shot type
-    if outcome == 'boundary' and random.random() < pitch_data.get('batting_bonus', 1.0):
-        if runs == 4 and random.random() > 0.7:
+    if outcome == 'boundary' and rand() < pitch_data.get('batting_bonus', 1.0):
+        if runs == 4 and rand() > 0.7:
             runs = 6  # Flat pitch upgrades 4 to 6
     
     return runs
@@ -3846,11 +4759,9 @@ def get_user_shop_progress(user_id: int) -> dict:
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Get user stats
-            cur.execute(f"SELECT * FROM stats WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT * FROM stats WHERE user_id = {PARAM_STYLE}", (user_id,))
             stats = cur.fetchone()
             
             if not stats:
@@ -4197,10 +5108,9 @@ def save_user_tournament_context(user_id: int, tournament_id: str, match_id: str
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO user_tournament_context 
                     (user_id, tournament_id, current_match_id, last_updated)
@@ -4238,9 +5148,8 @@ def create_tournament_context_table():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     CREATE TABLE IF NOT EXISTS user_tournament_context (
                         user_id BIGINT NOT NULL,
@@ -4498,13 +5407,10 @@ def generate_tournament_stats(tournament: EliteTournament) -> str:
     return stats
 
 
-def kb_match_actions(game: GameState) -> types.InlineKeyboardMarkup:
-    """Enhanced match action buttons"""
+def _kb_delivery_actions(batting: bool) -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=3)
     
-    batting = game.data.get('batting')
-    
-    if batting == 'player':
+    if batting:
         # Batting options
         kb.add(
             types.InlineKeyboardButton("🛡️ Defend", callback_data="shot_defend"),
@@ -4538,7 +5444,18 @@ def kb_match_actions(game: GameState) -> types.InlineKeyboardMarkup:
     return kb
 
 
-def kb_post_match(match_result: dict) -> types.InlineKeyboardMarkup:
+# Both variants serialized once, like the cached_markup keyboards
+_KB_BATTING_ACTIONS = _kb_delivery_actions(True).to_json()
+_KB_BOWLING_ACTIONS = _kb_delivery_actions(False).to_json()
+
+
+def kb_delivery_actions(game: GameState) -> str:
+    """Shot or delivery buttons for the side the player is on"""
+    return _KB_BATTING_ACTIONS if game.data.get('batting') == 'player' else _KB_BOWLING_ACTIONS
+
+
+@cached_markup
+def kb_match_complete() -> types.InlineKeyboardMarkup:
     """Post-match options"""
     kb = types.InlineKeyboardMarkup(row_width=2)
     
@@ -4547,17 +5464,18 @@ def kb_post_match(match_result: dict) -> types.InlineKeyboardMarkup:
         types.InlineKeyboardButton("📊 Match Stats", callback_data="detailed_stats")
     )
     kb.add(
-        types.InlineKeyboardButton("🏆 View Challenges", callback_data="challenges"),
-        types.InlineKeyboardButton("🎯 Tournaments", callback_data="tournaments")
+        types.InlineKeyboardButton("🏆 View Challenges", callback_data="challenges_new"),
+        types.InlineKeyboardButton("🎯 Tournaments", callback_data="tournaments_new")
     )
     kb.add(
         types.InlineKeyboardButton("📈 My Progress", callback_data="my_profile"),
-        types.InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu")
+        types.InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu_new")
     )
     
     return kb
 
 
+@cached_markup
 def kb_format_selector() -> types.InlineKeyboardMarkup:
     """Enhanced format selection"""
     kb = types.InlineKeyboardMarkup(row_width=2)
@@ -4575,6 +5493,7 @@ def kb_format_selector() -> types.InlineKeyboardMarkup:
     return kb
 
 
+@cached_markup
 def kb_difficulty_selector() -> types.InlineKeyboardMarkup:
     """Difficulty selection with descriptions"""
     kb = types.InlineKeyboardMarkup(row_width=2)
@@ -4598,10 +5517,9 @@ def _save_tournament_participant(tournament_id: int, user_id: int, position: int
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO tournament_participants (tournament_id, user_id, position, joined_at)
                     VALUES (%s, %s, %s, %s)
@@ -4615,16 +5533,25 @@ def _save_tournament_participant(tournament_id: int, user_id: int, position: int
         logger.error(f"Error saving tournament participant: {e}")
 
 # Replace all database queries to use consistent parameter style
+SQL_USER_COINS = f"SELECT coins FROM users WHERE user_id = {PARAM_STYLE}"
+
+
 def _get_user_coins(user_id: int) -> int:
     """Get user's coin balance"""
+    hit, coins = _coins_cache.get(user_id)
+    if hit:
+        return coins
+    
     try:
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
-            cur.execute(f"SELECT coins FROM users WHERE user_id = {param_style}", (user_id,))
+            execute_prepared(cur, "user_coins_stmt", SQL_USER_COINS, (user_id,))
             row = cur.fetchone()
-            return row["coins"] if row else 0
+        
+        coins = row["coins"] if row else 0
+        if row:
+            _coins_cache.put(user_id, coins)
+        return coins
     except Exception as e:
         logger.error(f"Error getting user coins: {e}")
         return 0
@@ -4634,9 +5561,8 @@ def _deduct_user_coins(user_id: int, amount: int) -> bool:
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute(
                     "UPDATE users SET coins = coins - %s WHERE user_id = %s",
                     (amount, user_id)
@@ -4647,6 +5573,7 @@ def _deduct_user_coins(user_id: int, amount: int) -> bool:
                     (amount, user_id)
                 )
         
+        _coins_cache.invalidate(user_id)
         return True
     except Exception as e:
         logger.error(f"Error deducting coins for user {user_id}: {e}")
@@ -4657,9 +5584,8 @@ def _award_coins(user_id: int, amount: int) -> bool:
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute(
                     "UPDATE users SET coins = coins + %s WHERE user_id = %s",
                     (amount, user_id)
@@ -4670,6 +5596,7 @@ def _award_coins(user_id: int, amount: int) -> bool:
                     (amount, user_id)
                 )
         
+        _coins_cache.invalidate(user_id)
         return True
     except Exception as e:
         logger.error(f"Error awarding coins to user {user_id}: {e}")
@@ -4679,6 +5606,13 @@ def _award_xp(user_id: int, amount: int):
     """Award XP to user"""
     UserLevelManager.update_user_level(user_id, amount)
 
+# Insert one daily challenge row
+SQL_INSERT_DAILY_CHALLENGE = f"""
+    INSERT INTO daily_challenges (
+        type, description, target, reward_coins, reward_xp, created_at, expires_at
+    ) VALUES ({", ".join([PARAM_STYLE] * 7)})
+"""
+
 def create_daily_challenges():
     """Create daily challenges for all users - FIXED DATE FUNCTION"""
     try:
@@ -4687,10 +5621,9 @@ def create_daily_challenges():
         
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
             # Check if challenges exist for today using ISO string comparison
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     SELECT COUNT(*) as count FROM daily_challenges 
                     WHERE created_at >= %s
@@ -4713,41 +5646,14 @@ def create_daily_challenges():
             
             logger.info(f"Generated {len(challenges)} challenges for today")
             
-            # Save challenges to database
-            for challenge in challenges:
-                now = datetime.now(timezone.utc).isoformat()
-                expires = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
-                
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO daily_challenges (
-                            type, description, target, reward_coins, reward_xp, 
-                            created_at, expires_at
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        challenge.type.value,
-                        challenge.description,
-                        challenge.target,
-                        challenge.reward_coins,
-                        challenge.reward_xp,
-                        now,
-                        expires
-                    ))
-                else:
-                    cur.execute("""
-                        INSERT INTO daily_challenges (
-                            type, description, target, reward_coins, reward_xp, 
-                            created_at, expires_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        challenge.type.value,
-                        challenge.description,
-                        challenge.target,
-                        challenge.reward_coins,
-                        challenge.reward_xp,
-                        now,
-                        expires
-                    ))
+            # Save challenges to database in one batch
+            now = datetime.now(timezone.utc).isoformat()
+            expires = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+            cur.executemany(SQL_INSERT_DAILY_CHALLENGE, [
+                (challenge.type.value, challenge.description, challenge.target,
+                 challenge.reward_coins, challenge.reward_xp, now, expires)
+                for challenge in challenges
+            ])
             
             logger.info(f"✓ Created {len(challenges)} daily challenges")
             
@@ -4760,9 +5666,8 @@ def _save_daily_challenge(challenge: DailyChallenge):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO daily_challenges (
                         type, description, target, reward_coins, reward_xp, created_at, expires_at
@@ -4785,77 +5690,77 @@ def _save_daily_challenge(challenge: DailyChallenge):
     except Exception as e:
         logger.error(f"Error saving daily challenge: {e}")
 
+def _spawn_tournament(tournament_data: Dict):
+    """Create, persist and announce a scheduled tournament from a config dict"""
+    tournament_id = next_tournament_id()
+    tournament = EliteTournament(
+        tournament_id,
+        tournament_data.get("name", "Weekly Championship"),
+        tournament_data.get("type", "knockout"),
+        tournament_data.get("theme", "champions"),
+        tournament_data.get("overs", 20),
+        10,
+        0
+    )
+    save_tournament_to_db(tournament)
+    logger.info(f"Created scheduled tournament: {tournament_id}")
+    background_executor.submit(announce_new_tournament, tournament, tournament_data)
+    return tournament
+
+
+def create_daily_tournament():
+    selected_format = random.choice(["T5", "T10"])
+    _spawn_tournament({
+        "name": f"Daily {selected_format} Tournament",
+        "type": "knockout",
+        "theme": "world_cup",
+        "format": selected_format,
+        "overs": int(selected_format[1:]),
+        "entry_fee": 30,
+        "max_players": 8
+    })
+
+def create_weekly_tournament():
+    _spawn_tournament({
+        "name": "Weekly Championship T20",
+        "type": "knockout", 
+        "theme": "champions",
+        "format": "T20",
+        "overs": 20,
+        "entry_fee": 100,
+        "max_players": 16
+    })
+
 def create_scheduled_tournament():
+    """Spawn whichever tournament is due at the current UTC minute, if any"""
     try:
         now = datetime.now(timezone.utc)
         
-        if now.hour == 12 and now.minute == 0:
-            formats = ["T5", "T10"]
-            selected_format = random.choice(formats)
-            
-            tournament_data = {
-                "name": f"Daily {selected_format} Tournament",
-                "type": "knockout",
-                "theme": "world_cup",
-                "format": selected_format,
-                "entry_fee": 30,
-                "max_players": 8
-            }
-            
-            tournament_id = str(int(time.time() * 1000))
-            tournament = EliteTournament(
-                tournament_id,
-                tournament_data.get("name", "Weekly Championship"),
-                tournament_data.get("type", "knockout"),
-                tournament_data.get("theme", "champions"),
-                tournament_data.get("overs", 20),
-                10,
-                0
-            )
-            save_tournament_to_db(tournament)
-            logger.info(f"Created weekly championship: {tournament.id}")
-            announce_new_tournament(tournament.id)
-        
+        # Weekly check first so Sunday ticks never spawn two tournaments
         if now.weekday() == 6 and now.hour == 15 and now.minute == 0:
-            tournament_data = {
-                "name": "Weekly Championship T20",
-                "type": "knockout", 
-                "theme": "champions",
-                "format": "T20",
-                "entry_fee": 100,
-                "max_players": 16
-            }
-            
-            tournament_id = str(int(time.time() * 1000))
-            tournament = EliteTournament(
-                tournament_id,
-                tournament_data.get("name", "Weekly Championship"),
-                tournament_data.get("type", "knockout"),
-                tournament_data.get("theme", "champions"),
-                tournament_data.get("overs", 20),
-                10,
-                0
-            )
-            save_tournament_to_db(tournament)
-            logger.info(f"Created weekly championship: {tournament.id}")
-            announce_new_tournament(tournament.id)
+            create_weekly_tournament()
+        elif now.hour == 12 and now.minute == 0:
+            create_daily_tournament()
             
     except Exception as e:
         logger.error(f"Error creating scheduled tournament: {e}")
 
-def announce_new_tournament(tournament_id: int):
+def announce_new_tournament(tournament: 'EliteTournament', tournament_data: Dict):
+    """Announce a freshly created tournament (runs on background_executor)"""
     try:
-        tournament = load_tournament_from_db(tournament_id)
         if not tournament:
             return
         
+        entry_fee = tournament_data.get("entry_fee", 0)
+        max_players = tournament_data.get("max_players", 16)
+        
         announcement = (
             f"🎺 <b>NEW TOURNAMENT ALERT!</b> 🎺\n\n"
             f"🏆 <b>{tournament.name}</b>\n"
-            f"📋 Format: {tournament.format}\n"
-            f"💰 Entry: {tournament.entry_fee} coins\n"
-            f"👥 Max Players: {tournament.max_players}\n"
-            f"🏆 Prize Pool: {tournament.prize_pool} coins\n\n"
+            f"📋 Format: {tournament_data.get('format', f'T{tournament.format_overs}')}\n"
+            f"💰 Entry: {entry_fee} coins\n"
+            f"👥 Max Players: {max_players}\n"
+            f"🏆 Prize Pool: {entry_fee * max_players} coins\n\n"
             f"Join now with /tournaments"
         )
         
@@ -4865,6 +5770,7 @@ def announce_new_tournament(tournament_id: int):
         logger.error(f"Error announcing tournament: {e}")
 
 # ADD THESE NEW KEYBOARD FUNCTIONS:
+@cached_markup
 def kb_tournament_menu() -> types.InlineKeyboardMarkup:
     """Tournament menu keyboard"""
     kb = types.InlineKeyboardMarkup(row_width=2)
@@ -4879,6 +5785,7 @@ def kb_tournament_menu() -> types.InlineKeyboardMarkup:
     kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="main_menu"))
     return kb
 
+@cached_markup
 def kb_tournament_formats() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=2)
     for format_key, format_data in TOURNAMENT_FORMATS.items():
@@ -4889,6 +5796,7 @@ def kb_tournament_formats() -> types.InlineKeyboardMarkup:
     kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="tournaments"))
     return kb
 
+@cached_markup
 def kb_tournament_themes() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=2)
     themes = [
@@ -4903,6 +5811,7 @@ def kb_tournament_themes() -> types.InlineKeyboardMarkup:
     kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="tournament_create"))
     return kb
 
+@cached_markup
 def kb_challenges() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=1)
     kb.add(
@@ -4924,6 +5833,7 @@ def kb_challenge_claim(challenges: list) -> types.InlineKeyboardMarkup:
     kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="challenges"))
     return kb
 
+@cached_markup
 def kb_level_up() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=2)
     kb.add(
@@ -4973,7 +5883,7 @@ def generate_live_match_display(match: TournamentMatch) -> str:
     return display
 
 
-def generate_match_summary(match: TournamentMatch) -> str:
+def generate_tournament_match_summary(match: TournamentMatch) -> str:
     """Create post-match summary"""
     summary = (
         f"╔{'═'*48}╗\n"
@@ -5042,7 +5952,7 @@ def generate_tournament_bracket(tournament: EliteTournament) -> str:
     return bracket_text
 
 # ADD THESE DISPLAY FUNCTIONS:
-def handle_tournament_menu(chat_id: int, user_id: int):
+def handle_tournament_menu(chat_id: int, user_id: int, message_id: int = None):
     """Show tournament main menu - FIXED"""
     try:
         menu_text = (
@@ -5061,7 +5971,7 @@ def handle_tournament_menu(chat_id: int, user_id: int):
         )
         kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="main_menu"))
         
-        bot.send_message(chat_id, menu_text, reply_markup=kb)
+        send_or_edit(chat_id, menu_text, message_id, reply_markup=kb)
         
     except Exception as e:
         logger.error(f"Error showing tournament menu: {e}")
@@ -5073,10 +5983,9 @@ def show_all_tournaments(chat_id: int):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
             # Get all active tournaments
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     SELECT id, name, type, status, current_round, 
                            (SELECT COUNT(*) FROM tournament_participants 
@@ -5207,7 +6116,7 @@ def start_tournament_match(chat_id: int, user_id: int, tournament_id: str, match
 
 
 
-def show_challenges_menu(chat_id: int, user_id: int):
+def show_challenges_menu(chat_id: int, user_id: int, message_id: int = None):
     try:
         level_info = _get_user_level_info(user_id)
         
@@ -5220,7 +6129,7 @@ def show_challenges_menu(chat_id: int, user_id: int):
             f"What would you like to do?"
         )
         
-        bot.send_message(chat_id, menu_text, reply_markup=kb_challenges())
+        send_or_edit(chat_id, menu_text, message_id, reply_markup=kb_challenges())
         
     except Exception as e:
         logger.error(f"Error showing challenges menu: {e}")
@@ -5287,22 +6196,27 @@ def claim_challenge_rewards(chat_id: int, user_id: int):
             )
             return
         
-        rewards_text = "🎁 <b>Claimable Rewards</b>\n\n"
-        total_coins = sum(c["reward_coins"] for c in claimable)
-        total_xp = sum(c["reward_xp"] for c in claimable)
+        rewards_parts = ["🎁 <b>Claimable Rewards</b>\n\n"]
+        total_coins = 0
+        total_xp = 0
         
         for challenge in claimable:
-            rewards_text += (
+            reward_coins = challenge["reward_coins"]
+            reward_xp = challenge["reward_xp"]
+            total_coins += reward_coins
+            total_xp += reward_xp
+            rewards_parts.append(
                 f"✅ {challenge['description']}\n"
-                f"   💰 {challenge['reward_coins']} coins + "
-                f"⭐ {challenge['reward_xp']} XP\n\n"
+                f"   💰 {reward_coins} coins + "
+                f"⭐ {reward_xp} XP\n\n"
             )
         
-        rewards_text += (
+        rewards_parts.append(
             f"<b>Total Rewards:</b>\n"
             f"💰 {total_coins} coins\n"
             f"⭐ {total_xp} XP"
         )
+        rewards_text = "".join(rewards_parts)
         
         bot.send_message(chat_id, rewards_text, reply_markup=kb_challenge_claim(claimable))
         
@@ -5312,26 +6226,30 @@ def claim_challenge_rewards(chat_id: int, user_id: int):
 
 def _get_user_level_info(user_id: int) -> dict:
     """Fixed version with consistent parameters"""
+    hit, level_info = _level_cache.get(user_id)
+    if hit:
+        return dict(level_info)
+    
     try:
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
-            cur.execute(f"SELECT * FROM user_levels WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT * FROM user_levels WHERE user_id = {PARAM_STYLE}", (user_id,))
             
             level_data = cur.fetchone()
             
-            if level_data:
-                return {
-                    "level": level_data["level"],
-                    "experience": level_data["experience"],
-                    "next_level_xp": level_data["next_level_xp"],
-                    "total_xp": level_data["total_xp"],
-                    "prestige": level_data.get("prestige", 0)
-                }
-            else:
-                return {"level": 1, "experience": 0, "next_level_xp": 100, "total_xp": 0, "prestige": 0}
+        if level_data:
+            level_info = {
+                "level": level_data["level"],
+                "experience": level_data["experience"],
+                "next_level_xp": level_data["next_level_xp"],
+                "total_xp": level_data["total_xp"],
+                "prestige": level_data["prestige"] or 0
+            }
+            _level_cache.put(user_id, level_info)
+            return dict(level_info)
+        else:
+            return {"level": 1, "experience": 0, "next_level_xp": 100, "total_xp": 0, "prestige": 0}
     except Exception as e:
         logger.error(f"Error getting user level info: {e}")
         return {"level": 1, "experience": 0, "next_level_xp": 100, "total_xp": 0, "prestige": 0}
@@ -5344,18 +6262,53 @@ def initialize_daily_systems():
     except Exception as e:
         logger.error(f"Error initializing daily systems: {e}")
 
-def schedule_daily_tasks():
-    schedule.every().day.at("00:01").do(create_daily_challenges)
-    schedule.every().day.at("12:00").do(create_scheduled_tournament)
-    schedule.every().sunday.at("15:00").do(create_scheduled_tournament)
-    
-    def run_scheduler():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+def _run_scheduled(task, rearm):
+    try:
+        task()
+    except Exception as e:
+        logger.error(f"Scheduled task {task.__name__} failed: {e}")
+    finally:
+        rearm()
+
+
+def _start_timer(delay: float, callback):
+    timer = threading.Timer(delay, callback)
+    timer.daemon = True
+    timer.start()
+    return timer
+
+
+def run_daily_at(at_hhmm: str, task, weekday: int = None):
+    """Run task at HH:MM local time every day (or only on weekday, Monday=0).
     
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
+    A daemon Timer sleeps until the next occurrence and re-arms itself after
+    the run, so the scheduler never wakes up between jobs.
+    """
+    hour, minute = map(int, at_hhmm.split(":"))
+    now = datetime.now()
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    if weekday is not None:
+        next_run += timedelta(days=(weekday - next_run.weekday()) % 7)
+    
+    return _start_timer(
+        (next_run - now).total_seconds(),
+        lambda: _run_scheduled(task, lambda: run_daily_at(at_hhmm, task, weekday))
+    )
+
+
+def run_every(seconds: float, task):
+    """Run task every `seconds` seconds on a self re-arming daemon Timer"""
+    return _start_timer(seconds, lambda: _run_scheduled(task, lambda: run_every(seconds, task)))
+
+
+def schedule_daily_tasks():
+    # The timers already fire at the right time, so each runs its task
+    # directly instead of re-checking the clock
+    run_daily_at("00:00", create_daily_challenges)
+    run_daily_at("12:00", create_daily_tournament)
+    run_daily_at("15:00", create_weekly_tournament, weekday=6)
     logger.info("Daily task scheduler started")
 
 # ADD THIS INITIALIZATION FUNCTION - CALL THIS IN YOUR MAIN SECTION:
@@ -5394,7 +6347,6 @@ def safe_start_new_game(chat_id: int, overs: int = DEFAULT_OVERS, wickets: int =
     try:
         g = default_game(chat_id, overs, wickets, difficulty)  # Pass chat_id
         g['chat_id'] = chat_id
-        safe_save_game(chat_id, g)
         game_state = GameState(chat_id)
         game_state.data = g
         game_state.save()
@@ -5421,20 +6373,41 @@ def safe_start_new_game(chat_id: int, overs: int = DEFAULT_OVERS, wickets: int =
         )
         
         bot.send_message(chat_id, match_info, reply_markup=kb_toss_choice())
-        log_event(chat_id, "match_start", f"format={g.get('match_format', 'T2')} difficulty={difficulty} user={user_id}")
+        log_event(chat_id, "match_start", f"format={g.get('match_format', 'T2')} difficulty={difficulty}", user_id=user_id)
         
     except Exception as e:
         logger.error(f"Error starting new game: {e}")
         bot.send_message(chat_id, "❌ Error starting match. Please try again.")
 
+_getrandbits = random.getrandbits
+
+# Bot shot picks with cumulative weights so random.choices skips
+# rebuilding the weight table on every ball
+_BOT_AGGRESSIVE_SHOTS = (4, 5, 6)
+_BOT_AGGRESSIVE_CUM_WEIGHTS = (2, 5, 9)
+_BOT_SAFE_SHOTS = (1, 2, 3)
+_BOT_SAFE_CUM_WEIGHTS = (3, 5, 6)
+_BOT_COMMON_DELIVERIES = (1, 6, 4)
+_COIN_SIDES = ("heads", "tails")
+
+
+def _roll_d6() -> int:
+    """Uniform 1-6 from three random bits, redrawing the two spare values"""
+    v = _getrandbits(3)
+    while v >= 6:
+        v = _getrandbits(3)
+    return v + 1
+
+
 def calculate_bot_move(g: Dict[str, Any], user_value: int) -> int:
     difficulty = g.get("difficulty_level", "medium")
     settings = DIFFICULTY_SETTINGS[difficulty]
+    rand = random.random
     
-    bot_choice = random.randint(1, 6)
+    bot_choice = _roll_d6()
     
     # Smart bot behavior based on difficulty
-    if random.random() < settings["bot_skill"]:
+    if rand() < settings["bot_skill"]:
         if g["batting"] == "bot":
             # Bot is batting - try to avoid user's number or play aggressively
             if g["innings"] == 2 and g["target"]:
@@ -5445,39 +6418,40 @@ def calculate_bot_move(g: Dict[str, Any], user_value: int) -> int:
                     required_rate = runs_needed / balls_left
                     
                     if required_rate > 8:  # Need aggressive shots
-                        bot_choice = random.choices([4, 5, 6], weights=[2, 3, 4])[0]
+                        bot_choice = random.choices(_BOT_AGGRESSIVE_SHOTS, cum_weights=_BOT_AGGRESSIVE_CUM_WEIGHTS)[0]
                     elif required_rate < 4:  # Can play safely
-                        bot_choice = random.choices([1, 2, 3], weights=[3, 2, 1])[0]
+                        bot_choice = random.choices(_BOT_SAFE_SHOTS, cum_weights=_BOT_SAFE_CUM_WEIGHTS)[0]
             
             # Try to avoid user's number with some probability
-            if random.random() < settings["bot_aggression"]:
-                avoid_value = user_value if random.random() < 0.7 else random.randint(1, 6)
+            if rand() < settings["bot_aggression"]:
+                avoid_value = user_value if rand() < 0.7 else _roll_d6()
                 attempts = 0
                 while bot_choice == avoid_value and attempts < 3:
-                    bot_choice = random.randint(1, 6)
+                    bot_choice = _roll_d6()
                     attempts += 1
         else:
             # Bot is bowling - try to match user's number
-            if random.random() < 0.6:
+            if rand() < 0.6:
                 bot_choice = user_value
             else:
                 # Common bowling choices
-                common_choices = [1, 6, 4]
-                bot_choice = random.choice(common_choices)
+                bot_choice = _BOT_COMMON_DELIVERIES[_roll_d6() % 3]
     
     return bot_choice
 
+# Only the picked line gets formatted, not all five
+_WICKET_COMMENTARY = (
+    "💥 BOWLED! What a delivery! {0} meets {1}",
+    "🎯 CAUGHT! Brilliant bowling! Both played {0}",
+    "⚡ CLEAN BOWLED! The stumps are shattered! {0} = {1}",
+    "🔥 WICKET! The crowd goes wild! Matching {0}s",
+    "💀 PLUMB LBW! Dead in front! {0} vs {1}"
+)
+
 def get_commentary(g: Dict[str, Any], user_value: int, bot_value: int, 
                   runs_scored: int, is_wicket: bool) -> str:
     if is_wicket:
-        wicket_comments = [
-            f"💥 BOWLED! What a delivery! {user_value} meets {bot_value}",
-            f"🎯 CAUGHT! Brilliant bowling! Both played {user_value}",
-            f"⚡ CLEAN BOWLED! The stumps are shattered! {user_value} = {bot_value}",
-            f"🔥 WICKET! The crowd goes wild! Matching {user_value}s",
-            f"💀 PLUMB LBW! Dead in front! {user_value} vs {bot_value}"
-        ]
-        return random.choice(wicket_comments)
+        return random.choice(_WICKET_COMMENTARY).format(user_value, bot_value)
     else:
         if runs_scored == 6:
             return f"🚀 MAXIMUM! Into the stands! {runs_scored} runs!"
@@ -5627,7 +6601,7 @@ def enhanced_process_ball_v2(chat_id: int, user_value: int, user_id: int):
                 
                 # Announce first innings end
                 first_innings_score = game_state.data['target']
-                bot.send_message(
+                send_async(
                     chat_id,
                     f"🏁 <b>First Innings Complete!</b>\n\n"
                     f"Score: {first_innings_score} runs\n\n"
@@ -5650,19 +6624,7 @@ def enhanced_process_ball_v2(chat_id: int, user_value: int, user_id: int):
                 # SECOND INNINGS ENDED - MATCH OVER
                 match_result = determine_match_result(game_state.data)
                 
-                # Save to history
-                save_match_to_history(
-                    chat_id,
-                    user_id,
-                    game_state,
-                    match_result['result_type'],
-                    f"{match_result['margin']} {match_result['margin_type']}"
-                )
-                
-                # Update user stats
-                update_user_stats_after_match(user_id, game_state, match_result['result_type'])
-                
-                # Complete the match (show summary, delete game)
+                # Record history and stats in one transaction, then show the summary
                 complete_match_enhanced(chat_id, game_state.data, user_id)
                 
                 # Clean up
@@ -5678,8 +6640,9 @@ def enhanced_process_ball_v2(chat_id: int, user_value: int, user_id: int):
                     'result': match_result
                 }
         
-        # STEP 8: Save game and continue
-        game_state.save()
+        # STEP 8: Save game and continue; ordinary balls go through the
+        # write-behind buffer, wickets and over ends are written immediately
+        game_state.save(flush=is_wicket or over_completed)
         
         return {
             'commentary': commentary,
@@ -5719,44 +6682,43 @@ def check_innings_end(g: Dict[str, Any]) -> dict:
     
     return {'innings_end': False, 'reason': None}
 
-def show_live_score(chat_id: int, g: Dict[str, Any], detailed: bool = True):
-    try:
-        req_rate_text = ""
-        if g["innings"] == 2 and g["target"]:
+def render_live_score(g: Dict[str, Any], detailed: bool = True) -> str:
+    """Format the live score card for a game dict"""
+    player_batting = g["batting"] == "player"
+    batting_side = "You" if player_batting else "Bot"
+    
+    # Lines are collected and joined once instead of growing one string
+    lines = [
+        "📊 <b>Live Score</b>",
+        "",
+        f"🏏 You: <b>{g['player_score']}/{g['player_wkts']}</b> ({g['player_balls_faced']} balls)",
+        f"🤖 Bot: <b>{g['bot_score']}/{g['bot_wkts']}</b> ({g['bot_balls_faced']} balls)",
+        "",
+        f"🎯 Innings: <b>{g['innings']}</b> | Batting: <b>{batting_side}</b>",
+        f"⏱️ Over: <b>{g['overs_bowled']}.{g['balls_in_over']}</b> / {g['overs_limit']}"
+        + (" ⚡" if g["is_powerplay"] else ""),
+    ]
+    
+    if g["target"]:
+        lines.append(f"🎯 Target: <b>{g['target'] + 1}</b> for {batting_side}")
+        if g["innings"] == 2:
             balls_left = (g["overs_limit"] - g["overs_bowled"]) * 6 - g["balls_in_over"]
-            runs_needed = g["target"] - (g["player_score"] if g["batting"] == "player" else g["bot_score"]) + 1
-            
             if balls_left > 0:
-                req_rate = (runs_needed * 6) / balls_left
-                req_rate_text = f"Required Rate: <b>{req_rate:.1f}</b> per over"
-        
-        score_text = (
-            f"📊 <b>Live Score</b>\n\n"
-            f"🏏 You: <b>{g['player_score']}/{g['player_wkts']}</b> "
-            f"({g['player_balls_faced']} balls)\n"
-            f"🤖 Bot: <b>{g['bot_score']}/{g['bot_wkts']}</b> "
-            f"({g['bot_balls_faced']} balls)\n\n"
-            f"🎯 Innings: <b>{g['innings']}</b> | "
-            f"Batting: <b>{'You' if g['batting'] == 'player' else 'Bot'}</b>\n"
-            f"⏱️ Over: <b>{g['overs_bowled']}.{g['balls_in_over']}</b> / {g['overs_limit']}"
-        )
-        
-        if g["is_powerplay"]:
-            score_text += " ⚡"
-        
-        if g["target"]:
-            target_team = "You" if g["batting"] == "player" else "Bot"
-            score_text += f"\n🎯 Target: <b>{g['target'] + 1}</b> for {target_team}"
-            if req_rate_text:
-                score_text += f"\n{req_rate_text}"
-        
-        if detailed:
-            if g["batting"] == "player":
-                score_text += f"\n🏏 Boundaries: {g['player_fours']}×4️⃣ {g['player_sixes']}×6️⃣"
-            else:
-                score_text += f"\n🤖 Boundaries: {g['bot_fours']}×4️⃣ {g['bot_sixes']}×6️⃣"
-        
-        bot.send_message(chat_id, score_text, reply_markup=kb_match_actions())
+                runs_needed = g["target"] - (g["player_score"] if player_batting else g["bot_score"]) + 1
+                lines.append(f"Required Rate: <b>{runs_needed * 6 / balls_left:.1f}</b> per over")
+    
+    if detailed:
+        if player_batting:
+            lines.append(f"🏏 Boundaries: {g['player_fours']}×4️⃣ {g['player_sixes']}×6️⃣")
+        else:
+            lines.append(f"🤖 Boundaries: {g['bot_fours']}×4️⃣ {g['bot_sixes']}×6️⃣")
+    
+    return "\n".join(lines)
+
+
+def show_live_score(chat_id: int, g: Dict[str, Any], detailed: bool = True):
+    try:
+        send_async(chat_id, render_live_score(g, detailed), reply_markup=kb_match_actions())
     except Exception as e:
         logger.error(f"Error showing live score: {e}")
 
@@ -5827,8 +6789,6 @@ def end_innings_or_match_v2(game_state: GameState, user_id: int):
     else:
         # End match
         result = determine_match_result(game_state.data)
-        save_match_history_v2(game_state.chat_id, game_state.data, result['result_type'], f"{result['margin']} {result['margin_type']}")
-        update_user_stats_v2(user_id, game_state.data, result['result_type'])
         complete_match_enhanced(game_state.chat_id, game_state.data, user_id)
         game_state.delete()
         return result
@@ -5861,7 +6821,7 @@ def handle_level_up_notification(chat_id: int, level_data: dict):
         
         # Send with special animation
         AnimationManager.send_animation(chat_id, "level_up", level_up_text)
-        bot.send_message(chat_id, level_up_text, reply_markup=kb_level_up())
+        send_async(chat_id, level_up_text, reply_markup=kb_level_up())
         
     except Exception as e:
         logger.error(f"Error handling level up notification: {e}")
@@ -5885,7 +6845,7 @@ def notify_challenge_completion(chat_id: int, user_id: int, completed_challenges
         kb = types.InlineKeyboardMarkup()
         kb.add(types.InlineKeyboardButton("🎁 Claim Rewards", callback_data="challenges_claim"))
         
-        bot.send_message(chat_id, notification_text, reply_markup=kb)
+        send_async(chat_id, notification_text, reply_markup=kb)
         
     except Exception as e:
         logger.error(f"Error notifying challenge completion: {e}")
@@ -5915,7 +6875,7 @@ def start_second_innings(chat_id: int, g: Dict[str, Any]):
             f"Bot is batting now. Bowl to defend your total!"
         )
     
-    bot.send_message(chat_id, first_innings_summary, reply_markup=kb_batting_numbers())
+    send_async(chat_id, first_innings_summary, reply_markup=kb_batting_numbers())
 
 def complete_match_enhanced(chat_id: int, g: Dict[str, Any], user_id: int):
     """Enhanced match completion with proper error handling"""
@@ -5941,8 +6901,13 @@ def complete_match_enhanced(chat_id: int, g: Dict[str, Any], user_id: int):
             result_emoji = "🤝"
             result_text = "IT'S A TIE!"
         
-        # Update stats and get rewards
-        update_result = update_user_stats_v2(user_id, g, result)
+        # History, stats, leaderboards, XP and challenges commit together;
+        # the messages below are only sent once that transaction is done
+        outcome = determine_match_result(g)
+        with get_db_connection() as conn:
+            save_match_history_v2(chat_id, user_id, g, result,
+                                  f"{outcome['margin']} {outcome['margin_type']}", conn=conn)
+            update_result = update_user_stats_v2(user_id, g, result, conn=conn)
         
         match_summary = generate_match_summary(g, result, margin_text)
         
@@ -5955,7 +6920,7 @@ def complete_match_enhanced(chat_id: int, g: Dict[str, Any], user_id: int):
         )
         
         # Send match result
-        bot.send_message(chat_id, final_message, reply_markup=kb_post_match())
+        send_async(chat_id, final_message, reply_markup=kb_post_match())
         
         # Handle level up notification
         if update_result.get("level_data", {}).get("level_up"):
@@ -5968,7 +6933,7 @@ def complete_match_enhanced(chat_id: int, g: Dict[str, Any], user_id: int):
         
     except Exception as e:
         logger.error(f"Error completing match: {e}")
-        bot.send_message(chat_id, "Match completed! Use /play for a new match.")
+        send_async(chat_id, "Match completed! Use /play for a new match.")
 
 
 def generate_match_summary(g: Dict[str, Any], result: str, margin: str) -> str:
@@ -6018,195 +6983,124 @@ def determine_match_result(game_data: Dict[str, Any]) -> Dict[str, Any]:
     
     return result
 
-def save_match_history_v2(chat_id: int, g: Dict[str, Any], result: str, margin: str):
+def save_match_history_v2(chat_id: int, user_id: int, g: Dict[str, Any], result: str, margin: str, conn=None):
     try:
-        with get_db_connection() as conn:
+        if not user_id or user_id <= 0:
+            return
+        
+        total_balls = g["player_balls_faced"] + g["bot_balls_faced"]
+        duration_minutes = max(1, total_balls // 12)
+        now = datetime.now(timezone.utc).isoformat()
+        
+        with use_db_connection(conn) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            
-            # Get user_id from recent history
-            if is_postgres:
-                cur.execute("""
-                    SELECT meta FROM history 
-                    WHERE chat_id=%s AND event='ball_input' 
-                    ORDER BY id DESC LIMIT 1
-                """, (chat_id,))
-            else:
-                cur.execute("""
-                    SELECT meta FROM history 
-                    WHERE chat_id=? AND event='ball_input' 
-                    ORDER BY id DESC LIMIT 1
-                """, (chat_id,))
-            
-            row = cur.fetchone()
-            user_id = None
             
-            if row and row["meta"]:
-                try:
-                    parts = dict(kv.split("=") for kv in row["meta"].split() if "=" in kv)
-                    user_id = int(parts.get("from", "0"))
-                except:
-                    pass
-            
-            if user_id and user_id > 0:
-                total_balls = g["player_balls_faced"] + g["bot_balls_faced"]
-                duration_minutes = max(1, total_balls // 12)
-                now = datetime.now(timezone.utc).isoformat()
-                
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO match_history (
-                            chat_id, user_id, match_format, player_score, bot_score,
-                            player_wickets, bot_wickets, overs_played, result, margin,
-                            player_strike_rate, match_duration_minutes, created_at
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        chat_id, user_id, g["match_format"], g["player_score"], g["bot_score"],
-                        g["player_wkts"], g["bot_wkts"], 
-                        g["overs_bowled"] + (g["balls_in_over"]/6.0),
-                        result, margin,
-                        (g["player_score"]/max(g["player_balls_faced"], 1)*100),
-                        duration_minutes, now
-                    ))
-                else:
-                    cur.execute("""
-                        INSERT INTO match_history (
-                            chat_id, user_id, match_format, player_score, bot_score,
-                            player_wickets, bot_wickets, overs_played, result, margin,
-                            player_strike_rate, match_duration_minutes, created_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        chat_id, user_id, g["match_format"], g["player_score"], g["bot_score"],
-                        g["player_wkts"], g["bot_wkts"], 
-                        g["overs_bowled"] + (g["balls_in_over"]/6.0),
-                        result, margin,
-                        (g["player_score"]/max(g["player_balls_faced"], 1)*100),
-                        duration_minutes, now
-                    ))
+            cur.execute(f"""
+                INSERT INTO match_history (
+                    chat_id, user_id, match_format, player_score, bot_score,
+                    player_wickets, bot_wickets, overs_played, result, margin,
+                    player_strike_rate, match_duration_minutes, created_at
+                ) VALUES ({', '.join([PARAM_STYLE] * 13)})
+            """, (
+                chat_id, user_id, g["match_format"], g["player_score"], g["bot_score"],
+                g["player_wkts"], g["bot_wkts"], 
+                g["overs_bowled"] + (g["balls_in_over"]/6.0),
+                result, margin,
+                (g["player_score"]/max(g["player_balls_faced"], 1)*100),
+                duration_minutes, now
+            ))
                     
     except Exception as e:
         logger.error(f"Error saving match history: {e}")
 
-def update_user_stats_v2(user_id: int, g: Dict[str, Any], result: str):
+# Per-match stats update. Every right-hand side sees the pre-update row, so
+# the derived ratios are computed from the old totals plus this match's deltas.
+_SQL_GREATEST = "GREATEST" if IS_POSTGRES else "MAX"
+SQL_UPDATE_MATCH_STATS = f"""
+    UPDATE stats SET 
+        games_played = games_played + 1,
+        wins = wins + {PARAM_STYLE},
+        losses = losses + {PARAM_STYLE},
+        ties = ties + {PARAM_STYLE},
+        current_winning_streak = CASE WHEN {PARAM_STYLE} = 1
+            THEN current_winning_streak + 1 ELSE 0 END,
+        longest_winning_streak = CASE WHEN {PARAM_STYLE} = 1
+            THEN {_SQL_GREATEST}(longest_winning_streak, current_winning_streak + 1)
+            ELSE longest_winning_streak END,
+        total_runs = total_runs + {PARAM_STYLE},
+        total_balls_faced = total_balls_faced + {PARAM_STYLE},
+        sixes_hit = sixes_hit + {PARAM_STYLE},
+        fours_hit = fours_hit + {PARAM_STYLE},
+        centuries = centuries + {PARAM_STYLE},
+        fifties = fifties + {PARAM_STYLE},
+        ducks = ducks + {PARAM_STYLE},
+        high_score = {_SQL_GREATEST}(high_score, {PARAM_STYLE}),
+        avg_score = CAST(total_runs + {PARAM_STYLE} AS REAL) / NULLIF(games_played + 1, 0),
+        strike_rate = CAST(total_runs + {PARAM_STYLE} AS REAL) * 100.0
+            / NULLIF(total_balls_faced + {PARAM_STYLE}, 0),
+        updated_at = {SQL_NOW}
+    WHERE user_id = {PARAM_STYLE}
+    RETURNING games_played, wins, high_score, current_winning_streak,
+        longest_winning_streak, sixes_hit
+"""
+
+
+def update_user_stats_v2(user_id: int, g: Dict[str, Any], result: str, conn=None):
     """Enhanced version with XP and challenge updates - REPLACE EXISTING"""
     try:
-        with get_db_connection() as conn:
+        with use_db_connection(conn) as conn:
             cur = conn.cursor()
-            now = datetime.now(timezone.utc).isoformat()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            # Update win/loss/tie counts
-            if result == "win":
-                if is_postgres:
-                    cur.execute("""
-                        UPDATE stats SET 
-                            wins = wins + 1,
-                            current_winning_streak = current_winning_streak + 1,
-                            longest_winning_streak = GREATEST(longest_winning_streak, current_winning_streak + 1)
-                        WHERE user_id = %s
-                    """, (user_id,))
-                else:
-                    cur.execute("""
-                        UPDATE stats SET 
-                            wins = wins + 1,
-                            current_winning_streak = current_winning_streak + 1,
-                            longest_winning_streak = MAX(longest_winning_streak, current_winning_streak + 1)
-                        WHERE user_id = ?
-                    """, (user_id,))
-            elif result == "loss":
-                param = (user_id,) if is_postgres else (user_id,)
-                param_style = "%s" if is_postgres else "?"
-                cur.execute(f"""
-                    UPDATE stats SET 
-                        losses = losses + 1,
-                        current_winning_streak = 0
-                    WHERE user_id = {param_style}
-                """, param)
-            else:  # tie
-                param = (user_id,) if is_postgres else (user_id,)
-                param_style = "%s" if is_postgres else "?"
-                cur.execute(f"""
-                    UPDATE stats SET 
-                        ties = ties + 1,
-                        current_winning_streak = 0
-                    WHERE user_id = {param_style}
-                """, param)
-            
-            # Update other stats
-            centuries_increment = 1 if g["player_score"] >= 100 else 0
-            fifties_increment = 1 if g["player_score"] >= 50 and g["player_score"] < 100 else 0
-            ducks_increment = 1 if g["player_score"] == 0 and g["player_balls_faced"] > 0 else 0
-            
-            if is_postgres:
-                cur.execute("""
-                    UPDATE stats SET 
-                        games_played = games_played + 1,
-                        total_runs = total_runs + %s,
-                        total_balls_faced = total_balls_faced + %s,
-                        sixes_hit = sixes_hit + %s,
-                        fours_hit = fours_hit + %s,
-                        centuries = centuries + %s,
-                        fifties = fifties + %s,
-                        ducks = ducks + %s,
-                        high_score = GREATEST(high_score, %s),
-                        updated_at = %s
-                    WHERE user_id = %s
-                """, (
-                    g["player_score"], g["player_balls_faced"], g["player_sixes"],
-                    g["player_fours"], centuries_increment, fifties_increment, 
-                    ducks_increment, g["player_score"], now, user_id
-                ))
-            else:
-                cur.execute("""
-                    UPDATE stats SET 
-                        games_played = games_played + 1,
-                        total_runs = total_runs + ?,
-                        total_balls_faced = total_balls_faced + ?,
-                        sixes_hit = sixes_hit + ?,
-                        fours_hit = fours_hit + ?,
-                        centuries = centuries + ?,
-                        fifties = fifties + ?,
-                        ducks = ducks + ?,
-                        high_score = MAX(high_score, ?),
-                        updated_at = ?
-                    WHERE user_id = ?
-                """, (
-                    g["player_score"], g["player_balls_faced"], g["player_sixes"],
-                    g["player_fours"], centuries_increment, fifties_increment, 
-                    ducks_increment, g["player_score"], now, user_id
-                ))
+            is_win = 1 if result == "win" else 0
+            is_loss = 1 if result == "loss" else 0
+            is_tie = 1 if result not in ("win", "loss") else 0
+            score = g["player_score"]
+            balls = g["player_balls_faced"]
+            centuries_increment = 1 if score >= 100 else 0
+            fifties_increment = 1 if 50 <= score < 100 else 0
+            ducks_increment = 1 if score == 0 and balls > 0 else 0
+            
+            # Result, streak, counters and derived ratios in a single statement
+            execute_prepared(cur, "update_match_stats_stmt", SQL_UPDATE_MATCH_STATS, (
+                is_win, is_loss, is_tie, is_win, is_win,
+                score, balls, g["player_sixes"], g["player_fours"],
+                centuries_increment, fifties_increment, ducks_increment,
+                score, score, score, balls, user_id
+            ))
+            stats_rows = cur.fetchall()
             
-            # Update calculated stats
-            param_style = "%s" if is_postgres else "?"
-            cur.execute(f"""
-                UPDATE stats SET 
-                    avg_score = CAST(total_runs AS REAL) / NULLIF(games_played, 0),
-                    strike_rate = CAST(total_runs AS REAL) * 100.0 / NULLIF(total_balls_faced, 0)
-                WHERE user_id = {param_style}
-            """, (user_id,))
+            if stats_rows:
+                stats = stats_rows[0]
+                update_leaderboard(user_id, 'highest_score', stats['high_score'], conn)
+                update_leaderboard(user_id, 'most_wins', stats['wins'], conn)
+                update_leaderboard(user_id, 'win_streak', stats['longest_winning_streak'], conn)
+                update_leaderboard(user_id, 'most_sixes', stats['sixes_hit'], conn)
             
-            # Calculate and award XP
+            # Leaderboard, level and challenge writes share this connection so
+            # the whole match result commits as one transaction
             xp_gained = UserLevelManager.calculate_match_xp(g, result)
-            level_data = UserLevelManager.update_user_level(user_id, xp_gained)
+            level_data = UserLevelManager.update_user_level(user_id, xp_gained, conn=conn)
             
-            # Update challenges
-            tracker = ChallengeTracker(user_id)
+            tracker = ChallengeTracker(user_id, conn=conn)
             
-            if result == "win":
-                tracker.update_progress(ChallengeType.WINS, 1)
-                # Update streak
+            if stats_rows:
+                current_streak = stats_rows[0]["current_winning_streak"]
+            elif result == "win":
                 current_streak = get_user_session_data(user_id, "current_streak", 0) + 1
-                set_user_session_data(user_id, "current_streak", current_streak)
-                tracker.update_progress(ChallengeType.STREAK, current_streak)
             else:
-                # Reset streak on loss
-                set_user_session_data(user_id, "current_streak", 0)
-                tracker.update_progress(ChallengeType.STREAK, 0)
-            
-            # Update score-based challenges with final score
-            tracker.update_progress(ChallengeType.SCORE, g["player_score"], g)
-            tracker.update_progress(ChallengeType.SIXES, g["player_sixes"])
-            tracker.update_progress(ChallengeType.BOUNDARIES, g["player_fours"] + g["player_sixes"])
+                current_streak = 0
+            set_user_session_data(user_id, "current_streak", current_streak)
+            
+            # All challenge deltas for this match are written in one batch
+            challenge_updates = [
+                (ChallengeType.STREAK, current_streak, None),
+                (ChallengeType.SCORE, g["player_score"], g),
+                (ChallengeType.SIXES, g["player_sixes"], None),
+                (ChallengeType.BOUNDARIES, g["player_fours"] + g["player_sixes"], None),
+            ]
+            if is_win:
+                challenge_updates.insert(0, (ChallengeType.WINS, 1, None))
+            tracker.update_progress_bulk(challenge_updates)
             
             # Check for completed challenges
             completed = tracker.check_completion()
@@ -6222,98 +7116,172 @@ def update_user_stats_v2(user_id: int, g: Dict[str, Any], result: str):
         return {"level_data": {"level_up": False}, "completed_challenges": [], "xp_gained": 0}
 
 
+SQL_UPSERT_USER = f"""
+    INSERT INTO users (
+        user_id, username, first_name, last_name, language_code, 
+        is_premium, coins, created_at, last_active, total_messages
+    ) VALUES ({PARAM_STYLE}, {PARAM_STYLE}, {PARAM_STYLE}, {PARAM_STYLE}, {PARAM_STYLE},
+              {PARAM_STYLE}, 100, {SQL_NOW}, {SQL_NOW}, 1)
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = EXCLUDED.username,
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        language_code = EXCLUDED.language_code,
+        is_premium = EXCLUDED.is_premium,
+        last_active = EXCLUDED.last_active,
+        total_messages = users.total_messages + 1
+"""
+
+SQL_INSERT_STATS_ROW = f"""
+    INSERT INTO stats (user_id, created_at, updated_at) 
+    VALUES ({PARAM_STYLE}, {SQL_NOW}, {SQL_NOW})
+    ON CONFLICT (user_id) DO NOTHING
+"""
+
+
 def upsert_user(u: types.User):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            now = datetime.now(timezone.utc).isoformat()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            
-            # Check if user exists first
-            param_style = "%s" if is_postgres else "?"
-            cur.execute(f"SELECT user_id FROM users WHERE user_id = {param_style}", (u.id,))
-            exists = cur.fetchone()
             
-            if exists:
-                # Update existing user
-                if is_postgres:
-                    cur.execute("""
-                        UPDATE users SET
-                            username = %s,
-                            first_name = %s,
-                            last_name = %s,
-                            language_code = %s,
-                            is_premium = %s,
-                            last_active = %s,
-                            total_messages = total_messages + 1
-                        WHERE user_id = %s
-                    """, (
-                        u.username, u.first_name, u.last_name, 
-                        u.language_code, getattr(u, 'is_premium', False),
-                        now, u.id
-                    ))
-                else:
-                    cur.execute("""
-                        UPDATE users SET
-                            username = ?,
-                            first_name = ?,
-                            last_name = ?,
-                            language_code = ?,
-                            is_premium = ?,
-                            last_active = ?,
-                            total_messages = total_messages + 1
-                        WHERE user_id = ?
-                    """, (
-                        u.username, u.first_name, u.last_name, 
-                        u.language_code, getattr(u, 'is_premium', False),
-                        now, u.id
-                    ))
-            else:
-                # Insert new user
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO users (
-                            user_id, username, first_name, last_name, language_code, 
-                            is_premium, coins, created_at, last_active, total_messages
-                        ) VALUES (%s, %s, %s, %s, %s, %s, 100, %s, %s, 1)
-                    """, (
-                        u.id, u.username, u.first_name, u.last_name, 
-                        u.language_code, getattr(u, 'is_premium', False),
-                        now, now
-                    ))
-                else:
-                    cur.execute("""
-                        INSERT INTO users (
-                            user_id, username, first_name, last_name, language_code, 
-                            is_premium, coins, created_at, last_active, total_messages
-                        ) VALUES (?, ?, ?, ?, ?, ?, 100, ?, ?, 1)
-                    """, (
-                        u.id, u.username, u.first_name, u.last_name, 
-                        u.language_code, getattr(u, 'is_premium', False),
-                        now, now
-                    ))
+            # Insert or refresh the user in one round-trip
+            execute_prepared(cur, "upsert_user_stmt", SQL_UPSERT_USER, (
+                u.id, u.username, u.first_name, u.last_name, 
+                u.language_code, getattr(u, 'is_premium', False)
+            ))
             
             # Ensure stats record exists
-            cur.execute(f"SELECT user_id FROM stats WHERE user_id = {param_style}", (u.id,))
-            if not cur.fetchone():
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO stats (user_id, created_at, updated_at) 
-                        VALUES (%s, %s, %s)
-                    """, (u.id, now, now))
-                else:
-                    cur.execute("""
-                        INSERT INTO stats (user_id, created_at, updated_at) 
-                        VALUES (?, ?, ?)
-                    """, (u.id, now, now))
+            execute_prepared(cur, "insert_stats_row_stmt", SQL_INSERT_STATS_ROW, (u.id,))
             
             logger.info(f"User {u.id} upserted successfully")
             
     except Exception as e:
         logger.error(f"Error upserting user {u.id}: {e}", exc_info=True)
 
-# Keyboard definitions
-def kb_main_menu() -> types.InlineKeyboardMarkup:
+
+class UserUpsertBatcher:
+    """Coalesces per-message user refreshes into one write transaction.
+    
+    The first sighting of a user in this process is written synchronously so
+    the users/stats rows exist before the handler reads them; later messages
+    are queued and flushed by a daemon thread every FLUSH_INTERVAL seconds or
+    MAX_BATCH items, whichever comes first. Users seen recently are kept in a
+    bounded LRU; one that falls out is simply written synchronously again.
+    """
+    FLUSH_INTERVAL = 0.2
+    MAX_BATCH = 128
+    KNOWN_USERS_MAX = 50000
+    KNOWN_USERS_TTL = 3600
+    
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._known_users = TTLCache(maxsize=self.KNOWN_USERS_MAX, ttl=self.KNOWN_USERS_TTL)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def submit(self, u: types.User):
+        if not self._known_users.get(u.id)[0]:
+            upsert_user(u)
+            self._known_users.put(u.id, True)
+            return
+        
+        self._ensure_worker()
+        self._queue.put((
+            u.id, u.username, u.first_name, u.last_name, u.language_code,
+            getattr(u, 'is_premium', False), now_iso()
+        ))
+    
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="user-upsert-batcher", daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.FLUSH_INTERVAL
+            while len(batch) < self.MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+    
+    def drain(self):
+        """Write every queued refresh now"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.flush(batch)
+    
+    def flush(self, batch: list):
+        """Write a batch of queued user refreshes in a single transaction"""
+        # Collapse repeats so each user is touched once; keep the latest
+        # profile fields and count how many messages were seen.
+        merged = {}
+        for row in batch:
+            previous = merged.get(row[0])
+            merged[row[0]] = row + ((previous[-1] if previous else 0) + 1,)
+        
+        rows = [
+            (user_id, username, first_name, last_name, language_code, is_premium, now, now, count)
+            for user_id, username, first_name, last_name, language_code, is_premium, now, count
+            in merged.values()
+        ]
+        
+        try:
+            with get_db_connection() as conn:
+                cur = conn.cursor()
+                conflict_clause = """
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        username = EXCLUDED.username,
+                        first_name = EXCLUDED.first_name,
+                        last_name = EXCLUDED.last_name,
+                        language_code = EXCLUDED.language_code,
+                        is_premium = EXCLUDED.is_premium,
+                        last_active = EXCLUDED.last_active,
+                        total_messages = users.total_messages + EXCLUDED.total_messages
+                """
+                
+                if IS_POSTGRES:
+                    from psycopg2.extras import execute_values
+                    execute_values(cur, """
+                        INSERT INTO users (
+                            user_id, username, first_name, last_name, language_code,
+                            is_premium, created_at, last_active, total_messages
+                        ) VALUES %s
+                    """ + conflict_clause, rows)
+                else:
+                    cur.executemany("""
+                        INSERT INTO users (
+                            user_id, username, first_name, last_name, language_code,
+                            is_premium, created_at, last_active, total_messages
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """ + conflict_clause, rows)
+            
+            logger.debug(f"Flushed {len(rows)} user upserts ({len(batch)} messages)")
+        except Exception as e:
+            logger.error(f"Error flushing user upsert batch: {e}", exc_info=True)
+
+
+user_upsert_batcher = UserUpsertBatcher()
+atexit.register(user_upsert_batcher.drain)
+
+# Keyboard definitions
+@cached_markup
+def kb_main_menu() -> types.InlineKeyboardMarkup:
     """Enhanced main menu WITHOUT powerups (now in shop)"""
     kb = types.InlineKeyboardMarkup(row_width=2)
     kb.add(
@@ -6338,6 +7306,7 @@ def kb_main_menu() -> types.InlineKeyboardMarkup:
     )
     return kb
 
+@cached_markup
 def kb_difficulty_select() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=2)
     for diff, settings in DIFFICULTY_SETTINGS.items():
@@ -6349,6 +7318,7 @@ def kb_difficulty_select() -> types.InlineKeyboardMarkup:
     kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="back_main"))
     return kb
 
+@cached_markup
 def kb_format_select() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=2)
     formats = [
@@ -6364,6 +7334,7 @@ def kb_format_select() -> types.InlineKeyboardMarkup:
     kb.add(types.InlineKeyboardButton("🔙 Back", callback_data="back_main"))
     return kb
 
+@cached_markup
 def kb_toss_choice() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup()
     kb.add(
@@ -6372,6 +7343,7 @@ def kb_toss_choice() -> types.InlineKeyboardMarkup:
     )
     return kb
 
+@cached_markup
 def kb_bat_bowl_choice() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup()
     kb.add(
@@ -6380,6 +7352,7 @@ def kb_bat_bowl_choice() -> types.InlineKeyboardMarkup:
     )
     return kb
 
+@cached_markup
 def kb_batting_numbers() -> types.ReplyKeyboardMarkup:
     kb = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=3, one_time_keyboard=False)
     row1 = [types.KeyboardButton("1"), types.KeyboardButton("2"), types.KeyboardButton("3")]
@@ -6389,6 +7362,7 @@ def kb_batting_numbers() -> types.ReplyKeyboardMarkup:
     kb.add(types.KeyboardButton("📊 Score"), types.KeyboardButton("🏳️ Forfeit"))
     return kb
 
+@cached_markup
 def kb_post_match() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=2)
     kb.add(
@@ -6397,10 +7371,11 @@ def kb_post_match() -> types.InlineKeyboardMarkup:
     )
     kb.add(
         types.InlineKeyboardButton("🏆 View Stats", callback_data="my_stats"),
-        types.InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu")
+        types.InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu_new")
     )
     return kb
 
+@cached_markup
 def kb_match_actions() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup(row_width=3)
     kb.add(
@@ -6409,6 +7384,7 @@ def kb_match_actions() -> types.InlineKeyboardMarkup:
     )
     return kb
 
+@cached_markup
 def kb_forfeit_confirm() -> types.InlineKeyboardMarkup:
     kb = types.InlineKeyboardMarkup()
     kb.add(
@@ -6417,6 +7393,19 @@ def kb_forfeit_confirm() -> types.InlineKeyboardMarkup:
     )
     return kb
 
+@cached_markup
+def kb_start_reply() -> types.ReplyKeyboardMarkup:
+    kb = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
+    kb.add(
+        types.KeyboardButton("📋 Menu"),
+        types.KeyboardButton("🏏 Play")
+    )
+    kb.add(
+        types.KeyboardButton("🛒 Shop"),
+        types.KeyboardButton("📊 Stats")
+    )
+    return kb
+
 # Stats functions
 
 def _update_tournament_in_db(tournament):
@@ -6424,12 +7413,11 @@ def _update_tournament_in_db(tournament):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
-            tournament_json = json.dumps(tournament.to_dict())
+            brackets_json, tournament_json = tournament.to_db_payload()
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     UPDATE tournaments SET 
                         name = %s, status = %s, current_round = %s, 
@@ -6437,7 +7425,7 @@ def _update_tournament_in_db(tournament):
                     WHERE id = %s
                 """, (
                     tournament.name, tournament.tournament_state, tournament.current_round,
-                    json.dumps(tournament.bracket), tournament_json, now, tournament.tournament_id
+                    brackets_json, tournament_json, now, tournament.tournament_id
                 ))
             else:
                 cur.execute("""
@@ -6447,7 +7435,7 @@ def _update_tournament_in_db(tournament):
                     WHERE id = ?
                 """, (
                     tournament.name, tournament.tournament_state, tournament.current_round,
-                    json.dumps(tournament.bracket), tournament_json, now, tournament.tournament_id
+                    brackets_json, tournament_json, now, tournament.tournament_id
                 ))
                 
     except Exception as e:
@@ -6468,28 +7456,9 @@ def _send_registration_confirmation(chat_id: int, user_id: int, tournament):
     except Exception as e:
         logger.error(f"Error sending registration confirmation: {e}")
 
-def _start_tournament(tournament_id: int):
-    """Start tournament when full"""
-    try:
-        tournament = load_tournament_from_db(tournament_id)
-        if tournament and len(tournament.participants) >= 16:
-            tournament.status = TournamentStatus.ONGOING
-            logger.info(f"Tournament {tournament_id} started with {len(tournament.participants)} players")
-            # Additional tournament start logic here
-            
-    except Exception as e:
-        logger.error(f"Error starting tournament {tournament_id}: {e}")
-
-
-
-def get_param_style():
-    """Get correct parameter placeholder for current database"""
-    return "%s" if bool(os.getenv("DATABASE_URL")) else "?"
-
-
 def execute_query(cursor, query, params):
     """Execute query with proper parameter style"""
-    if os.getenv("DATABASE_URL"):  # PostgreSQL
+    if IS_POSTGRES:  # PostgreSQL
         cursor.execute(query.replace("?", "%s"), params)
     else:  # SQLite
         cursor.execute(query, params)
@@ -6497,9 +7466,20 @@ def execute_query(cursor, query, params):
 
 def show_user_stats(chat_id: int, user_id: int):
     try:
-        with get_db_connection() as conn:
+        # Postgres reads stats and bumps last_active in one round-trip; SQLite
+        # cannot UPDATE inside a CTE, so it stays on the read-only pool (the
+        # per-message user upsert already refreshes last_active there)
+        with get_db_connection(readonly=not IS_POSTGRES) as conn:
             cur = conn.cursor()
-            execute_query(cur, "SELECT * FROM users WHERE user_id = ?", (user_id,))
+            if IS_POSTGRES:
+                cur.execute("""
+                    WITH touched AS (
+                        UPDATE users SET last_active = NOW() WHERE user_id = %s
+                    )
+                    SELECT * FROM stats WHERE user_id = %s
+                """, (user_id, user_id))
+            else:
+                cur.execute("SELECT * FROM stats WHERE user_id = ?", (user_id,))
             stats = cur.fetchone()
             if not stats or stats["games_played"] == 0:
                 bot.send_message(chat_id, "📊 No statistics yet! Play your first match with /play")
@@ -6535,18 +7515,37 @@ def show_user_stats(chat_id: int, user_id: int):
         bot.send_message(chat_id, "❌ Error loading statistics. Please try again.")
 
 
+SESSION_CLEANUP_BATCH = 10000
+
+
 def cleanup_old_sessions():
-    """Clean up expired sessions"""
+    """Clean up expired sessions in bounded batches (scheduled hourly)
+    
+    Each batch commits on its own so row locks are never held for the whole
+    sweep; idx_sessions_updated_at turns the cutoff filter into a range scan.
+    """
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            cutoff = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=7)).isoformat()
+        row_id = "ctid" if IS_POSTGRES else "rowid"
+        total_deleted = 0
+        
+        while True:
+            with get_db_connection() as conn:
+                cur = conn.cursor()
+                cur.execute(f"""
+                    DELETE FROM user_sessions WHERE {row_id} IN (
+                        SELECT {row_id} FROM user_sessions
+                        WHERE updated_at < {PARAM_STYLE} LIMIT {PARAM_STYLE}
+                    )
+                """, (cutoff, SESSION_CLEANUP_BATCH))
+                deleted = cur.rowcount
             
-            if is_postgres:
-                cur.execute("DELETE FROM user_sessions WHERE updated_at < %s", (cutoff,))
-            else:
-                cur.execute("DELETE FROM user_sessions WHERE updated_at < ?", (cutoff,))
+            total_deleted += max(deleted, 0)
+            if deleted < SESSION_CLEANUP_BATCH:
+                break
+        
+        if total_deleted:
+            logger.info(f"Cleaned up {total_deleted} expired sessions")
     except Exception as e:
         logger.error(f"Error cleaning up sessions: {e}")
 
@@ -6588,65 +7587,92 @@ def check_and_notify_unlocks(user_id: int, chat_id: int):
         logger.error(f"Error checking unlocks: {e}")
 
 
-def show_leaderboard(chat_id: int, category: str = "wins"):
+# Top-10 leaderboard rows cached per category for LEADERBOARD_CACHE_TTL seconds
+LEADERBOARD_CACHE_TTL = 60
+_leaderboard_cache = {}
+_leaderboard_cache_lock = threading.Lock()
+
+
+def _fetch_leaderboard_rows(category: str) -> list:
+    """Return the top-10 rows for a category, served from cache when fresh"""
+    now = time.monotonic()
+    with _leaderboard_cache_lock:
+        cached = _leaderboard_cache.get(category)
+        if cached and now - cached[0] < LEADERBOARD_CACHE_TTL:
+            return cached[1]
+    
+    if category == "wins":
+        query = """
+            SELECT u.first_name, u.username, s.wins, s.games_played, s.high_score
+            FROM stats s JOIN users u ON u.user_id = s.user_id
+            WHERE s.games_played >= 1
+            ORDER BY s.wins DESC, s.high_score DESC
+            LIMIT 10
+        """
+    else:
+        query = """
+            SELECT u.first_name, u.username, s.high_score, s.games_played, s.wins
+            FROM stats s JOIN users u ON u.user_id = s.user_id
+            WHERE s.games_played >= 1
+            ORDER BY s.high_score DESC
+            LIMIT 10
+        """
+    
+    with get_db_connection(readonly=True) as conn:
+        cur = conn.cursor()
+        cur.execute(query)
+        rows = [dict(row) for row in cur.fetchall()]
+    
+    with _leaderboard_cache_lock:
+        _leaderboard_cache[category] = (now, rows)
+    return rows
+
+
+def show_leaderboard(chat_id: int, category: str = "wins", message_id: int = None):
     try:
-        with get_db_connection() as conn:
-            cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
+        players = _fetch_leaderboard_rows(category)
+        
+        if not players:
+            bot.send_message(chat_id, "🏆 No players on leaderboard yet! Be the first to play!")
+            return
+        
+        category_title = {"wins": "Most Wins", "high_score": "Highest Scores"}
+        
+        parts = [f"🏆 <b>Leaderboard - {category_title.get(category, 'Top Players')}</b>\n\n"]
+        
+        for i, player in enumerate(players, 1):
+            name = player["first_name"] or (f"@{player['username']}" if player["username"] else "Anonymous")
             
             if category == "wins":
-                query = """
-                    SELECT u.first_name, u.username, s.wins, s.games_played, s.high_score
-                    FROM stats s JOIN users u ON u.user_id = s.user_id
-                    WHERE s.games_played >= 1
-                    ORDER BY s.wins DESC, s.high_score DESC
-                    LIMIT 10
-                """
+                stat = f"{player['wins']} wins"
             else:
-                query = """
-                    SELECT u.first_name, u.username, s.high_score, s.games_played, s.wins
-                    FROM stats s JOIN users u ON u.user_id = s.user_id
-                    WHERE s.games_played >= 1
-                    ORDER BY s.high_score DESC
-                    LIMIT 10
-                """
-            
-            cur.execute(query)
-            players = cur.fetchall()
-            
-            if not players:
-                bot.send_message(chat_id, "🏆 No players on leaderboard yet! Be the first to play!")
-                return
-            
-            category_title = {"wins": "Most Wins", "high_score": "Highest Scores"}
-            
-            leaderboard_text = f"🏆 <b>Leaderboard - {category_title.get(category, 'Top Players')}</b>\n\n"
-            
-            for i, player in enumerate(players, 1):
-                name = player["first_name"] or (f"@{player['username']}" if player["username"] else "Anonymous")
-                
-                if category == "wins":
-                    stat = f"{player['wins']} wins"
-                else:
-                    stat = f"{player['high_score']} runs"
-                
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                leaderboard_text += f"{medal} {name} - {stat}\n"
-            
-            bot.send_message(chat_id, leaderboard_text)
+                stat = f"{player['high_score']} runs"
             
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            parts.append(f"{medal} {name} - {stat}\n")
+        
+        send_or_edit(chat_id, "".join(parts), message_id, reply_markup=kb_back_to_menu())
+        
     except Exception as e:
         logger.error(f"Error showing leaderboard: {e}")
         bot.send_message(chat_id, "❌ Error loading leaderboard. Please try again.")
 
+# Stats-based achievements: (title, emoji, stats column, threshold, description)
+STAT_ACHIEVEMENTS = (
+    ("First Victory", "🏆", "wins", 1, "Win your first match"),
+    ("Century Maker", "💯", "centuries", 1, "Score 100+ runs"),
+    ("Consistent Player", "🔥", "longest_winning_streak", 5, "Win 5 matches in a row"),
+    ("Big Hitter", "🚀", "sixes_hit", 50, "Hit 50 sixes"),
+    ("Experienced Player", "🎮", "games_played", 10, "Play 10 matches"),
+)
+
+
 def show_achievements(chat_id: int, user_id: int):
     try:
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
-            cur.execute(f"SELECT * FROM stats WHERE user_id={param_style}", (user_id,))
+            cur.execute(f"SELECT * FROM stats WHERE user_id={PARAM_STYLE}", (user_id,))
             stats = cur.fetchone()
         
         achievements_text = f"🏅 <b>Your Achievements</b>\n\n"
@@ -6660,48 +7686,23 @@ def show_achievements(chat_id: int, user_id: int):
         unlocked = []
         locked = []
         
-        # First Victory
-        if stats["wins"] >= 1:
-            unlocked.append("🏆 First Victory - Win your first match")
-        else:
-            locked.append("🔒 First Victory - Win your first match")
-        
-        # Century Maker
-        if stats["centuries"] >= 1:
-            unlocked.append("💯 Century Maker - Score 100+ runs")
-        else:
-            locked.append("🔒 Century Maker - Score 100+ runs")
-            
-        # Consistent Player
-        if stats["longest_winning_streak"] >= 5:
-            unlocked.append("🔥 Consistent Player - Win 5 matches in a row")
-        else:
-            locked.append("🔒 Consistent Player - Win 5 matches in a row")
-            
-        # Big Hitter
-        if stats["sixes_hit"] >= 50:
-            unlocked.append("🚀 Big Hitter - Hit 50 sixes")
-        else:
-            locked.append("🔒 Big Hitter - Hit 50 sixes")
-            
-        # Experience Player
-        if stats["games_played"] >= 10:
-            unlocked.append("🎮 Experienced Player - Play 10 matches")
-        else:
-            locked.append("🔒 Experienced Player - Play 10 matches")
+        for title, emoji, field, threshold, description in STAT_ACHIEVEMENTS:
+            if stats[field] >= threshold:
+                unlocked.append(f"{emoji} {title} - {description}")
+            else:
+                locked.append(f"🔒 {title} - {description}")
         
+        parts = [achievements_text]
         if unlocked:
-            achievements_text += "<b>Unlocked:</b>\n"
-            for achievement in unlocked:
-                achievements_text += f"✅ {achievement}\n"
-            achievements_text += "\n"
+            parts.append("<b>Unlocked:</b>\n")
+            parts.extend(f"✅ {achievement}\n" for achievement in unlocked)
+            parts.append("\n")
 
         if locked:
-            achievements_text += "<b>Locked:</b>\n"
-            for achievement in locked:
-                achievements_text += f"{achievement}\n"
+            parts.append("<b>Locked:</b>\n")
+            parts.extend(f"{achievement}\n" for achievement in locked)
 
-        bot.send_message(chat_id, achievements_text)
+        bot.send_message(chat_id, "".join(parts))
         
     except Exception as e:
         logger.error(f"Error showing achievements: {e}")
@@ -6713,9 +7714,8 @@ def verify_inventory_table():
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 autoincrement = "SERIAL PRIMARY KEY"
                 bigint = "BIGINT"
                 text_type = "TEXT"
@@ -6747,12 +7747,28 @@ def verify_inventory_table():
 def ensure_user(message: types.Message):
     if message.from_user:
         try:
-            logger.info(f"Upserting user {message.from_user.id}")
-            upsert_user(message.from_user)
-            logger.info(f"✓ User {message.from_user.id} upserted")
+            user_upsert_batcher.submit(message.from_user)
         except Exception as e:
             logger.error(f"✗ Failed to upsert user {message.from_user.id}: {e}", exc_info=True)
 
+# The only update kinds with registered handlers. Telegram is asked not to
+# send anything else, and stray updates are acknowledged without parsing
+HANDLED_UPDATE_TYPES = ("message", "callback_query")
+
+# Poll for webhook removal instead of a fixed stall on every cold start
+WEBHOOK_REMOVE_POLL_ATTEMPTS = 20
+WEBHOOK_REMOVE_POLL_INTERVAL = 0.05
+
+def remove_webhook_confirmed():
+    """Remove the webhook and wait until Telegram reports it gone"""
+    bot.remove_webhook()
+    for _ in range(WEBHOOK_REMOVE_POLL_ATTEMPTS):
+        if not bot.get_webhook_info().url:
+            return True
+        time.sleep(WEBHOOK_REMOVE_POLL_INTERVAL)
+    logger.warning("Webhook removal not confirmed, continuing anyway")
+    return False
+
 def setup_webhook():
     """Set up webhook with proper error handling"""
     try:
@@ -6761,8 +7777,7 @@ def setup_webhook():
             return False
         
         # Remove existing webhook
-        bot.remove_webhook()
-        time.sleep(1)
+        remove_webhook_confirmed()
         
         # Construct proper webhook URL
         webhook_url = WEBHOOK_URL.rstrip('/')
@@ -6778,7 +7793,9 @@ def setup_webhook():
                 result = bot.set_webhook(
                     url=webhook_url,
                     max_connections=40,
-                    drop_pending_updates=True
+                    drop_pending_updates=True,
+                    secret_token=WEBHOOK_SECRET or None,
+                    allowed_updates=list(HANDLED_UPDATE_TYPES)
                 )
                 
                 if result:
@@ -6824,17 +7841,7 @@ def cmd_start(message):
             "/powerups - Power-ups shop\n"
             "/help - Show all commands"
         )
-        keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
-        keyboard.add(
-            types.KeyboardButton("📋 Menu"),
-            types.KeyboardButton("🏏 Play")
-        )
-        keyboard.add(
-            types.KeyboardButton("🛒 Shop"),
-            types.KeyboardButton("📊 Stats")
-        )
-        
-        bot.send_message(message.chat.id, welcome_text, reply_markup=keyboard)
+        bot.send_message(message.chat.id, welcome_text, reply_markup=kb_start_reply())
     except Exception as e:
         logger.error(f"Error in start command: {e}")
 
@@ -6846,19 +7853,13 @@ def cmd_play(message):
     try:
         logger.info(f"Received /play from user {message.from_user.id}")
         
+        # Intro and toss buttons in a single API call
         bot.send_message(
             message.chat.id,
             "🏏 Starting a new cricket match!\n\n"
-            "🪙 Time for the toss! Choose heads or tails:"
-        )
-        
-        # Add toss buttons
-        keyboard = types.InlineKeyboardMarkup()
-        keyboard.add(
-            types.InlineKeyboardButton("🪙 Heads", callback_data="toss_heads"),
-            types.InlineKeyboardButton("🪙 Tails", callback_data="toss_tails")
+            "🪙 Time for the toss! Choose heads or tails:",
+            reply_markup=kb_toss_choice()
         )
-        bot.send_message(message.chat.id, "Make your choice:", reply_markup=keyboard)
         
     except Exception as e:
         logger.error(f"Error in /play handler: {e}", exc_info=True)
@@ -6971,7 +7972,6 @@ def cmd_commands(message):
         logger.error(f"Error in /commands handler: {e}")
 
 
-@bot.message_handler(func=lambda msg: msg.text and "📊" in msg.text)
 def cmd_stats(message):
     """Handle stats button"""
     try:
@@ -6981,15 +7981,6 @@ def cmd_stats(message):
         logger.error(f"Error handling stats button: {e}")
         bot.send_message(message.chat.id, "❌ Error loading stats.")
 
-@bot.message_handler(commands=["leaderboard"])
-def cmd_leaderboard(message: types.Message):
-    try:
-        ensure_user(message)
-        show_leaderboard(message.chat.id)
-    except Exception as e:
-        logger.error(f"Error in leaderboard command: {e}")
-        bot.send_message(message.chat.id, "❌ Error loading leaderboard.")
-
 @bot.message_handler(commands=["score"])
 def cmd_score(message: types.Message):
     try:
@@ -7003,12 +7994,16 @@ def cmd_score(message: types.Message):
         logger.error(f"Error in score command: {e}")
         bot.send_message(message.chat.id, "❌ Error loading score.")
 
-@bot.message_handler(func=lambda message: message.text and message.text.isdigit() and 1 <= int(message.text) <= 6)
+# Ball inputs from the 1-6 reply keyboard, mapped straight to their value
+_DIGIT_VALUES = {"1": 1, "2": 2, "3": 3, "4": 4, "5": 5, "6": 6}
+
+
+@bot.message_handler(func=lambda message: message.text in _DIGIT_VALUES)
 def handle_game_input(message):
     """Handle game input (1-6) - UPDATED FOR NEW BALL PROCESSING"""
     try:
         ensure_user(message)
-        number = int(message.text)
+        number = _DIGIT_VALUES[message.text]
         chat_id = message.chat.id
         user_id = message.from_user.id
         lock = get_game_lock(chat_id)
@@ -7027,35 +8022,31 @@ def handle_game_input(message):
             bot.reply_to(message, "Unexpected error")
             return
         
-        # Send commentary
         commentary = result.get('commentary', '')
-        if commentary:
-            bot.send_message(chat_id, commentary)
-        
-        # Check if innings changed (first innings ended)
-        if result.get('innings_changed'):
-            # Message already sent in enhanced_process_ball_v2
-            return
         
-        # Check if match ended
-        if result.get('match_ended'):
-            # Match summary already sent in enhanced_process_ball_v2
+        # Innings change / match end messages are already sent in
+        # enhanced_process_ball_v2, so only the commentary goes out here
+        if result.get('innings_changed') or result.get('match_ended'):
+            if commentary:
+                send_async(chat_id, commentary)
             return
         
-        # Over completed - notify
+        # Commentary, over notice and compact score go out as one message
+        parts = [commentary] if commentary else []
         if result.get('over_completed'):
-            bot.send_message(chat_id, "⚪ <b>Over Complete!</b>", parse_mode="HTML")
+            parts.append("⚪ <b>Over Complete!</b>")
         
-        # Show updated live score
         game_state = result.get('game_state', {})
         if game_state:
-            show_live_score(chat_id, game_state, detailed=False)
+            parts.append(render_live_score(game_state, detailed=False))
+            send_async(chat_id, "\n\n".join(parts), reply_markup=kb_match_actions())
+        elif parts:
+            send_async(chat_id, "\n\n".join(parts))
     
     except Exception as e:
         logger.error(f"Error in game input handler: {e}", exc_info=True)
         bot.reply_to(message, f"❌ Error: {str(e)}")
 
-@bot.message_handler(func=lambda message: message.text and "📊" in message.text)
 def handle_score_request(message: types.Message):
     try:
         ensure_user(message)
@@ -7068,7 +8059,6 @@ def handle_score_request(message: types.Message):
         logger.error(f"Error handling score request: {e}")
         bot.send_message(message.chat.id, "❌ Error loading score.")
 
-@bot.message_handler(func=lambda message: message.text and "🏳️" in message.text)
 def handle_forfeit_request(message: types.Message):
     try:
         ensure_user(message)
@@ -7139,9 +8129,8 @@ def cmd_add_coins(message):
         
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute(
                     "UPDATE users SET coins = coins + %s WHERE user_id = %s",
                     (amount, user_id)
@@ -7151,6 +8140,7 @@ def cmd_add_coins(message):
                     "UPDATE users SET coins = coins + ? WHERE user_id = ?",
                     (amount, user_id)
                 )
+        _coins_cache.invalidate(user_id)
         
         success_msg = (
             f"✅ <b>Coins Added</b>\n\n"
@@ -7168,275 +8158,333 @@ def cmd_add_coins(message):
 
 
 # Callback handlers
-@bot.callback_query_handler(func=lambda call: True)
-def handle_callback(call):
-    try:
-        logger.info(f"Received callback: {call.data} from user {call.from_user.id}")
+_SHOP_HEADER = "🛒 <b>POWER-UPS SHOP</b>\n"
+
+
+# Callback handlers: each takes (call, chat_id, user_id)
+
+def _cb_info_powerup(call, chat_id, user_id):
+    powerup_id = call.data.replace('info_powerup_', '')
+    
+    if powerup_id not in PowerUp.POWERUPS:
+        bot.answer_callback_query(call.id, "Power-up not found")
+        return
+    
+    powerup = PowerUp.POWERUPS[powerup_id]
+    user_coins = _get_user_coins(user_id)
+    can_afford = user_coins >= powerup['cost']
+    
+    info_text = (
+        f"<b>{powerup['name']}</b>\n\n"
+        f"📝 {powerup['description']}\n\n"
+        f"⏱️ Duration: {powerup['duration']} over(s)\n"
+        f"💰 Cost: {powerup['cost']} coins\n\n"
+        f"🎯 Effect: {powerup['effect']['type'].replace('_', ' ').title()}\n"
+        f"Boost: +{int(powerup['effect']['value'] * 100)}%\n\n"
+    )
+    
+    if can_afford:
+        info_text += f"✅ You have {user_coins} coins\nYou can purchase this!"
+    else:
+        info_text += f"🔒 You have {user_coins} coins\nNeed {powerup['cost'] - user_coins} more"
+    
+    send_async(chat_id, info_text, parse_mode="HTML")
+    bot.answer_callback_query(call.id)
+
+
+def _cb_buy_powerup(call, chat_id, user_id):
+    powerup_id = call.data.replace('buy_powerup_', '')
+    result = handle_powerup_purchase(user_id, powerup_id)
+    
+    bot.answer_callback_query(call.id, result['message'], show_alert=True)
+    
+    if result['success']:
+        # Refresh shop display
+        user_coins = _get_user_coins(user_id)
+        shop_text = "".join([
+            _SHOP_HEADER,
+            f"💰 Your Balance: <b>{user_coins} coins</b>\n\n",
+            *(("✅" if user_coins >= cost else "🔒") + row for cost, row in _POWERUP_SHOP_ROWS),
+        ])
         
-        data = call.data
-        chat_id = call.message.chat.id
-        user_id = call.from_user.id
+        bot.edit_message_text(
+            shop_text,
+            chat_id,
+            call.message.message_id,
+            parse_mode="HTML",
+            reply_markup=kb_powerups_shop()
+        )
+
+
+def _cb_toss(call, chat_id, user_id):
+    choice = call.data.split("_")[1]
+    bot.answer_callback_query(call.id, f"You chose {choice}!")
+    handle_toss_result(chat_id, choice, user_id)
+
+
+def _cb_bat_bowl(call, chat_id, user_id):
+    choice = "player" if call.data == "choose_bat" else "bot"
+    bot.answer_callback_query(call.id, "Starting match...")
+    safe_set_batting_order(chat_id, choice)
+
+
+def _cb_quick_play(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Starting quick play...")
+    safe_start_new_game(chat_id, user_id=user_id)
+
+
+# Buttons under messages that must stay in the chat (match results) use this
+# suffix; the menus they open are sent as new messages instead of edits
+NEW_MESSAGE_SUFFIX = "_new"
+
+
+def _menu_message_id(call):
+    """Id of the tapped message if a menu may replace it, else None"""
+    return None if call.data.endswith(NEW_MESSAGE_SUFFIX) else call.message.message_id
+
+
+def _cb_custom_match(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Custom match...")
+    send_or_edit(chat_id, "Choose difficulty:", _menu_message_id(call), reply_markup=kb_difficulty_select())
+
+
+def _cb_my_stats(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Loading stats...")
+    show_user_stats(chat_id, user_id)
+
+
+def _cb_leaderboard(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Loading leaderboard...")
+    show_leaderboard(chat_id, message_id=_menu_message_id(call))
+
+
+def _cb_difficulty(call, chat_id, user_id):
+    difficulty = call.data.split("_")[1]
+    bot.answer_callback_query(call.id, f"Selected {difficulty} difficulty")
+    send_async(chat_id, "Choose format:", reply_markup=kb_format_select())
+    set_user_session_data(user_id, "selected_difficulty", difficulty)
+
+
+def _cb_format(call, chat_id, user_id):
+    parts = call.data.split("_")
+    if len(parts) >= 3:
+        overs = int(parts[1])
+        wickets = int(parts[2])
+        difficulty = get_user_session_data(user_id, "selected_difficulty", "medium")
+        bot.answer_callback_query(call.id, f"Starting T{overs} match...")
+        safe_start_new_game(chat_id, overs, wickets, difficulty, user_id)
+
+
+def _cb_play_again(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Starting new match...")
+    safe_start_new_game(chat_id, user_id=user_id)
+
+
+def _cb_match_summary(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Loading summary...")
+
+
+def _cb_forfeit_yes(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Match forfeited")
+    delete_game(chat_id)
+    send_async(chat_id, "Match forfeited. Use /play for a new match.")
+
+
+def _cb_forfeit_no(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Continuing match...")
+    g = safe_load_game(chat_id)
+    if g:
+        # Turn the forfeit prompt into the score card rather than adding a message
+        send_or_edit(chat_id, render_live_score(g), call.message.message_id,
+                     reply_markup=kb_match_actions())
+
+
+def _cb_live_score(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Current score...")
+    g = safe_load_game(chat_id)
+    if g:
+        show_live_score(chat_id, g)
+    else:
+        send_async(chat_id, "No active match found.")
+
+
+def _cb_tournaments(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Loading tournaments...")
+    handle_tournament_menu(chat_id, user_id, _menu_message_id(call))
+
+
+def _cb_challenges(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Loading challenges...")
+    show_challenges_menu(chat_id, user_id, _menu_message_id(call))
+
+
+def _cb_main_menu(call, chat_id, user_id):
+    bot.answer_callback_query(call.id, "Main menu")
+    welcome_text = f"🏏 Welcome back! What would you like to do?"
+    send_or_edit(chat_id, welcome_text, _menu_message_id(call), reply_markup=kb_main_menu())
+
+
+def _cb_tournament_menu(call, chat_id, user_id):
+    handle_tournament_menu(chat_id, user_id, call.message.message_id)
+    bot.answer_callback_query(call.id)
+
+
+def _cb_tournament_create(call, chat_id, user_id):
+    handle_create_tournament(chat_id, user_id)
+    bot.answer_callback_query(call.id)
+
+
+def _cb_tournament_format(call, chat_id, user_id):
+    handle_tournament_type_selection(chat_id, user_id, call.data)
+    bot.answer_callback_query(call.id)
+
+
+def _cb_tournament_type(call, chat_id, user_id):
+    tournament_type = call.data.split("_")[1]
+    handle_tournament_theme_selection(chat_id, user_id, tournament_type)
+    bot.answer_callback_query(call.id)
+
+
+def _cb_tournament_theme(call, chat_id, user_id):
+    theme = call.data.split("_")[1]
+    finalize_tournament_creation(chat_id, user_id, theme)
+    bot.answer_callback_query(call.id)
+
+
+def _cb_tournament_view(call, chat_id, user_id):
+    tournament_id = call.data.split("_")[2]
+    show_tournament_participants(chat_id, tournament_id)
+    bot.answer_callback_query(call.id)
+
+
+def _cb_join_tournament(call, chat_id, user_id):
+    tournament_id = call.data.split("_")[2]
+    username = call.from_user.first_name or call.from_user.username
+    
+    try:
+        result = join_tournament_atomic(tournament_id, user_id, username)
         
-        # Power-up info handler - ADD THIS
-        if data.startswith('info_powerup_'):
-            powerup_id = data.replace('info_powerup_', '')
-            
-            if powerup_id not in PowerUp.POWERUPS:
-                bot.answer_callback_query(call.id, "Power-up not found")
-                return
-            
-            powerup = PowerUp.POWERUPS[powerup_id]
-            user_coins = _get_user_coins(user_id)
-            can_afford = user_coins >= powerup['cost']
-            
-            info_text = (
-                f"<b>{powerup['name']}</b>\n\n"
-                f"📝 {powerup['description']}\n\n"
-                f"⏱️ Duration: {powerup['duration']} over(s)\n"
-                f"💰 Cost: {powerup['cost']} coins\n\n"
-                f"🎯 Effect: {powerup['effect']['type'].replace('_', ' ').title()}\n"
-                f"Boost: +{int(powerup['effect']['value'] * 100)}%\n\n"
+        if result['success']:
+            success_msg = (
+                f"✅ {result['message']}\n\n"
+                f"Participants: {result['participants']}\n\n"
+                f"Waiting for tournament to start..."
             )
             
-            if can_afford:
-                info_text += f"✅ You have {user_coins} coins\nYou can purchase this!"
-            else:
-                info_text += f"🔒 You have {user_coins} coins\nNeed {powerup['cost'] - user_coins} more"
-            
-            bot.send_message(chat_id, info_text, parse_mode="HTML")
-            bot.answer_callback_query(call.id)
-            return
-        
-        # Power-up purchase handler - ADD THIS
-        if data.startswith('buy_powerup_'):
-            powerup_id = data.replace('buy_powerup_', '')
-            result = handle_powerup_purchase(user_id, powerup_id)
-            
-            bot.answer_callback_query(call.id, result['message'], show_alert=True)
-            
-            if result['success']:
-                # Refresh shop display
-                user_coins = _get_user_coins(user_id)
-                shop_text = (
-                    "🛒 <b>POWER-UPS SHOP</b>\n"
-                    f"💰 Your Balance: <b>{user_coins} coins</b>\n\n"
-                )
-                
-                for pid, powerup in PowerUp.POWERUPS.items():
-                    cost = powerup['cost']
-                    can_afford = user_coins >= cost
-                    status = "✅" if can_afford else "🔒"
-                    
-                    shop_text += (
-                        f"{status} <b>{powerup['name']}</b>\n"
-                        f"   {powerup['description']}\n"
-                        f"   💰 {cost} coins\n\n"
-                    )
-                
-                bot.edit_message_text(
-                    shop_text,
-                    chat_id,
-                    call.message.message_id,
-                    parse_mode="HTML",
-                    reply_markup=kb_powerups_shop()
-                )
-            return
-        
-        # Toss handlers
-        if data in ["toss_heads", "toss_tails"]:
-            choice = data.split("_")[1]
-            bot.answer_callback_query(call.id, f"You chose {choice}!")
-            handle_toss_result(chat_id, choice, user_id)
-            return
-            
-        # Bat/Bowl choice
-        elif data in ["choose_bat", "choose_bowl"]:
-            choice = "player" if data == "choose_bat" else "bot"
-            bot.answer_callback_query(call.id, "Starting match...")
-            safe_set_batting_order(chat_id, choice)
-            return
-            
-        # Main menu handlers
-        elif data == "quick_play":
-            bot.answer_callback_query(call.id, "Starting quick play...")
-            safe_start_new_game(chat_id, user_id=user_id)
-            return
-            
-        elif data == "custom_match":
-            bot.answer_callback_query(call.id, "Custom match...")
-            bot.send_message(chat_id, "Choose difficulty:", reply_markup=kb_difficulty_select())
-            return
-            
-        elif data == "my_stats":
-            bot.answer_callback_query(call.id, "Loading stats...")
-            show_user_stats(chat_id, user_id)
-            return
-            
-        elif data == "leaderboard":
-            bot.answer_callback_query(call.id, "Loading leaderboard...")
-            show_leaderboard(chat_id)
-            return
-        
-        # Difficulty selection
-        elif data.startswith("diff_"):
-            difficulty = data.split("_")[1]
-            bot.answer_callback_query(call.id, f"Selected {difficulty} difficulty")
-            bot.send_message(chat_id, "Choose format:", reply_markup=kb_format_select())
-            set_user_session_data(user_id, "selected_difficulty", difficulty)
-            return
-            
-        # Format selection  
-        elif data.startswith("format_"):
-            parts = data.split("_")
-            if len(parts) >= 3:
-                overs = int(parts[1])
-                wickets = int(parts[2])
-                difficulty = get_user_session_data(user_id, "selected_difficulty", "medium")
-                bot.answer_callback_query(call.id, f"Starting T{overs} match...")
-                safe_start_new_game(chat_id, overs, wickets, difficulty, user_id)
-            return
-            
-        # Post-match actions
-        elif data == "play_again":
-            bot.answer_callback_query(call.id, "Starting new match...")
-            safe_start_new_game(chat_id, user_id=user_id)
-            return
-            
-        elif data == "match_summary":
-            bot.answer_callback_query(call.id, "Loading summary...")
-            return
-            
-        elif data == "forfeit_yes":
-            bot.answer_callback_query(call.id, "Match forfeited")
-            delete_game(chat_id)
-            bot.send_message(chat_id, "Match forfeited. Use /play for a new match.")
-            return
-            
-        elif data == "forfeit_no":
-            bot.answer_callback_query(call.id, "Continuing match...")
-            g = safe_load_game(chat_id)
-            if g:
-                show_live_score(chat_id, g)
-            return
-                
-        # Live score
-        elif data == "live_score":
-            bot.answer_callback_query(call.id, "Current score...")
-            g = safe_load_game(chat_id)
-            if g:
-                show_live_score(chat_id, g)
-            else:
-                bot.send_message(chat_id, "No active match found.")
-            return
-                
-        # Tournament handlers
-        elif data == "tournaments":
-            bot.answer_callback_query(call.id, "Loading tournaments...")
-            handle_tournament_menu(chat_id, user_id)
-            return
-            
-        elif data == "challenges":
-            bot.answer_callback_query(call.id, "Loading challenges...")
-            show_challenges_menu(chat_id, user_id)
-            return
+            kb = types.InlineKeyboardMarkup(row_width=1)
+            kb.add(
+                types.InlineKeyboardButton("👥 View Participants", callback_data=f"tourn_view_{tournament_id}"),
+                types.InlineKeyboardButton("🔙 Back", callback_data="tournament_menu")
+            )
             
-        # Back to main menu
-        elif data in ["main_menu", "back_main"]:
-            bot.answer_callback_query(call.id, "Main menu")
-            welcome_text = f"🏏 Welcome back! What would you like to do?"
-            bot.send_message(chat_id, welcome_text, reply_markup=kb_main_menu())
-            return
-        
-        elif data == "tournament_menu":
-            handle_tournament_menu(chat_id, user_id)
-            bot.answer_callback_query(call.id)
-            return
+            send_async(chat_id, success_msg, reply_markup=kb)
+            bot.answer_callback_query(call.id, "Joined successfully!", show_alert=False)
+        else:
+            bot.answer_callback_query(call.id, f"Join failed: {result['message']}", show_alert=True)
+    
+    except Exception as e:
+        logger.error(f"Error joining tournament: {e}")
+        bot.answer_callback_query(call.id, "Error joining tournament", show_alert=True)
+
+
+# Exact callback_data -> handler
+CALLBACK_HANDLERS = {
+    "toss_heads": _cb_toss,
+    "toss_tails": _cb_toss,
+    "choose_bat": _cb_bat_bowl,
+    "choose_bowl": _cb_bat_bowl,
+    "quick_play": _cb_quick_play,
+    "custom_match": _cb_custom_match,
+    "my_stats": _cb_my_stats,
+    "leaderboard": _cb_leaderboard,
+    "play_again": _cb_play_again,
+    "match_summary": _cb_match_summary,
+    "forfeit_yes": _cb_forfeit_yes,
+    "forfeit_no": _cb_forfeit_no,
+    "live_score": _cb_live_score,
+    "tournaments": _cb_tournaments,
+    "tournaments_new": _cb_tournaments,
+    "challenges": _cb_challenges,
+    "challenges_new": _cb_challenges,
+    "main_menu": _cb_main_menu,
+    "main_menu_new": _cb_main_menu,
+    "back_main": _cb_main_menu,
+    "tournament_menu": _cb_tournament_menu,
+    "tournament_create": _cb_tournament_create,
+}
 
-        elif data == "tournament_create":
-            handle_create_tournament(chat_id, user_id)
-            bot.answer_callback_query(call.id)
-            return
+# Prefix -> handler, looked up by the first one or two "_"-separated tokens
+# after an exact-match miss
+CALLBACK_PREFIX_HANDLERS = {
+    "info_powerup_": _cb_info_powerup,
+    "buy_powerup_": _cb_buy_powerup,
+    "diff_": _cb_difficulty,
+    "format_": _cb_format,
+    "fmt_": _cb_tournament_format,
+    "type_": _cb_tournament_type,
+    "theme_": _cb_tournament_theme,
+    "tourn_view_": _cb_tournament_view,
+    "join_tourn_": _cb_join_tournament,
+}
+CALLBACK_PREFIXES = tuple(CALLBACK_PREFIX_HANDLERS)
+
+
+def callback_route(data: str = None, prefix: str = None):
+    """Add a handle_*(call) function to the callback tables.
+    
+    handle_callback is the only callback handler registered with telebot, so
+    routing is one dict lookup instead of evaluating every handler's filter.
+    The first route registered for a key wins, as telebot's first match did.
+    """
+    def decorator(func):
+        def route(call, chat_id, user_id):
+            return func(call)
+        
+        global CALLBACK_PREFIXES
+        if data is not None:
+            CALLBACK_HANDLERS.setdefault(data, route)
+        if prefix is not None:
+            CALLBACK_PREFIX_HANDLERS.setdefault(prefix, route)
+            CALLBACK_PREFIXES = tuple(CALLBACK_PREFIX_HANDLERS)
+        return func
+    return decorator
 
-        elif data.startswith("fmt_"):
-            format_key = data
-            handle_tournament_type_selection(chat_id, user_id, format_key)
-            bot.answer_callback_query(call.id)
-            return
 
-        elif data.startswith("type_"):
-            tournament_type = data.split("_")[1]
-            handle_tournament_theme_selection(chat_id, user_id, tournament_type)
-            bot.answer_callback_query(call.id)
-            return
+def _find_callback_handler(data: str):
+    handler = CALLBACK_HANDLERS.get(data)
+    if handler is None and data.startswith(CALLBACK_PREFIXES):
+        tokens = data.split("_", 2)
+        handler = CALLBACK_PREFIX_HANDLERS.get(tokens[0] + "_")
+        if handler is None and len(tokens) > 2:
+            handler = CALLBACK_PREFIX_HANDLERS.get(f"{tokens[0]}_{tokens[1]}_")
+    return handler
 
-        elif data.startswith("theme_"):
-            theme = data.split("_")[1]
-            finalize_tournament_creation(chat_id, user_id, theme)
-            bot.answer_callback_query(call.id)
-            return
 
-        elif data.startswith("tourn_view_"):
-            tournament_id = data.split("_")[2]
-            show_tournament_participants(chat_id, tournament_id)
+@bot.callback_query_handler(func=lambda call: True)
+def handle_callback(call):
+    try:
+        data = call.data
+        user_id = call.from_user.id
+        logger.info(f"Received callback: {data} from user {user_id}")
+        
+        # Buttons on inline-mode messages carry no message (and no chat)
+        message = call.message
+        if message is None:
             bot.answer_callback_query(call.id)
             return
-
-        elif data.startswith("join_tourn_"):
-            tournament_id = data.split("_")[2]
-            username = call.from_user.first_name or call.from_user.username
-            
-            try:
-                tournament = load_tournament_from_db(tournament_id)
-                
-                if not tournament:
-                    bot.answer_callback_query(call.id, "Tournament not found", show_alert=True)
-                    return
-                
-                if len(tournament.participants) >= 16:
-                    bot.answer_callback_query(call.id, "Tournament is full", show_alert=True)
-                    return
-                
-                if any(p['user_id'] == user_id for p in tournament.participants):
-                    bot.answer_callback_query(call.id, "Already registered", show_alert=True)
-                    return
-                
-                result = tournament.add_participant(user_id, username)
-                
-                if result['success']:
-                    save_tournament_to_db(tournament, chat_id)
-                    
-                    success_msg = (
-                        f"✅ {result['message']}\n\n"
-                        f"Participants: {result['participants']}\n\n"
-                        f"Waiting for tournament to start..."
-                    )
-                    
-                    kb = types.InlineKeyboardMarkup(row_width=1)
-                    kb.add(
-                        types.InlineKeyboardButton("👥 View Participants", callback_data=f"tourn_view_{tournament_id}"),
-                        types.InlineKeyboardButton("🔙 Back", callback_data="tournament_menu")
-                    )
-                    
-                    bot.send_message(chat_id, success_msg, reply_markup=kb)
-                    bot.answer_callback_query(call.id, "Joined successfully!", show_alert=False)
-                else:
-                    bot.answer_callback_query(call.id, f"Join failed: {result['message']}", show_alert=True)
-            
-            except Exception as e:
-                logger.error(f"Error joining tournament: {e}")
-                bot.answer_callback_query(call.id, "Error joining tournament", show_alert=True)
-            return
-            
-        else:
-            # Log unhandled callbacks
+        
+        handler = _find_callback_handler(data)
+        if handler is None:
             logger.warning(f"Unhandled callback: {data}")
             bot.answer_callback_query(call.id, "Feature coming soon!")
+            return
+        handler(call, message.chat.id, user_id)
             
     except Exception as e:
         logger.error(f"Error in callback handler: {e}", exc_info=True)
         bot.answer_callback_query(call.id, "An error occurred")
 
-@bot.callback_query_handler(func=lambda call: call.data == 'shop_menu')
+@callback_route('shop_menu')
 @rate_limit_check('callback')
 def handle_shop_menu_main(call):
     """Handle shop menu from main menu"""
@@ -7448,7 +8496,18 @@ def handle_shop_menu_main(call):
         bot.answer_callback_query(call.id, "Error opening shop")
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('lb_'))
+_LB_CATEGORY_MAP = {
+    'highest_score': 'highest_score',
+    'most_wins': 'most_wins',
+    'win_streak': 'win_streak',
+    'most_sixes': 'most_sixes',
+    'best_strike_rate': 'best_strike_rate',
+    'tournament_wins': 'tournament_wins',
+    'total_xp': 'total_xp'
+}
+
+
+@callback_route(prefix='lb_')
 @rate_limit_check('callback')
 def handle_leaderboard_callback(call):
     """Handle leaderboard selection - FIXED"""
@@ -7456,17 +8515,7 @@ def handle_leaderboard_callback(call):
         category = call.data.replace('lb_', '')
         
         # Map callback data to actual database categories
-        category_map = {
-            'highest_score': 'highest_score',
-            'most_wins': 'most_wins', 
-            'win_streak': 'win_streak',
-            'most_sixes': 'most_sixes',
-            'best_strike_rate': 'best_strike_rate',
-            'tournament_wins': 'tournament_wins',
-            'total_xp': 'total_xp'
-        }
-        
-        actual_category = category_map.get(category, category)
+        actual_category = _LB_CATEGORY_MAP.get(category, category)
         
         # Get leaderboard data
         top_players = get_leaderboard(actual_category, limit=10)
@@ -7489,27 +8538,22 @@ def handle_leaderboard_callback(call):
         bot.answer_callback_query(call.id, "Error loading leaderboard")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'tournament_list')
+@callback_route('tournament_list')
 def handle_tournament_list(call):
     show_all_tournaments(call.message.chat.id)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'tournament_rankings')
+@callback_route('tournament_rankings')
 def handle_tournament_rankings(call):
     show_tournament_rankings(call.message.chat.id)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'tournament_history')
+@callback_route('tournament_history')
 def handle_tournament_history(call):
     show_user_tournament_history(call.message.chat.id, call.from_user.id)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data == 'challenges_view')
-def handle_challenges_view_callback(call):
-    show_daily_challenges(call.message.chat.id, call.from_user.id)
-    bot.answer_callback_query(call.id)
-
-@bot.callback_query_handler(func=lambda call: call.data == 'challenges_claim')
+@callback_route('challenges_claim')
 def handle_challenges_claim_callback(call):
     """Claim challenge rewards - WORKING VERSION"""
     try:
@@ -7519,7 +8563,7 @@ def handle_challenges_claim_callback(call):
         logger.error(f"Error: {e}")
         bot.answer_callback_query(call.id, "Error claiming rewards")
 
-@bot.callback_query_handler(func=lambda call: call.data == 'challenges_history')
+@callback_route('challenges_history')
 def handle_challenges_history_callback(call):
     """Show challenge history - WORKING VERSION"""
     try:
@@ -7530,94 +8574,61 @@ def handle_challenges_history_callback(call):
         bot.answer_callback_query(call.id, "Error loading history")
 
 
-@bot.callback_query_handler(func=lambda call: call.data in ["toss_heads", "toss_tails"])
-@rate_limit_check('callback')
-def handle_toss_callback(call):
-    """Handle toss selection"""
-    try:
-        user_id = call.from_user.id
-        chat_id = call.message.chat.id
-        choice = call.data.split("_")[1]
-        
-        bot.answer_callback_query(call.id, f"You chose {choice}!")
-        handle_toss_result(chat_id, choice, user_id)
-        
-    except Exception as e:
-        logger.error(f"Error in toss callback: {e}")
-        bot.answer_callback_query(call.id, "Error processing toss")
-
-@bot.message_handler(func=lambda msg: msg.text and "🏏" in msg.text)
 def handle_play_button(message):
     """Handle Play button from /start"""
     cmd_play(message)
 
 
-@bot.message_handler(commands=['coins'])
-@rate_limit_check('command')
-def cmd_coins(message):
-    """Check coin balance"""
+SQL_COIN_PROFILE = f"""
+    SELECT u.coins, l.level
+    FROM users u LEFT JOIN user_levels l ON l.user_id = u.user_id
+    WHERE u.user_id = {PARAM_STYLE}
+"""
+
+COINS_TEXT_TEMPLATE = (
+    "💰 <b>YOUR COINS</b>\n\n"
+    "Balance: <b>{coins}</b> coins\n"
+    "Level: {level}\n\n"
+    "<b>Earn Coins:</b>\n"
+    "• Win matches: 50 coins\n"
+    "• Complete daily challenges\n"
+    "• Level up rewards\n"
+    "• Tournament prizes\n\n"
+    "<b>Spend Coins:</b>\n"
+    "Use /powerups to buy power-ups!"
+)
+
+
+def _get_user_coin_profile(user_id: int) -> tuple:
+    """Return (coins, level) for a user in a single query"""
     try:
-        user_id = message.from_user.id
-        coins = _get_user_coins(user_id)
-        
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
-            
-            # Get level for bonus info
-            cur.execute(f"SELECT level FROM user_levels WHERE user_id = {param_style}", (user_id,))
-            level_row = cur.fetchone()
-            level = level_row['level'] if level_row else 1
-        
-        coins_text = (
-            f"💰 <b>YOUR COINS</b>\n\n"
-            f"Balance: <b>{coins}</b> coins\n"
-            f"Level: {level}\n\n"
-            f"<b>Earn Coins:</b>\n"
-            f"• Win matches: 50 coins\n"
-            f"• Complete daily challenges\n"
-            f"• Level up rewards\n"
-            f"• Tournament prizes\n\n"
-            f"<b>Spend Coins:</b>\n"
-            f"Use /powerups to buy power-ups!"
-        )
-        
-        bot.send_message(message.chat.id, coins_text)
+            execute_prepared(cur, "coin_profile_stmt", SQL_COIN_PROFILE, (user_id,))
+            row = cur.fetchone()
         
+        if not row:
+            return 0, 1
+        return row["coins"], row["level"] or 1
     except Exception as e:
-        logger.error(f"Error in coins command: {e}")
+        logger.error(f"Error getting coin profile: {e}")
+        return 0, 1
 
 
-@bot.callback_query_handler(func=lambda call: call.data in ["choose_bat", "choose_bowl"])
-@rate_limit_check('callback')
-def handle_bat_bowl_callback(call):
-    """Handle bat/bowl choice after winning toss"""
+@bot.message_handler(commands=['coins'])
+@rate_limit_check('command')
+def cmd_coins(message):
+    """Check coin balance"""
     try:
-        chat_id = call.message.chat.id
-        choice = "player" if call.data == "choose_bat" else "bot"
+        coins, level = _get_user_coin_profile(message.from_user.id)
         
-        bot.answer_callback_query(call.id, "Starting match...")
-        safe_set_batting_order(chat_id, choice)
+        bot.send_message(message.chat.id, COINS_TEXT_TEMPLATE.format(coins=coins, level=level))
         
     except Exception as e:
-        logger.error(f"Error in bat/bowl callback: {e}")
-        bot.answer_callback_query(call.id, "Error starting match")
-
-
-@bot.callback_query_handler(func=lambda call: call.data == 'shop_menu')
-@rate_limit_check('callback')
-def handle_shop_menu_callback(call):
-    """Show shop from main menu"""
-    try:
-        send_shop_menu(call.message.chat.id, call.from_user.id)
-        bot.answer_callback_query(call.id, "🛒 Opening shop...")
-    except Exception as e:
-        logger.error(f"Error opening shop: {e}")
-        bot.answer_callback_query(call.id, "Error opening shop")
+        logger.error(f"Error in coins command: {e}")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'my_profile')
+@callback_route('my_profile')
 @rate_limit_check('callback')
 def handle_profile_callback(call):
     """Show user profile"""
@@ -7629,7 +8640,7 @@ def handle_profile_callback(call):
         bot.answer_callback_query(call.id, "Error loading profile")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'achievements')
+@callback_route('achievements')
 @rate_limit_check('callback')
 def handle_achievements_callback(call):
     """Show achievements"""
@@ -7643,7 +8654,7 @@ def handle_achievements_callback(call):
         bot.answer_callback_query(call.id, "Error loading achievements")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'powerups_menu')
+@callback_route('powerups_menu')
 @rate_limit_check('callback')
 def handle_powerups_menu_callback(call):
     """Show powerups from main menu"""
@@ -7656,16 +8667,10 @@ def handle_powerups_menu_callback(call):
             f"💰 Your Balance: <b>{user_coins} coins</b>\n\n"
         )
         
-        for powerup_id, powerup in PowerUp.POWERUPS.items():
-            cost = powerup['cost']
-            status = "✅" if user_coins >= cost else "🔒"
-            
-            shop_text += (
-                f"{status} <b>{powerup['name']}</b>\n"
-                f"   {powerup['description']}\n"
-                f"   ⏱️ Duration: {powerup['duration']} over(s)\n"
-                f"   💰 Cost: {cost} coins\n\n"
-            )
+        shop_text += "".join(
+            ("✅" if user_coins >= cost else "🔒") + row + "\n\n"
+            for cost, row in _POWERUP_DETAIL_ROWS
+        )
         
         bot.edit_message_text(
             shop_text,
@@ -7680,46 +8685,7 @@ def handle_powerups_menu_callback(call):
 
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('buy_powerup_'))
-@rate_limit_check('callback')
-def handle_powerup_purchase_callback(call):
-    """Handle power-up purchase"""
-    try:
-        powerup_id = call.data.replace('buy_powerup_', '')
-        result = handle_powerup_purchase(call.from_user.id, powerup_id)
-        
-        bot.answer_callback_query(call.id, result['message'], show_alert=True)
-        
-        if result['success']:
-            # Refresh shop display
-            shop_text = (
-                "🛒 POWER-UPS SHOP\n\n"
-                "Purchase power-ups to gain advantages in matches!\n"
-                "Use them before starting a match.\n\n"
-            )
-            
-            for pid, powerup in PowerUp.POWERUPS.items():
-                shop_text += (
-                    f"{powerup['name']}\n"
-                    f"  {powerup['description']}\n"
-                    f"  Duration: {powerup['duration']} over(s) | Cost: {powerup['cost']} coins\n\n"
-                )
-            
-            user_coins = _get_user_coins(call.from_user.id)
-            shop_text += f"💰 Your coins: {user_coins}"
-            
-            bot.edit_message_text(
-                shop_text,
-                call.message.chat.id,
-                call.message.message_id,
-                reply_markup=kb_powerups_shop()
-            )
-    except Exception as e:
-        logger.error(f"Error in powerup purchase callback: {e}")
-        bot.answer_callback_query(call.id, "Purchase failed")
-
-
-@bot.callback_query_handler(func=lambda call: call.data == 'view_scorecard')
+@callback_route('view_scorecard')
 @rate_limit_check('callback')
 def handle_scorecard_view(call):
     """Show detailed scorecard"""
@@ -7734,7 +8700,7 @@ def handle_scorecard_view(call):
         bot.answer_callback_query(call.id, "Error loading scorecard")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'challenges_view')
+@callback_route('challenges_view')
 @rate_limit_check('callback')
 def handle_challenges_view(call):
     """Show daily challenges - WORKING VERSION"""
@@ -7746,7 +8712,7 @@ def handle_challenges_view(call):
         bot.answer_callback_query(call.id, "Error loading challenges")
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('item_detail_'))
+@callback_route(prefix='item_detail_')
 @rate_limit_check('callback')
 def handle_item_detail(call):
     """Show item details"""
@@ -7760,7 +8726,7 @@ def handle_item_detail(call):
 
 
 # Add callback for purchasing items
-@bot.callback_query_handler(func=lambda call: call.data.startswith('buy_item_'))
+@callback_route(prefix='buy_item_')
 @rate_limit_check('callback')
 def handle_item_purchase(call):
     """Handle item purchase"""
@@ -7785,9 +8751,8 @@ def handle_item_purchase(call):
         # Deduct coins
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute(
                     "UPDATE users SET coins = coins - %s WHERE user_id = %s",
                     (item.cost, call.from_user.id)
@@ -7797,15 +8762,15 @@ def handle_item_purchase(call):
                     "UPDATE users SET coins = coins - ? WHERE user_id = ?",
                     (item.cost, call.from_user.id)
                 )
+        _coins_cache.invalidate(call.from_user.id)
         
         # Add to inventory
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 now = datetime.now(timezone.utc).isoformat()
                 
-                if is_postgres:
+                if IS_POSTGRES:
                     cur.execute("""
                         INSERT INTO user_inventory (user_id, item_type, item_id, quantity, acquired_at)
                         VALUES (%s, %s, %s, 1, %s)
@@ -7850,29 +8815,31 @@ def handle_item_purchase(call):
         bot.answer_callback_query(call.id, "Error purchasing item")
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('shot_'))
+# Map shot types to aggressive levels
+_SHOT_AGGRESSION = {
+    'defend': 0.2,
+    'single': 0.4,
+    'two': 0.5,
+    'attack': 0.7,
+    'boundary': 0.85,
+    'big': 0.95
+}
+
+
+@callback_route(prefix='shot_')
 @rate_limit_check('callback')
 def handle_shot_selection(call):
     """Handle batting shot selection"""
     try:
+        chat_id = call.message.chat.id
         shot_type = call.data.replace('shot_', '')
-        game = GameState(call.message.chat.id)
+        game = GameState(chat_id)
         
         if game.data.get('batting') != 'player':
             bot.answer_callback_query(call.id, "It's not your turn to bat!")
             return
         
-        # Map shot types to aggressive levels
-        shot_aggression = {
-            'defend': 0.2,
-            'single': 0.4,
-            'two': 0.5,
-            'attack': 0.7,
-            'boundary': 0.85,
-            'big': 0.95
-        }
-        
-        aggression = shot_aggression.get(shot_type, 0.5)
+        aggression = _SHOT_AGGRESSION.get(shot_type, 0.5)
         
         # Simulate ball outcome based on shot
         outcome = simulate_player_ball(game, aggression)
@@ -7889,11 +8856,11 @@ def handle_shot_selection(call):
         
         # Send full update
         scorecard = generate_live_scorecard(game)
-        bot.send_message(
-            call.message.chat.id,
+        send_async(
+            chat_id,
             f"{commentary}\n\n<pre>{scorecard}</pre>",
             parse_mode="HTML",
-            reply_markup=kb_match_actions(game)
+            reply_markup=kb_delivery_actions(game)
         )
         
     except Exception as e:
@@ -7901,8 +8868,37 @@ def handle_shot_selection(call):
         bot.answer_callback_query(call.id, "Error processing shot")
 
 
+# Runs distribution per shot band:
+# (aggression floor, cumulative thresholds, boundary-bonus flags, outcomes).
+# Outcome i applies when rand < thresholds[i] (first match); the last outcome
+# is the fall-through. Each outcome is a tuple of equally likely run values.
+_SHOT_BANDS = (
+    (0.85, (0.25, 0.45, 0.65), (True, True, False), ((6,), (4,), (1, 2, 3), (0,))),  # Big shot
+    (0.65, (0.15, 0.35, 0.70), (True, True, False), ((6,), (4,), (1, 2, 3), (0,))),  # Aggressive
+    (0.45, (0.05, 0.20, 0.75), (True, True, False), ((6,), (4,), (1, 2), (0,))),     # Moderate
+    (float('-inf'), (0.02, 0.60), (False, False), ((4,), (0, 1), (0,))),            # Defensive
+)
+
+
+def _roll_shot_runs(aggression: float, boundary_bonus: float = 0) -> int:
+    """Draw runs for a shot with one random() call and a bisect into the band's CDF"""
+    for floor, cdf, boosted, outcomes in _SHOT_BANDS:
+        if aggression > floor:
+            break
+    
+    if boundary_bonus:
+        # Running max keeps the shifted thresholds sorted with first-match semantics
+        cdf = tuple(itertools.accumulate(
+            (t + boundary_bonus if boost else t for t, boost in zip(cdf, boosted)), max
+        ))
+    
+    options = outcomes[bisect.bisect_right(cdf, random.random())]
+    return options[0] if len(options) == 1 else random.choice(options)
+
+
 def simulate_player_ball(game: GameState, aggression: float) -> dict:
     """Simulate a ball based on player's shot selection"""
+    rand = random.random
     difficulty = calculate_dynamic_difficulty(game, {})  # Pass user stats if available
     
     # Check for active power-ups
@@ -7914,55 +8910,20 @@ def simulate_player_ball(game: GameState, aggression: float) -> dict:
     
     # Check for wicket protection power-up
     wicket_save_chance = powerup_effects.get('wicket_save_chance', 0)
-    if random.random() < wicket_save_chance:
+    if rand() < wicket_save_chance:
         wicket_chance = 0  # Power-up saves from wicket
     
     # Auto-save wicket power-up
-    if powerup_effects.get('auto_save_wicket') and random.random() < wicket_chance:
+    if powerup_effects.get('auto_save_wicket') and rand() < wicket_chance:
         wicket_chance = 0
         bot.send_message(game.chat_id, "🛡️ WICKET GUARD activated! Wicket saved!")
     
-    if random.random() < wicket_chance:
+    if rand() < wicket_chance:
         game.data['player_wkts'] += 1
         return {'type': 'wicket', 'runs': 0}
     
     # Runs distribution based on aggression
-    rand = random.random()
-    
-    if aggression > 0.85:  # Big shot
-        if rand < 0.25 + boundary_bonus:
-            runs = 6
-        elif rand < 0.45 + boundary_bonus:
-            runs = 4
-        elif rand < 0.65:
-            runs = random.choice([1, 2, 3])
-        else:
-            runs = 0  # Dot ball
-    elif aggression > 0.65:  # Aggressive
-        if rand < 0.15 + boundary_bonus:
-            runs = 6
-        elif rand < 0.35 + boundary_bonus:
-            runs = 4
-        elif rand < 0.70:
-            runs = random.choice([1, 2, 3])
-        else:
-            runs = 0
-    elif aggression > 0.45:  # Moderate
-        if rand < 0.05 + boundary_bonus:
-            runs = 6
-        elif rand < 0.20 + boundary_bonus:
-            runs = 4
-        elif rand < 0.75:
-            runs = random.choice([1, 2])
-        else:
-            runs = 0
-    else:  # Defensive
-        if rand < 0.02:
-            runs = 4
-        elif rand < 0.60:
-            runs = random.choice([0, 1])
-        else:
-            runs = 0
+    runs = _roll_shot_runs(aggression, boundary_bonus)
     
     # Apply weather/pitch effects
     runs = apply_weather_pitch_effects(game, 'batting', runs)
@@ -7996,27 +8957,16 @@ def cmd_powerups(message):
         user_coins = _get_user_coins(message.from_user.id)
         
         shop_text = (
-            "🛒 <b>POWER-UPS SHOP</b>\n"
+            _SHOP_HEADER +
             f"💰 Your Balance: <b>{user_coins} coins</b>\n\n"
             "Purchase power-ups to gain advantages in matches!\n\n"
         )
         
-        for powerup_id, powerup in PowerUp.POWERUPS.items():
-            cost = powerup['cost']
-            can_afford = user_coins >= cost
-            status = "✅" if can_afford else "🔒"
-            
-            shop_text += (
-                f"{status} <b>{powerup['name']}</b>\n"
-                f"   {powerup['description']}\n"
-                f"   ⏱️ Duration: {powerup['duration']} over(s)\n"
-                f"   💰 Cost: {cost} coins "
-            )
-            
-            if not can_afford:
-                shop_text += f"(Need {cost - user_coins} more)\n\n"
-            else:
-                shop_text += "\n\n"
+        shop_text += "".join(
+            f"✅{row} \n\n" if user_coins >= cost
+            else f"🔒{row} (Need {cost - user_coins} more)\n\n"
+            for cost, row in _POWERUP_DETAIL_ROWS
+        )
         
         shop_text += (
             f"{'─'*40}\n"
@@ -8035,15 +8985,38 @@ def cmd_powerups(message):
         bot.reply_to(message, "❌ Error loading power-ups shop")
 
 
-@bot.message_handler(func=lambda msg: msg.text and "📋" in msg.text)
 def handle_menu_button(message):
     cmd_main_menu(message)
 
-@bot.message_handler(func=lambda msg: msg.text and "🛒" in msg.text)
 def handle_shop_button(message):
     send_shop_menu(message.chat.id, message.from_user.id)
 
 
+# Reply-keyboard buttons: exact button text first, then the leading emoji
+BUTTON_HANDLERS = {
+    "📊 Score": handle_score_request,
+    "📊": cmd_stats,
+    "🏳️": handle_forfeit_request,
+    "🏏": handle_play_button,
+    "📋": handle_menu_button,
+    "🛒": handle_shop_button,
+}
+
+
+def _find_button_handler(text: str):
+    if not text:
+        return None
+    handler = BUTTON_HANDLERS.get(text)
+    if handler is None:
+        handler = BUTTON_HANDLERS.get(text.split(None, 1)[0])
+    return handler
+
+
+@bot.message_handler(func=lambda message: _find_button_handler(message.text) is not None)
+def handle_button_press(message):
+    _find_button_handler(message.text)(message)
+
+
 @bot.message_handler(commands=['achievements'])
 @rate_limit_check('command')
 def cmd_achievements(message):
@@ -8078,6 +9051,13 @@ def cmd_leaderboard(message):
 
 
 
+SQL_USER_INVENTORY = f"""
+    SELECT item_type, item_id, quantity
+    FROM user_inventory
+    WHERE user_id = {PARAM_STYLE}
+"""
+
+
 @bot.message_handler(commands=['inventory'])
 @rate_limit_check('command')
 def cmd_inventory(message):
@@ -8085,16 +9065,9 @@ def cmd_inventory(message):
     try:
         user_id = message.from_user.id
         
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
-            
-            cur.execute(f"""
-                SELECT item_type, item_id, quantity
-                FROM user_inventory
-                WHERE user_id = {param_style}
-            """, (user_id,))
+            execute_prepared(cur, "user_inventory_stmt", SQL_USER_INVENTORY, (user_id,))
             
             items = cur.fetchall()
             
@@ -8170,13 +9143,9 @@ def cmd_profile(message):
         
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Get user data
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
-            cur.execute(f"SELECT * FROM users WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT * FROM users WHERE user_id = {PARAM_STYLE}", (user_id,))
             user = cur.fetchone()
             
             if not user:
@@ -8184,11 +9153,11 @@ def cmd_profile(message):
                 return
             
             # Get stats
-            cur.execute(f"SELECT * FROM stats WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT * FROM stats WHERE user_id = {PARAM_STYLE}", (user_id,))
             stats = cur.fetchone()
             
             # Get level
-            cur.execute(f"SELECT * FROM user_levels WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT * FROM user_levels WHERE user_id = {PARAM_STYLE}", (user_id,))
             level = cur.fetchone()
             
             games_played = stats['games_played'] if stats else 0
@@ -8218,20 +9187,21 @@ def cmd_profile(message):
         logger.error(f"Error in profile command: {e}")
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('shop_'))
+_SHOP_CATEGORY_MAP = {
+    'shop_equipment': 'equipment',
+    'shop_gloves': 'gloves',
+    'shop_helmets': 'helmets',
+    'shop_powerups': 'powerups',
+    'shop_all': None
+}
+
+
+@callback_route(prefix='shop_')
 @rate_limit_check('callback')
 def handle_shop_callback(call):
     """Handle shop category selection"""
     try:
-        category_map = {
-            'shop_equipment': 'equipment',
-            'shop_gloves': 'gloves',
-            'shop_helmets': 'helmets',
-            'shop_powerups': 'powerups',
-            'shop_all': None
-        }
-        
-        category = category_map.get(call.data)
+        category = _SHOP_CATEGORY_MAP.get(call.data)
         send_shop_menu(call.message.chat.id, call.from_user.id, category)
         bot.answer_callback_query(call.id)
         
@@ -8259,13 +9229,11 @@ def cmd_replay(message):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Get last match
             cur.execute(f"""
                 SELECT * FROM match_history
-                WHERE user_id = {param_style}
+                WHERE user_id = {PARAM_STYLE}
                 ORDER BY created_at DESC
                 LIMIT 1
             """, (message.from_user.id,))
@@ -8330,14 +9298,12 @@ def cmd_daily(message):
         # Ensure challenges exist
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
             # Get active challenges
-            param_style = "%s" if is_postgres else "?"
             cur.execute(f"""
                 SELECT * FROM daily_challenges 
-                WHERE expires_at > {param_style}
+                WHERE expires_at > {PARAM_STYLE}
                 ORDER BY created_at DESC
             """, (now,))
             
@@ -8353,7 +9319,7 @@ def cmd_daily(message):
                 cur = conn.cursor()
                 cur.execute(f"""
                     SELECT * FROM daily_challenges 
-                    WHERE expires_at > {param_style}
+                    WHERE expires_at > {PARAM_STYLE}
                     ORDER BY created_at DESC
                 """, (now,))
                 active_challenges = cur.fetchall()
@@ -8388,10 +9354,9 @@ def cmd_daily(message):
             # Get completion status from user_challenges table
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                param_style = "%s" if is_postgres else "?"
                 cur.execute(f"""
                     SELECT completed, claimed FROM user_challenges 
-                    WHERE user_id = {param_style} AND challenge_id = {param_style}
+                    WHERE user_id = {PARAM_STYLE} AND challenge_id = {PARAM_STYLE}
                 """, (user_id, challenge_id))
                 user_challenge = cur.fetchone()
             
@@ -8488,7 +9453,7 @@ def cmd_quick_match(message):
 
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'view_achievements')
+@callback_route('view_achievements')
 @rate_limit_check('callback')
 def handle_view_achievements_callback(call):
     """Show achievements from profile"""
@@ -8503,9 +9468,9 @@ def handle_view_achievements_callback(call):
         bot.answer_callback_query(call.id, "Error loading achievements")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'shop')
+@callback_route('shop')
 @rate_limit_check('callback')
-def handle_shop_callback(call):
+def handle_shop_overview_callback(call):
     """Show shop from profile"""
     try:
         user_coins = _get_user_coins(call.from_user.id)
@@ -8533,20 +9498,18 @@ def handle_shop_callback(call):
         bot.answer_callback_query(call.id, "Error loading shop")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'inventory')
+@callback_route('inventory')
 @rate_limit_check('callback')
 def handle_inventory_callback(call):
     """Show inventory from profile"""
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             cur.execute(f"""
                 SELECT item_type, item_id, quantity
                 FROM user_inventory
-                WHERE user_id = {param_style}
+                WHERE user_id = {PARAM_STYLE}
             """, (call.from_user.id,))
             
             items = cur.fetchall()
@@ -8572,7 +9535,7 @@ def handle_inventory_callback(call):
         bot.answer_callback_query(call.id, "Error loading inventory")
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('claim_'))
+@callback_route(prefix='claim_')
 @rate_limit_check('callback')
 def handle_challenge_claim_callback(call):
     """Claim challenge rewards"""
@@ -8581,15 +9544,13 @@ def handle_challenge_claim_callback(call):
         
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Check if challenge is completed and not claimed
             cur.execute(f"""
                 SELECT uc.completed, uc.claimed, dc.reward_coins, dc.reward_xp, dc.description
                 FROM user_challenges uc
                 JOIN daily_challenges dc ON uc.challenge_id = dc.id
-                WHERE uc.user_id = {param_style} AND uc.challenge_id = {param_style}
+                WHERE uc.user_id = {PARAM_STYLE} AND uc.challenge_id = {PARAM_STYLE}
             """, (call.from_user.id, challenge_id))
             
             challenge = cur.fetchone()
@@ -8611,7 +9572,7 @@ def handle_challenge_claim_callback(call):
             _award_xp(call.from_user.id, challenge['reward_xp'])
             
             # Mark as claimed
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     UPDATE user_challenges SET claimed = TRUE
                     WHERE user_id = %s AND challenge_id = %s
@@ -8666,20 +9627,18 @@ def handle_challenge_claim_callback(call):
         bot.answer_callback_query(call.id, "Error claiming reward")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'detailed_stats')
+@callback_route('detailed_stats')
 @rate_limit_check('callback')
 def handle_detailed_stats_callback(call):
     """Show detailed match statistics"""
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Get recent matches
             cur.execute(f"""
                 SELECT * FROM match_history
-                WHERE user_id = {param_style}
+                WHERE user_id = {PARAM_STYLE}
                 ORDER BY created_at DESC
                 LIMIT 5
             """, (call.from_user.id,))
@@ -8722,13 +9681,15 @@ def handle_detailed_stats_callback(call):
         bot.answer_callback_query(call.id, "Error loading stats")
 
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('bowl_'))
+@callback_route(prefix='bowl_')
 @rate_limit_check('callback')
 def handle_bowling_selection(call):
     """Handle bowling delivery selection"""
     try:
+        chat_id = call.message.chat.id
+        user_id = call.from_user.id
         bowl_type = call.data.replace('bowl_', '')
-        game = GameState(call.message.chat.id)
+        game = GameState(chat_id)
         
         if game.data.get('batting') != 'bot':
             bot.answer_callback_query(call.id, "Bot is not batting!")
@@ -8808,9 +9769,9 @@ def handle_bowling_selection(call):
         innings_check = check_innings_end(game)
         if innings_check['innings_end']:
             if game.data.get('innings') == 1:
-                handle_innings_break(call.message.chat.id, game, innings_check['reason'])
+                handle_innings_break(chat_id, game, innings_check['reason'])
             else:
-                handle_match_completion(call.message.chat.id, call.from_user.id, game)
+                handle_match_completion(chat_id, user_id, game)
             bot.answer_callback_query(call.id)
             return
         
@@ -8818,11 +9779,11 @@ def handle_bowling_selection(call):
         scorecard = generate_live_scorecard(game)
         bot.answer_callback_query(call.id, commentary[:200])
         
-        bot.send_message(
-            call.message.chat.id,
+        send_async(
+            chat_id,
             f"{commentary}\n\n<pre>{scorecard}</pre>",
             parse_mode="HTML",
-            reply_markup=kb_match_actions(game)
+            reply_markup=kb_delivery_actions(game)
         )
         
     except Exception as e:
@@ -8872,7 +9833,7 @@ def handle_innings_break(chat_id: int, game: GameState, reason: str):
         logger.error(f"Error handling innings break: {e}")
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'start_second_innings')
+@callback_route('start_second_innings')
 @rate_limit_check('callback')
 def handle_start_second_innings(call):
     """Start the second innings"""
@@ -8891,7 +9852,7 @@ def handle_start_second_innings(call):
             call.message.chat.id,
             call.message.message_id,
             parse_mode="HTML",
-            reply_markup=kb_match_actions(game)
+            reply_markup=kb_delivery_actions(game)
         )
         
         bot.answer_callback_query(call.id, "Second innings started!")
@@ -8902,13 +9863,13 @@ def handle_start_second_innings(call):
 
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'tournament_join')
+@callback_route('tournament_join')
 def handle_tournament_join(call):
     """Show available tournaments to join"""
     show_all_tournaments(call.message.chat.id)
     bot.answer_callback_query(call.id)
 
-@bot.callback_query_handler(func=lambda call: call.data.startswith('tourn_start_'))
+@callback_route(prefix='tourn_start_')
 def handle_tournament_start(call):
     """Start tournament if creator"""
     try:
@@ -8938,7 +9899,7 @@ def handle_tournament_start(call):
 
 
 
-@bot.callback_query_handler(func=lambda call: call.data == 'help')
+@callback_route('help')
 def handle_help_callback(call):
     help_text = (
         "🏏 <b>HOW TO PLAY</b>\n\n"
@@ -8993,49 +9954,25 @@ def ensure_user_exists(user_id: int, username: str = None, first_name: str = Non
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
-            cur.execute(f"SELECT user_id FROM users WHERE user_id = {param_style}", (user_id,))
+            # Conditional inserts: no existence probe, and rows missing from
+            # any one table are filled in even when the others already exist
+            cur.execute(f"""
+                INSERT INTO users (user_id, username, first_name, coins, created_at, last_active)
+                VALUES ({PARAM_STYLE}, {PARAM_STYLE}, {PARAM_STYLE}, 100, {SQL_NOW}, {SQL_NOW})
+                ON CONFLICT (user_id) DO NOTHING
+            """, (user_id, username, first_name))
+            created = cur.rowcount > 0
             
-            if not cur.fetchone():
-                now = datetime.now(timezone.utc).isoformat()
-                
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO users (user_id, username, first_name, coins, created_at, last_active)
-                        VALUES (%s, %s, %s, 100, %s, %s)
-                    """, (user_id, username, first_name, now, now))
-                else:
-                    cur.execute("""
-                        INSERT INTO users (user_id, username, first_name, coins, created_at, last_active)
-                        VALUES (?, ?, ?, 100, ?, ?)
-                    """, (user_id, username, first_name, now, now))
-                
-                # Create stats entry
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO stats (user_id, created_at, updated_at)
-                        VALUES (%s, %s, %s)
-                    """, (user_id, now, now))
-                else:
-                    cur.execute("""
-                        INSERT INTO stats (user_id, created_at, updated_at)
-                        VALUES (?, ?, ?)
-                    """, (user_id, now, now))
-                
-                # Create level entry
-                if is_postgres:
-                    cur.execute("""
-                        INSERT INTO user_levels (user_id, level, experience, next_level_xp, total_xp)
-                        VALUES (%s, 1, 0, 100, 0)
-                    """, (user_id,))
-                else:
-                    cur.execute("""
-                        INSERT INTO user_levels (user_id, level, experience, next_level_xp, total_xp)
-                        VALUES (?, 1, 0, 100, 0)
-                    """, (user_id,))
-                
+            execute_prepared(cur, "insert_stats_row_stmt", SQL_INSERT_STATS_ROW, (user_id,))
+            
+            cur.execute(f"""
+                INSERT INTO user_levels (user_id, level, experience, next_level_xp, total_xp)
+                VALUES ({PARAM_STYLE}, 1, 0, 100, 0)
+                ON CONFLICT (user_id) DO NOTHING
+            """, (user_id,))
+            
+            if created:
                 logger.info(f"Created new user: {user_id}")
     except Exception as e:
         logger.error(f"Error ensuring user exists: {e}")
@@ -9046,7 +9983,6 @@ def save_match_to_history(chat_id: int, user_id: int, game: GameState, result: s
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             now = datetime.now(timezone.utc).isoformat()
             
             overs_played = game.data.get('overs_bowled', 0) + (game.data.get('balls_in_over', 0) / 6.0)
@@ -9056,7 +9992,7 @@ def save_match_to_history(chat_id: int, user_id: int, game: GameState, result: s
             
             duration = 5  # Estimate - you can track actual time if needed
             
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     INSERT INTO match_history (
                         chat_id, user_id, match_format, player_score, bot_score,
@@ -9091,86 +10027,30 @@ def update_user_stats_after_match(user_id: int, game: GameState, result: str):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
-            # Get current stats
-            cur.execute(f"SELECT * FROM stats WHERE user_id = {param_style}", (user_id,))
+            is_win = 1 if result == 'win' else 0
+            player_score = game.data.get('player_score', 0)
+            balls = game.data.get('player_balls_faced', 0)
+            ducks_increment = 1 if player_score == 0 and game.data.get('player_wkts', 0) > 0 else 0
+            
+            # Counters, streaks and ratios are updated from the stored row in
+            # one statement, which hands back the totals the leaderboards need
+            execute_prepared(cur, "update_match_stats_stmt", SQL_UPDATE_MATCH_STATS, (
+                is_win, 1 if result == 'loss' else 0, 1 if result == 'tie' else 0, is_win, is_win,
+                player_score, balls, game.data.get('player_sixes', 0), game.data.get('player_fours', 0),
+                1 if player_score >= 100 else 0, 1 if 50 <= player_score < 100 else 0, ducks_increment,
+                player_score, player_score, player_score, balls, user_id
+            ))
             stats = cur.fetchone()
             
             if not stats:
                 return
             
-            # Calculate new stats
-            games_played = stats['games_played'] + 1
-            wins = stats['wins'] + (1 if result == 'win' else 0)
-            losses = stats['losses'] + (1 if result == 'loss' else 0)
-            ties = stats['ties'] + (1 if result == 'tie' else 0)
-            
-            player_score = game.data.get('player_score', 0)
-            total_runs = stats['total_runs'] + player_score
-            total_balls = stats['total_balls_faced'] + game.data.get('player_balls_faced', 0)
-            
-            high_score = max(stats['high_score'], player_score)
-            avg_score = total_runs / games_played if games_played > 0 else 0
-            strike_rate = (total_runs / total_balls * 100) if total_balls > 0 else 0
-            
-            sixes = stats['sixes_hit'] + game.data.get('player_sixes', 0)
-            fours = stats['fours_hit'] + game.data.get('player_fours', 0)
-            
-            centuries = stats['centuries'] + (1 if player_score >= 100 else 0)
-            fifties = stats['fifties'] + (1 if 50 <= player_score < 100 else 0)
-            ducks = stats['ducks'] + (1 if player_score == 0 and game.data.get('player_wkts', 0) > 0 else 0)
-            
-            # Update streak
-            if result == 'win':
-                current_streak = stats['current_winning_streak'] + 1
-                longest_streak = max(stats['longest_winning_streak'], current_streak)
-            else:
-                current_streak = 0
-                longest_streak = stats['longest_winning_streak']
-            
-            now = datetime.now(timezone.utc).isoformat()
-            
-            # Update database
-            if is_postgres:
-                cur.execute("""
-                    UPDATE stats SET
-                        games_played = %s, wins = %s, losses = %s, ties = %s,
-                        total_runs = %s, total_balls_faced = %s, high_score = %s,
-                        avg_score = %s, strike_rate = %s, sixes_hit = %s, fours_hit = %s,
-                        centuries = %s, fifties = %s, ducks = %s,
-                        current_winning_streak = %s, longest_winning_streak = %s,
-                        updated_at = %s
-                    WHERE user_id = %s
-                """, (
-                    games_played, wins, losses, ties, total_runs, total_balls,
-                    high_score, avg_score, strike_rate, sixes, fours,
-                    centuries, fifties, ducks, current_streak, longest_streak,
-                    now, user_id
-                ))
-            else:
-                cur.execute("""
-                    UPDATE stats SET
-                        games_played = ?, wins = ?, losses = ?, ties = ?,
-                        total_runs = ?, total_balls_faced = ?, high_score = ?,
-                        avg_score = ?, strike_rate = ?, sixes_hit = ?, fours_hit = ?,
-                        centuries = ?, fifties = ?, ducks = ?,
-                        current_winning_streak = ?, longest_winning_streak = ?,
-                        updated_at = ?
-                    WHERE user_id = ?
-                """, (
-                    games_played, wins, losses, ties, total_runs, total_balls,
-                    high_score, avg_score, strike_rate, sixes, fours,
-                    centuries, fifties, ducks, current_streak, longest_streak,
-                    now, user_id
-                ))
-            
             # Update leaderboards
-            update_leaderboard(user_id, 'highest_score', high_score)
-            update_leaderboard(user_id, 'most_wins', wins)
-            update_leaderboard(user_id, 'win_streak', longest_streak)
-            update_leaderboard(user_id, 'most_sixes', sixes)
+            update_leaderboard(user_id, 'highest_score', stats['high_score'], conn)
+            update_leaderboard(user_id, 'most_wins', stats['wins'], conn)
+            update_leaderboard(user_id, 'win_streak', stats['longest_winning_streak'], conn)
+            update_leaderboard(user_id, 'most_sixes', stats['sixes_hit'], conn)
             
     except Exception as e:
         logger.error(f"Error updating user stats: {e}")
@@ -9205,18 +10085,16 @@ def handle_match_completion(chat_id: int, user_id: int, game: GameState):
         try:
             with get_db_connection() as conn:
                 cur = conn.cursor()
-                is_postgres = bool(os.getenv("DATABASE_URL"))
                 
                 # First ensure user exists
-                param_style = "%s" if is_postgres else "?"
-                cur.execute(f"SELECT user_id, coins FROM users WHERE user_id = {param_style}", (user_id,))
+                cur.execute(f"SELECT user_id, coins FROM users WHERE user_id = {PARAM_STYLE}", (user_id,))
                 user = cur.fetchone()
                 
                 if user:
                     old_coins = user['coins']
                     new_coins = old_coins + coins_reward
                     
-                    if is_postgres:
+                    if IS_POSTGRES:
                         cur.execute("UPDATE users SET coins = %s WHERE user_id = %s", (new_coins, user_id))
                     else:
                         cur.execute("UPDATE users SET coins = ? WHERE user_id = ?", (new_coins, user_id))
@@ -9227,10 +10105,11 @@ def handle_match_completion(chat_id: int, user_id: int, game: GameState):
                     # Create user if not exists
                     ensure_user_exists(user_id, None, None)
                     # Try awarding again
-                    if is_postgres:
+                    if IS_POSTGRES:
                         cur.execute("UPDATE users SET coins = coins + %s WHERE user_id = %s", (coins_reward, user_id))
                     else:
                         cur.execute("UPDATE users SET coins = coins + ? WHERE user_id = ?", (coins_reward, user_id))
+            _coins_cache.invalidate(user_id)
         except Exception as e:
             logger.error(f"Error awarding coins: {e}")
         
@@ -9261,9 +10140,7 @@ def handle_match_completion(chat_id: int, user_id: int, game: GameState):
         # Get winning streak for achievement check
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
-            cur.execute(f"SELECT current_winning_streak FROM stats WHERE user_id = {param_style}", (user_id,))
+            cur.execute(f"SELECT current_winning_streak FROM stats WHERE user_id = {PARAM_STYLE}", (user_id,))
             stats_row = cur.fetchone()
             if stats_row:
                 match_data['winning_streak'] = stats_row['current_winning_streak']
@@ -9272,18 +10149,17 @@ def handle_match_completion(chat_id: int, user_id: int, game: GameState):
         
         # Update challenges
         tracker = ChallengeTracker(user_id)
-        if result == 'win':
-            tracker.update_progress(ChallengeType.WINS, 1)
-            tracker.update_progress(ChallengeType.STREAK, 1)
-        else:
-            tracker.update_progress(ChallengeType.STREAK, 0)  # Reset streak
-        
-        tracker.update_progress(ChallengeType.SCORE, player_score)
-        tracker.update_progress(ChallengeType.SIXES, game.data.get('player_sixes', 0))
-        tracker.update_progress(
-            ChallengeType.BOUNDARIES,
-            game.data.get('player_fours', 0) + game.data.get('player_sixes', 0)
-        )
+        is_win = 1 if result == 'win' else 0
+        challenge_updates = [
+            (ChallengeType.STREAK, is_win, None),  # 0 resets the streak
+            (ChallengeType.SCORE, player_score, None),
+            (ChallengeType.SIXES, game.data.get('player_sixes', 0), None),
+            (ChallengeType.BOUNDARIES,
+             game.data.get('player_fours', 0) + game.data.get('player_sixes', 0), None),
+        ]
+        if is_win:
+            challenge_updates.insert(0, (ChallengeType.WINS, 1, None))
+        tracker.update_progress_bulk(challenge_updates)
         
         completed_challenges = tracker.check_completion()
         
@@ -9324,7 +10200,7 @@ def handle_match_completion(chat_id: int, user_id: int, game: GameState):
         bot.send_message(
             chat_id,
             summary,
-            reply_markup=kb_post_match({'result': result})
+            reply_markup=kb_match_complete()
         )
         
         # Clean up game
@@ -9336,7 +10212,7 @@ def handle_match_completion(chat_id: int, user_id: int, game: GameState):
 
 def handle_toss_result(chat_id: int, user_choice: str, user_id: int):
     try:
-        toss_result = random.choice(["heads", "tails"])
+        toss_result = _COIN_SIDES[_getrandbits(1)]
         
         if user_choice == toss_result:
             bot.send_message(
@@ -9366,12 +10242,6 @@ def handle_toss_result(chat_id: int, user_choice: str, user_id: int):
         logger.error(f"Error handling toss result: {e}")
         bot.send_message(chat_id, "❌ Error with toss. Please try /play again.")
 
-# Cricket animations
-def send_cricket_animation(chat_id: int, event_type: str, caption: str = ""):
-    """Enhanced animation with GIF priority - REPLACE EXISTING FUNCTION"""
-    return AnimationManager.send_animation(chat_id, event_type, caption)
-
-
 def handle_create_tournament(chat_id: int, user_id: int):
     """Start tournament creation"""
     set_user_session_data(user_id, "creating_tournament", True)
@@ -9438,7 +10308,7 @@ def finalize_tournament_creation(chat_id: int, user_id: int, theme: str):
         format_map = {"fmt_5": 5, "fmt_10": 10, "fmt_20": 20}
         overs = format_map.get(format_key, 10)
         
-        tournament_id = str(int(time.time() * 1000))
+        tournament_id = next_tournament_id()
         tournament = EliteTournament(
             tournament_id,
             f"{theme.upper()} Tournament",
@@ -9564,10 +10434,9 @@ def handle_challenge_claim(chat_id: int, user_id: int, challenge_id: int):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
             
             # Get challenge details - FIXED QUERY
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     SELECT dc.*, uc.completed, uc.claimed
                     FROM daily_challenges dc
@@ -9594,7 +10463,7 @@ def handle_challenge_claim(chat_id: int, user_id: int, challenge_id: int):
             
             # Mark as claimed
             now = datetime.now(timezone.utc).isoformat()
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     UPDATE user_challenges 
                     SET claimed = TRUE, updated_at = %s
@@ -9634,11 +10503,9 @@ def show_challenge_history(chat_id: int, user_id: int):
     try:
         with get_db_connection() as conn:
             cur = conn.cursor()
-            is_postgres = bool(os.getenv("DATABASE_URL"))
-            param_style = "%s" if is_postgres else "?"
             
             # Get last 10 challenges user completed
-            if is_postgres:
+            if IS_POSTGRES:
                 cur.execute("""
                     SELECT dc.id, dc.description, dc.reward_coins, dc.reward_xp, 
                            uc.completed, uc.claimed, uc.updated_at
@@ -9779,28 +10646,32 @@ def get_webhook_info():
 def webhook():
     """Handle incoming webhook updates with better error handling"""
     try:
+        # Reject anything not from Telegram before looking at the body
+        if WEBHOOK_SECRET and not hmac.compare_digest(
+            request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), WEBHOOK_SECRET
+        ):
+            return '', 401
+        
         if request.headers.get('content-type') != 'application/json':
             logger.warning(f"Invalid content-type: {request.headers.get('content-type')}")
             return '', 403
         
-        json_string = request.get_data().decode('utf-8')
+        # Parse the body once straight to a dict; de_json accepts it as-is
+        payload = request.get_json(cache=False, silent=True)
         
-        if not json_string:
-            logger.warning("Empty webhook request")
+        if not payload:
+            logger.warning("Empty or invalid webhook request")
             return '', 400
         
-        logger.debug(f"Received webhook update: {json_string[:100]}...")
+        logger.debug(f"Received webhook update {payload.get('update_id')}")
         
-        update = telebot.types.Update.de_json(json_string)
+        # Nothing would handle it, so skip building the Update objects
+        if not any(key in payload for key in HANDLED_UPDATE_TYPES):
+            return '', 200
         
-        # Log update info
-        if update.message:
-            logger.info(f"Message from {update.message.from_user.id}: {update.message.text}")
-        elif update.callback_query:
-            logger.info(f"Callback from {update.callback_query.from_user.id}: {update.callback_query.data}")
-        
-        # Process update
-        bot.process_new_updates([update])
+        # Queue on the chat's worker and acknowledge right away; Telegram
+        # retries updates whose webhook response is slow
+        dispatch_payload(payload)
         
         return '', 200
         
@@ -9818,7 +10689,7 @@ def test_database():
             result = cur.fetchone()
             
             # Also test if main tables exist
-            if os.getenv("DATABASE_URL"):  # PostgreSQL
+            if IS_POSTGRES:  # PostgreSQL
                 cur.execute("SELECT count(*) FROM information_schema.tables WHERE table_name='users'")
             else:  # SQLite
                 cur.execute("SELECT count(*) FROM sqlite_master WHERE type='table' AND name='users'")
@@ -9829,7 +10700,7 @@ def test_database():
                 'database': 'ok', 
                 'connection_test': str(result),
                 'users_table_exists': table_exists,
-                'db_type': 'postgresql' if os.getenv("DATABASE_URL") else 'sqlite'
+                'db_type': 'postgresql' if IS_POSTGRES else 'sqlite'
             }, 200
             
     except Exception as e:
@@ -9922,6 +10793,11 @@ def check_user_admin(message):
     
     try:
         user_id = int(message.text.split()[1])
+    except (IndexError, ValueError):
+        bot.send_message(message.chat.id, "Usage: /checkuser <user_id>")
+        return
+    
+    try:
         behavior = AntiCheatSystem.check_user_behavior(user_id)
         
         response = f"🔍 <b>User Analysis: {user_id}</b>\n\n"
@@ -9934,8 +10810,9 @@ def check_user_admin(message):
                 response += f"• {v['type']}: {v['details']} ({v['severity']})\n"
         
         bot.send_message(message.chat.id, response)
-    except:
-        bot.send_message(message.chat.id, "Usage: /checkuser <user_id>")
+    except Exception as e:
+        logger.error(f"Error checking user {user_id}: {e}")
+        bot.send_message(message.chat.id, "❌ Error checking user.")
 
 
 @bot.message_handler(commands=['migrate'])
@@ -9981,16 +10858,21 @@ def ban_user_admin(message):
     if message.from_user.id not in ADMIN_IDS:
         return
     
+    parts = message.text.split()
     try:
-        parts = message.text.split()
         user_id = int(parts[1])
-        duration = parts[2] if len(parts) > 2 else 'temporary'
-        reason = ' '.join(parts[3:]) if len(parts) > 3 else 'Admin ban'
-        
+    except (IndexError, ValueError):
+        bot.send_message(message.chat.id, "Usage: /ban <user_id> <temporary|extended|permanent> [reason]")
+        return
+    duration = parts[2] if len(parts) > 2 else 'temporary'
+    reason = ' '.join(parts[3:]) if len(parts) > 3 else 'Admin ban'
+    
+    try:
         AntiCheatSystem.ban_user(user_id, reason, duration, message.from_user.id)
         bot.send_message(message.chat.id, f"✅ User {user_id} banned ({duration})")
-    except:
-        bot.send_message(message.chat.id, "Usage: /ban <user_id> <temporary|extended|permanent> [reason]")
+    except Exception as e:
+        logger.error(f"Error banning user {user_id}: {e}")
+        bot.send_message(message.chat.id, "❌ Error banning user.")
 
 
 start_time = time.time()
@@ -10013,50 +10895,42 @@ def cmd_create_tables(message):
         bot.send_message(message.chat.id, f"❌ Error: {e}")
 
 
-if __name__ == "__main__":
+def initialize_bot():
+    """Prepare the database and background tasks; shared by __main__ and gunicorn"""
+    logger.info("=== CRICKET BOT STARTING ===")
+    logger.info(f"Python version: {sys.version}")
+    logger.info(f"Telebot version: {getattr(telebot, '__version__', '?')}")
+    
+    # Validate environment
+    logger.info("Validating environment...")
+    validate_environment()
+    
+    # Initialize database
+    logger.info("Initializing database...")
+    db_init()
+    warm_db_pool()
+    
+    # Verify additional tables
+    verify_inventory_table()
+    
+    # Create initial daily challenges
+    logger.info("Creating initial daily challenges...")
     try:
-        logger.info("=== CRICKET BOT STARTING ===")
-        logger.info(f"Python version: {sys.version}")
-        logger.info(f"Telebot version: {telebot.__version__}")
-        
-        # Validate environment
-        logger.info("Validating environment...")
-        validate_environment()
-        
-        # Initialize database
-        logger.info("Initializing database...")
-        db_init()
-        
-        # Verify additional tables
-        verify_inventory_table()
-
-        # Create scheduled tasks
-        logger.info("Setting up scheduled tasks...")
         create_daily_challenges()
-        
-        # Create initial daily challenges
-        logger.info("Creating initial daily challenges...")
-        try:
-            create_daily_challenges()
-            logger.info("✓ Daily challenges initialized")
-        except Exception as e:
-            logger.warning(f"Could not create initial challenges: {e}")
+        logger.info("✓ Daily challenges initialized")
+    except Exception as e:
+        logger.warning(f"Could not create initial challenges: {e}")
 
-        # Start scheduler in background
-        def run_scheduled_tasks():
-            schedule.every().day.at("00:00").do(create_daily_challenges)
-            schedule.every().day.at("12:00").do(create_scheduled_tournament)
-            
-            while True:
-                try:
-                    schedule.run_pending()
-                    time.sleep(60)
-                except Exception as e:
-                    logger.error(f"Scheduler error: {e}")
-        
-        scheduler_thread = threading.Thread(target=run_scheduled_tasks, daemon=True)
-        scheduler_thread.start()
-        logger.info("✓ Scheduled tasks started")
+    # Start scheduler in background
+    schedule_daily_tasks()
+    run_every(3600, cleanup_old_sessions)
+    run_every(SQLITE_OPTIMIZE_INTERVAL, optimize_database)
+    logger.info("✓ Scheduled tasks started")
+
+
+if __name__ == "__main__":
+    try:
+        initialize_bot()
         
         if USE_WEBHOOK:
             logger.info("=== WEBHOOK MODE ===")
@@ -10066,11 +10940,13 @@ if __name__ == "__main__":
                 logger.info("✓ Webhook configured successfully")
                 logger.info(f"Starting Flask on port {PORT}...")
                 
-                # Run Flask
+                # Flask's built-in server is for running the file directly;
+                # deployments serve `app` with gunicorn (see gunicorn_config.py)
                 app.run(
                     host='0.0.0.0',
                     port=PORT,
                     debug=False,
+                    threaded=True,  # Serve concurrent webhook requests
                     use_reloader=False  # Important for production
                 )
             else:
@@ -10080,16 +10956,18 @@ if __name__ == "__main__":
         if not USE_WEBHOOK:
             logger.info("=== POLLING MODE ===")
             logger.info("Removing any existing webhook...")
-            bot.remove_webhook()
-            time.sleep(1)
+            remove_webhook_confirmed()
             
             logger.info("✓ Bot is ready to receive messages!")
             logger.info("Press Ctrl+C to stop")
             
+            # Telegram holds getUpdates open for long_polling_timeout; the
+            # client timeout must outlast it or idle polls get cut off early
             bot.infinity_polling(
-                timeout=60,
-                long_polling_timeout=60,
-                skip_pending=True
+                timeout=65,
+                long_polling_timeout=50,
+                skip_pending=True,
+                allowed_updates=list(HANDLED_UPDATE_TYPES)
             )
             
     except KeyboardInterrupt:
@@ -10105,6 +10983,13 @@ if __name__ == "__main__":
 # === FINAL INITIALIZATION (MUST BE AT END) ===
 # This runs when the module is loaded by gunicorn
 
+if __name__ != "__main__":
+    try:
+        initialize_bot()
+    except Exception as e:
+        logger.error(f"Startup under WSGI server failed: {e}", exc_info=True)
+        raise
+
 # Log handler registration
 logger.info(f"=== HANDLERS REGISTERED ===")
 logger.info(f"Message handlers: {len(bot.message_handlers)}")
@@ -10119,9 +11004,6 @@ try:
     if USE_WEBHOOK and WEBHOOK_URL:
         logger.info("=== FINAL WEBHOOK SETUP ===")
         
-        # Small delay to ensure everything is loaded
-        time.sleep(1)
-        
         setup_webhook()
         logger.info("=== BOT READY TO RECEIVE UPDATES ===")
         logger.info(f"Webhook URL: {WEBHOOK_URL}/webhook/{TOKEN[:10]}...")